@@ -0,0 +1,136 @@
+# benchmarks/archive_benchmark.py
+
+"""评论归档基准
+
+生成测试评论，对比归档前后的数据库文件大小，以及只命中在线表和需要读取归档页的查询耗时。
+安装zstandard时归档页使用zstd压缩，否则使用zlib。
+
+用法:
+    python benchmarks/archive_benchmark.py
+    python benchmarks/archive_benchmark.py --rows 200000 --days 270
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.archive import ARCHIVE_COLUMNS
+
+WORDS = ['前排', '哈哈哈', '好看', 'up主', '三连', '支持', '名场面', '破防了', '下次一定', '泪目', '打卡', '来了']
+
+# (名称, query_comments_batch参数)
+QUERIES = [
+    ('最新评论', ('1', '', 100, 0, 'publish_time', 'DESC')),
+    ('最早评论', ('1', '', 100, 0, 'publish_time', 'ASC')),
+    ('深翻页', ('1', '', 100, 20000, 'publish_time', 'DESC')),
+    ('按点赞排序', ('1', '', 100, 0, 'like_count', 'DESC')),
+    ('搜索内容', ('5', '名场面', 100, 0, 'publish_time', 'DESC')),
+    ('搜索视频', ('2', 'BV00000001', 100, 0, 'publish_time', 'DESC')),
+]
+
+
+def generate(rows, seed=42):
+    """生成发布时间分布在最近一年内的测试评论
+
+    @param {int} rows - 评论条数
+    @param {int} seed - 随机种子
+    @return {list} - 与ARCHIVE_COLUMNS顺序一致的行元组列表
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    create_time = now.strftime('%Y-%m-%d %H:%M:%S')
+    result = []
+    for i in range(rows):
+        publish_time = now - timedelta(seconds=rng.randrange(365 * 86400))
+        replies = json.dumps([{'user': 'reply', 'content': '回复'}] * rng.randrange(4), ensure_ascii=False)
+        user = int(rng.paretovariate(1.2)) % 100000
+        result.append((
+            f'BV{rng.randrange(500):08d}', '基准测试视频', str(i), f'user{user}',
+            ''.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))),
+            publish_time.strftime('%Y-%m-%d %H:%M:%S'),
+            int(rng.paretovariate(1.1)) - 1, replies, create_time, create_time, user + 1
+        ))
+    return result
+
+
+def timed(func, repeat):
+    """多次执行取中位数耗时(毫秒)"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def measure(db_handler, repeat, cold):
+    """测量各查询的耗时
+
+    @param {DatabaseHandler} db_handler - 数据库处理器
+    @param {int} repeat - 重复次数
+    @param {bool} cold - 每次查询前是否清空归档页缓存
+    @return {dict} - 查询名称到耗时(毫秒)的映射
+    """
+    result = {}
+    for name, params in QUERIES:
+        def run(params=params):
+            if cold:
+                db_handler.archive_cache.clear()
+            db_handler.query_comments_batch(*params)
+        result[name] = timed(run, repeat)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评论归档基准")
+    parser.add_argument('--rows', type=int, default=500000, help="评论条数")
+    parser.add_argument('--days', type=int, default=180, help="归档发布超过该天数的评论")
+    parser.add_argument('--repeat', type=int, default=5, help="每个查询的重复次数")
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    db_handler = DatabaseHandler(db_file)
+    with db_handler.get_connection() as conn:
+        conn.executemany(
+            f"INSERT INTO comments ({', '.join(ARCHIVE_COLUMNS)}) VALUES ({', '.join('?' * len(ARCHIVE_COLUMNS))})",
+            generate(args.rows)
+        )
+        conn.commit()
+
+    before_time = (datetime.now() - timedelta(days=args.days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    size_before = os.path.getsize(db_file)
+    live_before = measure(db_handler, args.repeat, cold=False)
+
+    start = time.perf_counter()
+    result = db_handler.archive_comments(before_time)
+    archive_seconds = time.perf_counter() - start
+    db_handler.vacuum()
+    size_after = os.path.getsize(db_file)
+
+    cold = measure(db_handler, args.repeat, cold=True)
+    warm = measure(db_handler, args.repeat, cold=False)
+    stats = db_handler.get_archive_stats()
+
+    print(f"评论数: {args.rows}, 归档: {result['comments']} 条 / {result['pages']} 页, 耗时 {archive_seconds:.1f} s")
+    print(f"归档页压缩率: {stats['ratio']:.1f}x")
+    print(f"数据库文件: {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB "
+          f"({size_after / size_before:.0%})")
+    print(f"\n{'查询':<12}{'归档前(ms)':>12}{'归档后冷(ms)':>14}{'归档后热(ms)':>14}")
+    for name, _ in QUERIES:
+        print(f"{name:<12}{live_before[name]:>12.1f}{cold[name]:>14.1f}{warm[name]:>14.1f}")
+    print(f"\n归档页缓存: 命中 {stats['cache_hits']} 次, 未命中 {stats['cache_misses']} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/crawl_process_benchmark.py
+
+"""爬取进程模式基准
+
+在临时目录中生成一个视频的评论页响应缓存，以回放模式(不访问网络、不限速)分别用
+界面线程模式和独立进程模式爬取，同时在界面线程中运行一个10毫秒的定时器，
+统计定时器的实际触发间隔，用以衡量爬取期间界面事件循环的卡顿程度。
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/crawl_process_benchmark.py
+    python benchmarks/crawl_process_benchmark.py --pages 500
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication, QMessageBox
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.spiders.comment_spider import BilibiliSpider
+from bilibili_spider.pages.crawl_page import CrawlPage, CrawlWorker
+
+BVID = 'BV17x411w7KC'
+PAGE_SIZE = 20
+
+
+def build_cache(config, pages):
+    """生成视频信息和评论页的响应缓存
+
+    @param {Config} config - 回放模式的配置
+    @param {int} pages - 评论页数
+    """
+    spider = BilibiliSpider(config)
+    cache = spider.response_cache
+    total = pages * PAGE_SIZE
+    cache.put(f'https://api.bilibili.com/x/web-interface/view?bvid={BVID}', json.dumps({
+        'code': 0, 'data': {'title': '基准视频', 'aid': 170001, 'stat': {'reply': total}}
+    }).encode('utf-8'))
+    for page in range(1, pages + 1):
+        replies = [{
+            'rpid': page * 1000 + index,
+            'mid': index,
+            'member': {'uname': f'用户{index}', 'mid': index, 'level_info': {'current_level': 4}},
+            'content': {'message': f'第{page}页的第{index}条评论，' * 4},
+            'ctime': 1700000000 + page * 60 + index,
+            'like': index,
+            'replies': [{'member': {'uname': '回复者'}, 'content': {'message': '楼中楼回复'}, 'ctime': 1700000000}]
+        } for index in range(PAGE_SIZE)]
+        cache.put(spider.get_api_url(BVID, page, spider.SORT_BY_REPLY), json.dumps({
+            'code': 0, 'data': {'page': {'count': total, 'size': PAGE_SIZE}, 'replies': replies}
+        }).encode('utf-8'))
+    cache.close()
+
+
+def measure(app, page, use_process):
+    """爬取一次并统计界面定时器的触发间隔
+
+    @return {tuple} - (耗时秒数, 平均间隔毫秒, 最大间隔毫秒, 超过50毫秒的次数)
+    """
+    intervals = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        intervals.append((now - last[0]) * 1000)
+        last[0] = now
+
+    timer = QTimer()
+    timer.setInterval(10)
+    timer.timeout.connect(tick)
+
+    page.config.CRAWL_PROCESS = use_process
+    page.spider = BilibiliSpider(page.config)
+    start = time.perf_counter()
+    timer.start()
+    page.launch_crawl(f'https://www.bilibili.com/video/{BVID}', CrawlWorker.MODE_FULL)
+    while not page.start_button.isEnabled():
+        app.processEvents()
+        time.sleep(0.001)
+    page.log_text.flush()
+    app.processEvents()
+    timer.stop()
+    seconds = time.perf_counter() - start
+    return seconds, sum(intervals) / max(len(intervals), 1), max(intervals, default=0), \
+        sum(1 for interval in intervals if interval > 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬取进程模式基准")
+    parser.add_argument('--pages', type=int, default=200, help="评论页数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    config = Config()
+    config.RESPONSE_CACHE_MODE = 'replay'
+    config.RESPONSE_CACHE_DIR = os.path.join(workdir, 'cache')
+    config.LOG_FILE = os.path.join(workdir, 'crawl.log')
+    config.has_valid_cookie = lambda: True
+    build_cache(config, args.pages)
+
+    app = QApplication(sys.argv)
+    # 完成时的对话框会阻塞事件循环，基准中不弹出
+    QMessageBox.information = lambda *args: None
+    QMessageBox.critical = lambda *args: None
+
+    print(f"评论页数: {args.pages}, 评论数: {args.pages * PAGE_SIZE}")
+    for use_process in (False, True):
+        db_handler = DatabaseHandler(os.path.join(workdir, f'comments_{int(use_process)}.db'))
+        page = CrawlPage(db_handler, config)
+        page.page_spinbox.setValue(0)
+        seconds, average, worst, stalls = measure(app, page, use_process)
+        name = "独立进程" if use_process else "界面线程"
+        print(f"{name}: 耗时 {seconds:.2f} s, {args.pages * PAGE_SIZE / seconds:.0f} 条/秒, "
+              f"界面定时器平均间隔 {average:.1f} ms, 最大间隔 {worst:.1f} ms, 超过50 ms {stalls} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/danmaku_benchmark.py
+
+"""弹幕分段解析基准
+
+生成与seg.so接口格式一致的protobuf分段，测量手工解码器逐条解析的速度，
+并对比批量写入与逐条提交两种入库方式的耗时。
+
+用法:
+    python benchmarks/danmaku_benchmark.py
+    python benchmarks/danmaku_benchmark.py --segments 50 --per-segment 6000
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.danmaku import SEGMENT_SECONDS, encode_segment, iter_danmaku
+
+WORDS = ['前方高能', '哈哈哈', 'awsl', '来了', '名场面', '泪目', '23333', '下次一定', '好耶', '？？？', '空降', '打卡']
+
+
+def generate(segments, per_segment, seed=42):
+    """生成模拟的弹幕分段
+
+    @param {int} segments - 分段数
+    @param {int} per_segment - 每个分段的弹幕数
+    @param {int} seed - 随机种子
+    @return {list} - (弹幕元组列表, 编码后的分段)列表
+    """
+    rng = random.Random(seed)
+    result = []
+    dmid = 10 ** 18
+    for index in range(segments):
+        rows = []
+        for _ in range(per_segment):
+            dmid += rng.randint(1, 10 ** 6)
+            rows.append((
+                dmid,
+                index * SEGMENT_SECONDS * 1000 + rng.randrange(SEGMENT_SECONDS * 1000),
+                rng.choice((1, 1, 1, 4, 5)),
+                25,
+                rng.choice((0xffffff, 0xffffff, 0xfe0302, 0x00cd00)),
+                f'{rng.getrandbits(32):08x}',
+                ''.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))),
+                1700000000 + rng.randrange(10 ** 7),
+                rng.randint(1, 10),
+                0
+            ))
+        result.append((rows, encode_segment(rows)))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="弹幕分段解析基准")
+    parser.add_argument('--segments', type=int, default=20, help="分段数")
+    parser.add_argument('--per-segment', type=int, default=3000, help="每个分段的弹幕数")
+    args = parser.parse_args()
+
+    fixtures = generate(args.segments, args.per_segment)
+    total = args.segments * args.per_segment
+    size = sum(len(body) for _, body in fixtures)
+
+    for rows, body in fixtures:
+        assert list(iter_danmaku(body)) == rows, "解码结果与生成的数据不一致"
+
+    start = time.perf_counter()
+    for _, body in fixtures:
+        for _ in iter_danmaku(body):
+            pass
+    decode_seconds = time.perf_counter() - start
+
+    workdir = tempfile.mkdtemp()
+    db_handler = DatabaseHandler(os.path.join(workdir, 'danmaku.db'))
+    start = time.perf_counter()
+    added = 0
+    for index, (_, body) in enumerate(fixtures):
+        added += db_handler.save_danmaku('BV1000000000', 1000 + index % 3, iter_danmaku(body))
+    bulk_seconds = time.perf_counter() - start
+
+    # 同样的分段再写一遍，已入库的弹幕全部跳过
+    again = db_handler.save_danmaku('BV1000000000', 1000, iter_danmaku(fixtures[0][1]))
+
+    # 逐条提交，只测一个分段
+    conn = sqlite3.connect(os.path.join(workdir, 'danmaku.db'))
+    conn.execute('DELETE FROM danmaku')
+    conn.commit()
+    start = time.perf_counter()
+    for row in iter_danmaku(fixtures[0][1]):
+        conn.execute('''
+            INSERT OR IGNORE INTO danmaku
+            (dmid, video_id, cid, progress, mode, fontsize, color, mid_hash, content, ctime, weight, pool)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (row[0], 'BV1000000000', 1000) + row[1:])
+        conn.commit()
+    single_seconds = (time.perf_counter() - start) * args.segments
+    conn.close()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        db_handler.get_danmaku(1000, 60000, 120000)
+    query_ms = (time.perf_counter() - start) * 10
+
+    print(f"分段数: {args.segments}, 弹幕数: {total}, 分段总大小 {size / 1024 / 1024:.1f} MB")
+    print(f"解码: {total / decode_seconds:.0f} 条/秒, {size / decode_seconds / 1024 / 1024:.1f} MB/秒")
+    print(f"解码并批量入库: {total / bulk_seconds:.0f} 条/秒, 新增 {added} 条, 重复写入新增 {again} 条")
+    print(f"解码并逐条提交(按一个分段推算): {total / single_seconds:.0f} 条/秒 "
+          f"({single_seconds / bulk_seconds:.1f}x)")
+    print(f"查询一分钟时间轴内的弹幕: {query_ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
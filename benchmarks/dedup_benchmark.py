@@ -0,0 +1,173 @@
+# benchmarks/dedup_benchmark.py
+
+"""评论去重基准
+
+生成混有复制粘贴刷屏评论的评论集，测量:
+  - 签名计算吞吐: MinHash签名和LSH桶键，分别测numpy和纯Python实现
+  - 入库吞吐: 逐条save_comment，对比关闭和开启去重
+  - 批量建索引吞吐: rebuild_dedup_index
+  - 召回率: 每组刷屏评论(含少量改字的变体)被归入同一簇的比例
+
+用法:
+    python benchmarks/dedup_benchmark.py
+    python benchmarks/dedup_benchmark.py --rows 1000000 --save-rows 50000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bilibili_spider.utils import dedup
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.models.comments import Comment
+
+CHARS = '的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明'
+PUNCTUATION = '，。！？~ 、…'
+
+
+def random_text(rng, low=8, high=60):
+    """生成随机评论内容"""
+    return ''.join(rng.choice(CHARS) for _ in range(rng.randint(low, high)))
+
+
+def mutate(rng, text):
+    """对刷屏模板做少量改动: 替换一两个字、插入标点或表情"""
+    chars = list(text)
+    for _ in range(rng.randint(0, 2)):
+        chars[rng.randrange(len(chars))] = rng.choice(CHARS)
+    if rng.random() < 0.5:
+        chars.insert(rng.randrange(len(chars)), rng.choice(PUNCTUATION))
+    if rng.random() < 0.3:
+        chars.append('[doge]')
+    return ''.join(chars)
+
+
+def generate(rows, spam_ratio=0.2, templates=200, seed=7):
+    """生成评论内容
+
+    @param {int} rows - 评论条数
+    @param {float} spam_ratio - 刷屏评论占比
+    @param {int} templates - 刷屏模板数
+    @param {int} seed - 随机种子
+    @return {list} - (内容, 模板编号)元组列表，普通评论的模板编号为None
+    """
+    rng = random.Random(seed)
+    spam = [random_text(rng, 20, 60) for _ in range(templates)]
+    result = []
+    for _ in range(rows):
+        if rng.random() < spam_ratio:
+            template = rng.randrange(templates)
+            text = spam[template] if rng.random() < 0.5 else mutate(rng, spam[template])
+            result.append((text, template))
+        else:
+            result.append((random_text(rng), None))
+    return result
+
+
+def measure_signatures(index, texts):
+    """测量签名计算吞吐，返回每秒条数"""
+    normalized = [index.normalize(text) for text in texts]
+    start = time.perf_counter()
+    for text in normalized:
+        index.lsh_keys(text)
+    return len(normalized) / (time.perf_counter() - start)
+
+
+def insert_plain(db_handler, comments):
+    """不建索引直接批量写入评论"""
+    with db_handler.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO comments (
+                video_id, video_title, comment_id, user_name, content,
+                publish_time, like_count, replies, create_time, update_time
+            ) VALUES (?, '基准测试视频', ?, 'user', ?, '2024-01-01 00:00:00', 0, '[]', '', '')
+        ''', [(f'BV{i % 100:08d}', str(i), text) for i, (text, _) in enumerate(comments)])
+        conn.commit()
+
+
+def measure_saves(config, comments, dedup_enabled):
+    """逐条save_comment写入新数据库，返回每秒条数"""
+    db_handler = DatabaseHandler(os.path.join(tempfile.mkdtemp(), 'dedup_save.db'))
+    config.DEDUP_ENABLED = dedup_enabled
+    db_handler.enable_dedup(config)
+
+    start = time.perf_counter()
+    for i, (text, _) in enumerate(comments):
+        db_handler.save_comment(Comment(
+            video_id=f'BV{i % 100:08d}', video_title='基准测试视频', comment_id=str(i),
+            user_name='user', content=text, publish_time='2024-01-01 00:00:00',
+            like_count=0, replies=[]
+        ))
+    return len(comments) / (time.perf_counter() - start)
+
+
+def measure_recall(db_handler, comments):
+    """统计每组刷屏评论落入其最大簇的比例
+
+    @return {float} - 所有刷屏评论中被归入所属模板最大簇的比例
+    """
+    with db_handler.get_connection() as conn:
+        clusters = dict(conn.execute('SELECT comment_id, cluster_id FROM comments').fetchall())
+
+    groups = defaultdict(Counter)
+    for i, (_, template) in enumerate(comments):
+        if template is not None:
+            groups[template][clusters.get(str(i))] += 1
+
+    hit = sum(counter.most_common(1)[0][1] for counter in groups.values())
+    total = sum(sum(counter.values()) for counter in groups.values())
+    return hit / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评论去重基准")
+    parser.add_argument('--rows', type=int, default=200000, help="批量建索引的评论条数")
+    parser.add_argument('--save-rows', type=int, default=10000, help="逐条入库测试的评论条数")
+    parser.add_argument('--signature-rows', type=int, default=20000, help="签名计算测试的评论条数")
+    args = parser.parse_args()
+
+    config = Config()
+    comments = generate(args.rows)
+    index = dedup.MinHashIndex(config.DEDUP_BANDS, config.DEDUP_ROWS, min_length=config.DEDUP_MIN_LENGTH)
+    sample = [text for text, _ in comments[:args.signature_rows]]
+
+    print(f"签名参数: {config.DEDUP_BANDS} 段 x {config.DEDUP_ROWS} 行")
+    if dedup.np is not None:
+        print(f"签名计算(numpy):     {measure_signatures(index, sample):>10.0f} 条/秒")
+    numpy_module, dedup.np = dedup.np, None
+    try:
+        print(f"签名计算(纯Python):  {measure_signatures(index, sample):>10.0f} 条/秒")
+    finally:
+        dedup.np = numpy_module
+
+    save_sample = comments[:args.save_rows]
+    print(f"逐条入库(关闭去重):  {measure_saves(config, save_sample, False):>10.0f} 条/秒")
+    print(f"逐条入库(开启去重):  {measure_saves(config, save_sample, True):>10.0f} 条/秒")
+
+    db_handler = DatabaseHandler(os.path.join(tempfile.mkdtemp(), 'dedup_rebuild.db'))
+    config.DEDUP_ENABLED = True
+    db_handler.enable_dedup(config)
+    insert_plain(db_handler, comments)
+
+    start = time.perf_counter()
+    indexed = db_handler.rebuild_dedup_index()
+    elapsed = time.perf_counter() - start
+    print(f"批量建索引:          {indexed / elapsed:>10.0f} 条/秒 ({indexed} 条, {elapsed:.1f} s)")
+
+    with db_handler.get_connection() as conn:
+        buckets = conn.execute('SELECT COUNT(*) FROM lsh_buckets').fetchone()[0]
+    clusters = db_handler.get_duplicate_clusters(limit=1000000)
+    print(f"桶键数: {buckets}，重复簇数: {len(clusters)}")
+    print(f"刷屏评论召回率: {measure_recall(db_handler, comments):.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+# benchmarks/http2_benchmark.py
+
+"""HTTP/2传输基准
+
+在本进程中启动两个模拟评论接口的服务: HTTP/1.1服务和HTTP/2明文(h2c)服务，
+每个请求在服务端等待固定延迟后返回同样的JSON响应，HTTP/2服务中各个流的延迟互不阻塞。
+分别用requests连接池和HTTP/2多路复用，经由爬虫的request_json()以不同并发线程数请求，
+比较吞吐和服务端实际接受的连接数。需要安装httpx[http2]。
+
+用法:
+    python benchmarks/http2_benchmark.py
+    python benchmarks/http2_benchmark.py --requests 2000 --latency 50 --threads 4 16 64
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import h2.config
+import h2.connection
+import h2.events
+from requests.adapters import HTTPAdapter
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.http2 import Http2Session
+from bilibili_spider.spiders.comment_spider import BilibiliSpider
+
+
+def make_body(replies=20):
+    """生成一页评论大小的响应体"""
+    return json.dumps({'code': 0, 'data': {'replies': [
+        {'rpid': index, 'content': {'message': '模拟评论内容' * 20}, 'like': index} for index in range(replies)
+    ]}}, ensure_ascii=False).encode('utf-8')
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    """HTTP/1.1模拟接口"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # 响应头和响应体分两次写出，不关闭Nagle算法时会与延迟确认叠加出约40毫秒的等待
+    body = b''
+    latency = 0.05
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class H2Handler(socketserver.BaseRequestHandler):
+    """HTTP/2明文模拟接口
+
+    收到请求后由定时器在延迟后发送响应，响应体受流量控制窗口限制时等待客户端的WINDOW_UPDATE。
+    h2的连接对象不是线程安全的，所有操作都在同一把锁内进行。
+    """
+
+    body = b''
+    latency = 0.05
+    connections = 0
+
+    def handle(self):
+        type(self).connections += 1
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        self.lock = threading.Lock()
+        self.pending = {}  # 流ID到尚未发送的响应体
+        with self.lock:
+            self.conn.initiate_connection()
+            self.request.sendall(self.conn.data_to_send())
+
+        while True:
+            try:
+                data = self.request.recv(65535)
+            except OSError:
+                break
+            if not data:
+                break
+            with self.lock:
+                for event in self.conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        threading.Timer(self.latency, self.respond, (event.stream_id,)).start()
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        self.send_pending()
+                self.request.sendall(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        with self.lock:
+            self.conn.send_headers(stream_id, [
+                (':status', '200'),
+                ('content-type', 'application/json'),
+                ('content-length', str(len(self.body)))
+            ])
+            self.pending[stream_id] = self.body
+            self.send_pending()
+            try:
+                self.request.sendall(self.conn.data_to_send())
+            except OSError:
+                pass
+
+    def send_pending(self):
+        """在流量控制窗口内尽量发送待发的响应体"""
+        for stream_id, data in list(self.pending.items()):
+            while data:
+                size = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size, len(data))
+                if size <= 0:
+                    break
+                self.conn.send_data(stream_id, data[:size], end_stream=size == len(data))
+                data = data[size:]
+            if data:
+                self.pending[stream_id] = data
+            else:
+                del self.pending[stream_id]
+
+
+class ThreadingH2Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def run(spider, url, total, threads):
+    """并发请求并计时
+
+    @return {float} - 每秒请求数
+    """
+    def fetch(_):
+        assert spider.request_json(url)['code'] == 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fetch, range(total)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/2传输基准")
+    parser.add_argument('--requests', type=int, default=1000, help="每轮请求数")
+    parser.add_argument('--latency', type=float, default=50, help="服务端延迟(毫秒)")
+    parser.add_argument('--threads', type=int, nargs='+', default=[4, 16, 64], help="并发线程数")
+    parser.add_argument('--connections', type=int, default=2, help="HTTP/2连接数")
+    args = parser.parse_args()
+
+    body = make_body()
+    Http1Handler.body = H2Handler.body = body
+    Http1Handler.latency = H2Handler.latency = args.latency / 1000
+
+    http1_server = ThreadingHTTPServer(('127.0.0.1', 0), Http1Handler)
+    http1_server.request_queue_size = 256
+    h2_server = ThreadingH2Server(('127.0.0.1', 0), H2Handler)
+    for server in (http1_server, h2_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    http1_url = f'http://127.0.0.1:{http1_server.server_address[1]}/x/v2/reply'
+    h2_url = f'http://127.0.0.1:{h2_server.server_address[1]}/x/v2/reply'
+
+    config = Config()
+    print(f"每轮 {args.requests} 个请求，响应体 {len(body) / 1024:.1f} KB，服务端延迟 {args.latency:.0f} ms")
+    for threads in args.threads:
+        spider = BilibiliSpider(config)
+        adapter = HTTPAdapter(pool_maxsize=threads)
+        spider.session.mount('http://', adapter)
+        Http1Handler.connections = 0
+        http1_rate = run(spider, http1_url, args.requests, threads)
+        http1_connections = Http1Handler.connections
+
+        # 模拟服务只支持明文HTTP/2，跳过HTTP/1.1升级协商
+        spider = BilibiliSpider(config)
+        spider.session = Http2Session(args.connections, http1=False)
+        H2Handler.connections = 0
+        h2_rate = run(spider, h2_url, args.requests, threads)
+        spider.session.close()
+
+        print(f"{threads:3d} 线程: HTTP/1.1 连接池 {http1_rate:7.0f} 请求/秒 ({http1_connections} 个连接), "
+              f"HTTP/2 {h2_rate:7.0f} 请求/秒 ({H2Handler.connections} 个连接)")
+
+    http1_server.shutdown()
+    h2_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
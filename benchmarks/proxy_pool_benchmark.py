@@ -0,0 +1,235 @@
+# benchmarks/proxy_pool_benchmark.py
+
+"""代理池调度基准
+
+在本进程中启动一个模拟评论接口和若干个本地替身代理。替身代理转发绝对地址的GET请求，
+每个代理有各自的延迟、失败率(返回502)和风控率(返回412)，触发风控后在一段时间内
+对所有请求都返回412，模拟出口IP被临时封禁。
+分别用按得分调度的代理池和简单轮转，经由爬虫的request_json()并发请求，
+比较每秒成功请求数，并输出各代理承担的请求数、冷却和淘汰情况。
+
+用法:
+    python benchmarks/proxy_pool_benchmark.py
+    python benchmarks/proxy_pool_benchmark.py --requests 5000 --threads 32
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from requests.adapters import HTTPAdapter
+
+from bilibili_spider.utils.config import Config, ProxyPool
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.spiders.comment_spider import BilibiliSpider
+
+# 名称, 延迟(毫秒), 失败率, 风控率, 风控后封禁秒数
+PROXY_PROFILES = [
+    ('fast', 20, 0.0, 0.0, 0),
+    ('medium', 60, 0.02, 0.0, 0),
+    ('slow', 200, 0.0, 0.0, 0),
+    ('flaky', 30, 0.7, 0.0, 0),
+    ('risky', 20, 0.0, 0.03, 3)
+]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """模拟评论接口"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = b''
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """替身代理，参数由make_proxy_handler()生成的子类设置"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.02
+    fail_rate = 0.0
+    rate_limit_rate = 0.0
+    ban_seconds = 0
+    banned_until = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+        time.sleep(self.latency)
+
+        roll = random.random()
+        if time.monotonic() < cls.banned_until:
+            return self.reply(412, b'')
+        if roll < self.fail_rate:
+            return self.reply(502, b'')
+        if roll < self.fail_rate + self.rate_limit_rate:
+            cls.banned_until = time.monotonic() + self.ban_seconds
+            return self.reply(412, b'')
+
+        target = urlsplit(self.path)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+        try:
+            connection.request('GET', f'{target.path}?{target.query}')
+            response = connection.getresponse()
+            self.reply(response.status, response.read())
+        finally:
+            connection.close()
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_proxy_handler(name, latency, fail_rate, rate_limit_rate, ban_seconds):
+    """为一个替身代理生成独立计数的处理类"""
+    return type(f'{name}ProxyHandler', (ProxyHandler,), {
+        'latency': latency / 1000,
+        'fail_rate': fail_rate,
+        'rate_limit_rate': rate_limit_rate,
+        'ban_seconds': ban_seconds,
+        'lock': threading.Lock()
+    })
+
+
+class RoundRobinPool(ProxyPool):
+    """对照组: 不看得分、不冷却也不淘汰，依次轮流使用每个代理"""
+
+    def load(self, records, on_flush=None):
+        super().load(records, on_flush)
+        self.counter = itertools.count()
+
+    def acquire(self):
+        with self.lock:
+            entry = self.entries[next(self.counter) % len(self.entries)]
+            entry['in_flight'] += 1
+            return entry
+
+    def report(self, entry, success, latency, rate_limited=False):
+        with self.lock:
+            entry['in_flight'] -= 1
+            entry['success_count' if success else 'fail_count'] += 1
+            if rate_limited:
+                entry['rate_limit_count'] += 1
+            entry['avg_latency'] = entry['avg_latency'] * 0.8 + latency * 0.2 if entry['avg_latency'] else latency
+
+            pending = self.pending.setdefault(entry['id'], {
+                'id': entry['id'], 'success_count': 0, 'fail_count': 0, 'rate_limit_count': 0,
+                'cooldown_until': None, 'evicted': False
+            })
+            pending['success_count' if success else 'fail_count'] += 1
+            pending['rate_limit_count'] += 1 if rate_limited else 0
+            pending['avg_latency'] = entry['avg_latency']
+            pending['last_used_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            flush = time.monotonic() - self.last_flush >= self.flush_interval
+        if flush:
+            self.flush()
+
+
+def run(config, url, total, threads):
+    """并发请求并计时
+
+    @return {tuple} - (每秒成功请求数, 成功数, 耗时秒数)
+    """
+    spider = BilibiliSpider(config)
+    spider.session.mount('http://', HTTPAdapter(pool_maxsize=threads))
+
+    def fetch(_):
+        try:
+            return spider.request_json(url)['code'] == 0
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        succeeded = sum(executor.map(fetch, range(total)))
+    seconds = time.perf_counter() - start
+    return succeeded / seconds, succeeded, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="代理池调度基准")
+    parser.add_argument('--requests', type=int, default=3000, help="每轮请求数")
+    parser.add_argument('--threads', type=int, default=16, help="并发线程数")
+    parser.add_argument('--cooldown', type=int, default=2, help="代理冷却秒数")
+    args = parser.parse_args()
+
+    ApiHandler.body = json.dumps({'code': 0, 'data': {'replies': [
+        {'rpid': index, 'content': {'message': '模拟评论内容' * 20}} for index in range(20)
+    ]}}, ensure_ascii=False).encode('utf-8')
+    api_server = ThreadingHTTPServer(('127.0.0.1', 0), ApiHandler)
+    servers = [api_server]
+    handlers = {}
+    for profile in PROXY_PROFILES:
+        handler = make_proxy_handler(*profile)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        handlers[f'http://127.0.0.1:{server.server_address[1]}'] = (profile[0], handler)
+        servers.append(server)
+    for server in servers:
+        server.request_queue_size = 256
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{api_server.server_address[1]}/x/v2/reply?oid=1&pn=1'
+
+    workdir = tempfile.mkdtemp()
+    print(f"每轮 {args.requests} 个请求，{args.threads} 线程，代理冷却 {args.cooldown} s")
+    for index, (name, pool) in enumerate([("轮转", RoundRobinPool()), ("代理池", ProxyPool())]):
+        # 每轮使用新的数据库，两轮都从没有历史统计的代理开始
+        db_handler = DatabaseHandler(os.path.join(workdir, f'proxy_{index}.db'))
+        db_handler.save_proxies(list(handlers))
+        for handler in handlers.values():
+            handler[1].requests = 0
+            handler[1].banned_until = 0
+
+        config = Config()
+        config.PROXY_ENABLED = True
+        config.PROXY_COOLDOWN = args.cooldown
+        config.proxy_pool = pool
+        config.load_proxy_pool(db_handler.get_proxy_pool(), on_flush=db_handler.record_proxy_usage)
+        rate, succeeded, seconds = run(config, url, args.requests, args.threads)
+        config.flush_pools()
+
+        print(f"\n{name}: 成功 {succeeded}/{args.requests}，耗时 {seconds:.2f} s，{rate:.0f} 次成功请求/秒")
+        for record in db_handler.get_proxies():
+            proxy_name, handler = handlers[record['url']]
+            state = "可用" if record['is_active'] else "已淘汰"
+            print(f"  {proxy_name:7s} 请求 {handler.requests:5d}  成功 {record['success_count']:5d}  "
+                  f"失败 {record['fail_count']:4d}  风控 {record['rate_limit_count']:4d}  "
+                  f"平均耗时 {record['avg_latency'] * 1000:6.1f} ms  {state}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
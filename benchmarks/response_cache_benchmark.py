@@ -0,0 +1,129 @@
+# benchmarks/response_cache_benchmark.py
+
+"""响应缓存基准
+
+生成模拟的view接口和评论接口响应写入缓存，测量写入速度、压缩后的磁盘占用、
+容量淘汰的耗时，以及从缓存离线重建数据库的速度。
+
+用法:
+    python benchmarks/response_cache_benchmark.py
+    python benchmarks/response_cache_benchmark.py --videos 50 --pages 100
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.response_cache import ResponseCache
+from bilibili_spider.spiders.comment_spider import BilibiliSpider
+from bilibili_spider.spiders.cache_replay import CacheReplay
+
+WORDS = ['前排', '哈哈哈', '好看', 'up主', '三连', '支持', '名场面', '破防了', '下次一定', '泪目', '打卡', '来了']
+
+
+def make_reply(rng, rpid):
+    """生成一条与评论接口格式一致的评论对象"""
+    member = {'mid': str(rng.randrange(10 ** 8)), 'uname': f'user{rng.randrange(100000)}', 'sex': '保密',
+              'sign': '', 'avatar': 'https://i0.hdslb.com/bfs/face/member/noface.jpg',
+              'level_info': {'current_level': rng.randrange(7)}}
+    return {
+        'rpid': rpid, 'oid': 0, 'type': 1, 'mid': int(member['mid']), 'ctime': 1700000000 + rng.randrange(10 ** 7),
+        'like': int(rng.paretovariate(1.1)) - 1, 'member': member,
+        'content': {'message': ''.join(rng.choice(WORDS) for _ in range(rng.randint(2, 12))), 'emote': {}},
+        'replies': [
+            {'rpid': rpid * 10 + i, 'ctime': 1700000000 + rng.randrange(10 ** 7), 'member': member,
+             'content': {'message': rng.choice(WORDS)}}
+            for i in range(rng.randrange(3))
+        ]
+    }
+
+
+def generate(videos, pages, seed=42):
+    """生成模拟响应
+
+    @param {int} videos - 视频数
+    @param {int} pages - 每个视频的评论页数
+    @param {int} seed - 随机种子
+    @return {list} - (请求地址, 响应体)列表
+    """
+    rng = random.Random(seed)
+    responses = []
+    rpid = 1
+    for index in range(videos):
+        aid = 100000 + index
+        bvid = f'BV1{index:09d}'
+        view = {'code': 0, 'message': '0', 'data': {'aid': aid, 'bvid': bvid, 'title': f'基准测试视频{index}'}}
+        responses.append((f'https://api.bilibili.com/x/web-interface/view?bvid={bvid}',
+                          json.dumps(view, ensure_ascii=False).encode('utf-8')))
+        for page in range(1, pages + 1):
+            replies = [make_reply(rng, rpid + i) for i in range(20)]
+            rpid += 20
+            body = {'code': 0, 'message': '0', 'data': {'page': {'num': page, 'size': 20}, 'replies': replies}}
+            responses.append((f'http://api.bilibili.com/x/v2/reply?pn={page}&type=1&oid={aid}&sort=2',
+                              json.dumps(body, ensure_ascii=False).encode('utf-8')))
+    return responses
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应缓存基准")
+    parser.add_argument('--videos', type=int, default=20, help="视频数")
+    parser.add_argument('--pages', type=int, default=50, help="每个视频的评论页数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, 'cache')
+    responses = generate(args.videos, args.pages)
+    raw_size = sum(len(body) for _, body in responses)
+
+    cache = ResponseCache(cache_dir, ttl_seconds=0, max_bytes=10 ** 12)
+    start = time.perf_counter()
+    for url, body in responses:
+        cache.put(url, body)
+    put_seconds = time.perf_counter() - start
+    stats = cache.get_stats()
+
+    # 同样的内容再写一遍，内容寻址时不会新增响应体
+    for url, body in responses[:100]:
+        cache.put(url + '&w_rid=0&wts=0', body)
+    duplicated = cache.get_stats()['blobs'] - stats['blobs']
+    cache.close()
+
+    config = Config()
+    config.RESPONSE_CACHE_MODE = 'replay'
+    config.RESPONSE_CACHE_DIR = cache_dir
+    spider = BilibiliSpider(config)
+    db_handler = DatabaseHandler(os.path.join(workdir, 'replay.db'))
+    start = time.perf_counter()
+    result = CacheReplay(spider, db_handler, spider.response_cache).run()
+    replay_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spider.response_cache.replay = False
+    spider.response_cache.max_bytes = stats['size'] // 2
+    evicted = spider.response_cache.evict()
+    evict_seconds = time.perf_counter() - start
+
+    print(f"响应数: {len(responses)}, 原始大小 {raw_size / 1024 / 1024:.1f} MB")
+    print(f"写入: {len(responses) / put_seconds:.0f} 个/秒, 磁盘占用 {directory_size(cache_dir) / 1024 / 1024:.1f} MB, "
+          f"响应体压缩后 {stats['size'] / 1024 / 1024:.1f} MB ({raw_size / max(stats['size'], 1):.1f}x)")
+    print(f"重复内容写入新增的响应体: {duplicated}")
+    print(f"回放: {result['pages']} 页 / {result['comments']} 条评论, 耗时 {replay_seconds:.1f} s, "
+          f"{result['pages'] / replay_seconds:.0f} 页/秒")
+    print(f"淘汰一半容量: 删除 {evicted} 个响应体, 耗时 {evict_seconds * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
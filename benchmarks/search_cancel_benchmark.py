@@ -0,0 +1,168 @@
+# benchmarks/search_cancel_benchmark.py
+
+"""边输入边搜索基准
+
+在临时目录中生成一个大评论库，先测量一次按评论内容全表扫描的耗时，以及查询开始后
+取消到查询线程退出的延迟；再在查询页面中模拟逐字输入，同时在界面线程中运行一个
+10毫秒的定时器，统计定时器的最大触发间隔、实际发起的查询数和最终结果是否对应最后的输入。
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/search_cancel_benchmark.py
+    python benchmarks/search_cancel_benchmark.py --comments 2000000 --interval 60
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication, QMessageBox
+
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.storage import QueryCancelled
+from bilibili_spider.pages.search_page import SearchPage
+
+WORDS = ['弹幕', '前排', '好听', '名场面', '打卡', '三连', '催更', '经典', '泪目', '考古']
+
+
+def build_database(db_handler, comments, seed=42):
+    """批量写入随机评论
+
+    @param {DatabaseHandler} db_handler - 数据库
+    @param {int} comments - 评论数
+    @param {int} seed - 随机种子
+    """
+    rng = random.Random(seed)
+    with db_handler.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO comments (video_id, video_title, comment_id, user_name, content,
+                                  publish_time, like_count, replies, create_time, update_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, '[]', ?, ?)
+        ''', ((
+            f'BV{index % 500:010d}', f'视频{index % 500}', str(index), f'用户{rng.randrange(100000)}',
+            ''.join(rng.choice(WORDS) for _ in range(12)),
+            f'2024-01-01 00:{index % 60:02d}:00', rng.randrange(1000),
+            '2024-01-01 00:00:00', '2024-01-01 00:00:00'
+        ) for index in range(comments)))
+        conn.commit()
+
+
+def measure_cancel(db_handler, delay):
+    """开始一次全表扫描的查询，delay秒后取消
+
+    @return {tuple} - (完整查询耗时秒数, 从取消到查询线程退出的毫秒数)
+    """
+    start = time.perf_counter()
+    db_handler.query_comments_batch('5', '不存在的内容', batch_size=1000)
+    full_seconds = time.perf_counter() - start
+
+    cancel_event = threading.Event()
+    outcome = []
+
+    def query():
+        try:
+            db_handler.query_comments_batch('5', '不存在的内容', batch_size=1000, cancel_event=cancel_event)
+            outcome.append('finished')
+        except QueryCancelled:
+            outcome.append('cancelled')
+
+    thread = threading.Thread(target=query)
+    thread.start()
+    time.sleep(delay)
+    cancelled_at = time.perf_counter()
+    cancel_event.set()
+    thread.join()
+    assert outcome == ['cancelled'], outcome
+    return full_seconds, (time.perf_counter() - cancelled_at) * 1000
+
+
+def measure_typing(app, page, text, interval):
+    """逐字输入并等待最后一次查询的结果
+
+    @return {tuple} - (最大定时器间隔毫秒, 发起的查询数, 结果行数, 结果是否对应最后的输入)
+    """
+    intervals = []
+    last = [time.perf_counter()]
+    started = []
+
+    def tick():
+        now = time.perf_counter()
+        intervals.append((now - last[0]) * 1000)
+        last[0] = now
+
+    original_start = page.start_search
+
+    def start_search():
+        started.append(page.search_input.text())
+        original_start()
+
+    page.search_timer.timeout.disconnect()
+    page.search_timer.timeout.connect(start_search)
+
+    timer = QTimer()
+    timer.setInterval(10)
+    timer.timeout.connect(tick)
+    timer.start()
+
+    page.search_type.setCurrentIndex(4)
+    for length in range(1, len(text) + 1):
+        page.search_input.setText(text[:length])
+        deadline = time.perf_counter() + interval
+        while time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.001)
+
+    # 等待防抖定时器触发、最后一次查询完成
+    while page.search_timer.isActive() or page.search_worker is None or page.search_worker.isRunning():
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+    timer.stop()
+
+    rows = page.result_table.rowCount()
+    matched = page.search_worker.search_text == text
+    return max(intervals, default=0), len(started), rows, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="边输入边搜索基准")
+    parser.add_argument('--comments', type=int, default=500000, help="评论数")
+    parser.add_argument('--interval', type=float, default=80, help="逐字输入的间隔(毫秒)")
+    parser.add_argument('--text', default='名场面打卡', help="模拟输入的内容")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_handler = DatabaseHandler(os.path.join(workdir, 'search.db'))
+    start = time.perf_counter()
+    build_database(db_handler, args.comments)
+    print(f"评论数: {args.comments}, 生成耗时 {time.perf_counter() - start:.1f} s")
+
+    full_seconds, cancel_ms = measure_cancel(db_handler, 0.02)
+    print(f"全表扫描查询: {full_seconds * 1000:.0f} ms, 开始20 ms后取消，{cancel_ms:.1f} ms 内退出")
+
+    app = QApplication(sys.argv)
+    QMessageBox.critical = lambda *args: print(f"查询出错: {args[2]}")
+    page = SearchPage(db_handler)
+    worst, started, rows, matched = measure_typing(app, page, args.text, args.interval / 1000)
+    print(f"逐字输入 {len(args.text)} 个字(间隔 {args.interval:.0f} ms): 发起查询 {started} 次，"
+          f"界面定时器最大间隔 {worst:.1f} ms，结果 {rows} 行，"
+          f"{'对应' if matched else '不对应'}最后的输入")
+
+    # 关闭防抖后每输入一个字都发起查询，上一次未完成的查询被取消
+    page.search_timer.setInterval(0)
+    page.search_input.clear()
+    worst, started, rows, matched = measure_typing(app, page, args.text, args.interval / 1000)
+    print(f"关闭防抖: 发起查询 {started} 次，界面定时器最大间隔 {worst:.1f} ms，结果 {rows} 行，"
+          f"{'对应' if matched else '不对应'}最后的输入")
+    page.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/startup_benchmark.py
+
+"""启动耗时基准
+
+用 python -X importtime 统计启动时的模块导入耗时，并测量数据库初始化耗时。
+加 --check 参数时作为回归检查运行：启动阶段导入了不应加载的模块，
+或导入总耗时超过预算时以非零状态退出。
+
+用法:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --check --budget-ms 800
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 启动阶段执行的导入，与main.py启动界面时一致
+STARTUP_CODE = 'import main; from bilibili_spider.main_window import MainWindow'
+
+# 启动阶段不应加载的模块，这些模块应在打开对应页面时才导入
+LAZY_MODULES = [
+    'selenium',
+    'bilibili_spider.utils.cookie_helper',
+    'bilibili_spider.pages.crawl_page',
+    'bilibili_spider.pages.search_page',
+    'bilibili_spider.pages.settings_page',
+    'bilibili_spider.pages.analytics_page',
+]
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_imports():
+    """在子进程中运行启动导入并解析-X importtime的输出
+
+    @return {list} - (模块名, 自身耗时us, 累计耗时us, 层级)元组列表
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    records = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def measure_db_init():
+    """测量首次建库和再次打开数据库的耗时
+
+    @return {tuple} - (首次初始化毫秒, 再次初始化毫秒)
+    """
+    from bilibili_spider.utils.db_handler import DatabaseHandler
+
+    db_file = os.path.join(tempfile.mkdtemp(), 'startup_benchmark.db')
+
+    start = time.perf_counter()
+    DatabaseHandler(db_file)
+    first = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    DatabaseHandler(db_file)
+    second = (time.perf_counter() - start) * 1000
+
+    return first, second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument('--check', action='store_true', help="作为回归检查运行，不满足要求时返回非零状态")
+    parser.add_argument('--budget-ms', type=float, default=1000, help="启动导入总耗时预算(毫秒)")
+    parser.add_argument('--top', type=int, default=15, help="显示耗时最多的模块数")
+    args = parser.parse_args()
+
+    records = measure_imports()
+    total_ms = sum(self_us for _, self_us, _, _ in records) / 1000
+    imported = {name for name, _, _, _ in records}
+
+    print(f"启动导入模块数: {len(records)}")
+    print(f"启动导入总耗时: {total_ms:.1f} ms")
+    print("\n累计耗时最多的顶层模块:")
+    top_level = sorted((r for r in records if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    first_ms, second_ms = measure_db_init()
+    print(f"\n数据库首次初始化: {first_ms:.1f} ms")
+    print(f"数据库再次初始化: {second_ms:.1f} ms")
+
+    eager = [module for module in LAZY_MODULES
+             if any(name == module or name.startswith(module + '.') for name in imported)]
+    if eager:
+        print(f"\n启动阶段加载了应延迟导入的模块: {', '.join(eager)}")
+
+    if args.check:
+        failed = bool(eager)
+        if total_ms > args.budget_ms:
+            print(f"启动导入耗时超出预算: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+            failed = True
+        print("\n检查未通过" if failed else "\n检查通过")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
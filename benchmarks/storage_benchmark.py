@@ -0,0 +1,136 @@
+# benchmarks/storage_benchmark.py
+
+"""存储后端基准
+
+向SQLite和DuckDB后端写入相同的评论数据，对比统计、排序和搜索查询的耗时。
+DuckDB后端需要安装duckdb，批量写入测试数据需要安装pandas。
+
+用法:
+    python benchmarks/storage_benchmark.py
+    python benchmarks/storage_benchmark.py --rows 200000 --repeat 3
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.duckdb_handler import DuckDBHandler
+
+COLUMNS = [
+    'video_id', 'video_title', 'comment_id', 'user_name', 'content',
+    'publish_time', 'like_count', 'replies', 'create_time', 'update_time'
+]
+WORDS = ['前排', '哈哈哈', '好看', 'up主', '三连', '支持', '名场面', '破防了', '下次一定', '泪目', '打卡', '来了']
+
+# (名称, query_comments_batch参数)
+QUERIES = [
+    ('按时间排序', ('1', '', 100, 0, 'publish_time', 'DESC')),
+    ('按点赞排序', ('1', '', 100, 0, 'like_count', 'DESC')),
+    ('按回复数排序', ('1', '', 100, 0, 'replies', 'DESC')),
+    ('深翻页', ('1', '', 100, 100000, 'publish_time', 'DESC')),
+    ('搜索内容', ('5', '名场面', 100, 0, 'like_count', 'DESC')),
+    ('搜索用户', ('4', 'user12', 100, 0, 'publish_time', 'DESC')),
+    ('搜索视频', ('2', 'BV0000001', 100, 0, 'publish_time', 'DESC')),
+]
+
+
+def generate(rows, seed=42):
+    """生成测试评论
+
+    @param {int} rows - 评论条数
+    @param {int} seed - 随机种子
+    @return {list} - 与COLUMNS顺序一致的行元组列表
+    """
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    result = []
+    for i in range(rows):
+        publish_time = start + timedelta(seconds=rng.randrange(365 * 86400))
+        replies = json.dumps([{'user': 'reply', 'content': '回复'}] * rng.randrange(4), ensure_ascii=False)
+        result.append((
+            f'BV{rng.randrange(500):08d}', '基准测试视频', str(i),
+            f'user{int(rng.paretovariate(1.2)) % 100000}',
+            ''.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))),
+            publish_time.strftime('%Y-%m-%d %H:%M:%S'),
+            int(rng.paretovariate(1.1)) - 1, replies, now, now
+        ))
+    return result
+
+
+def load_sqlite(db_file, rows):
+    """创建SQLite数据库并批量写入"""
+    db_handler = DatabaseHandler(db_file)
+    with db_handler.get_connection() as conn:
+        conn.executemany(f"INSERT INTO comments ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        conn.commit()
+    return db_handler
+
+
+def load_duckdb(db_file, rows):
+    """创建DuckDB数据库并经DataFrame批量写入"""
+    db_handler = DuckDBHandler(db_file)
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    with db_handler.get_connection() as conn:
+        conn.register('frame', frame)
+        conn.execute(f"INSERT INTO comments ({', '.join(COLUMNS)}) SELECT * FROM frame")
+    return db_handler
+
+
+def timed(func, repeat):
+    """多次执行取中位数耗时(毫秒)"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="存储后端基准")
+    parser.add_argument('--rows', type=int, default=1000000, help="评论条数")
+    parser.add_argument('--repeat', type=int, default=5, help="每个查询的重复次数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    rows = generate(args.rows)
+
+    start = time.perf_counter()
+    backends = {'SQLite': load_sqlite(os.path.join(workdir, 'bench.db'), rows)}
+    sqlite_load = time.perf_counter() - start
+    start = time.perf_counter()
+    backends['DuckDB'] = load_duckdb(os.path.join(workdir, 'bench.duckdb'), rows)
+    duckdb_load = time.perf_counter() - start
+    del rows
+
+    print(f"评论数: {args.rows}")
+    print(f"写入耗时: SQLite {sqlite_load:.1f} s, DuckDB {duckdb_load:.1f} s")
+    print(f"\n{'查询':<12}{'SQLite(ms)':>12}{'DuckDB(ms)':>12}{'加速比':>10}")
+
+    cases = [('get_statistics', lambda handler: handler.get_statistics)]
+    cases += [(name, lambda handler, params=params: lambda: handler.query_comments_batch(*params))
+              for name, params in QUERIES]
+
+    for name, make in cases:
+        sqlite_ms = timed(make(backends['SQLite']), args.repeat)
+        duckdb_ms = timed(make(backends['DuckDB']), args.repeat)
+        print(f"{name:<12}{sqlite_ms:>12.1f}{duckdb_ms:>12.1f}{sqlite_ms / max(duckdb_ms, 0.001):>9.1f}x")
+
+    backends['DuckDB'].close()
+
+
+if __name__ == '__main__':
+    main()
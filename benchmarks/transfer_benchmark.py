@@ -0,0 +1,145 @@
+# benchmarks/transfer_benchmark.py
+
+"""传输与解码基准
+
+在本地启动一个按Accept-Encoding压缩响应的模拟评论接口，分别以不压缩、gzip/deflate
+和当前环境能解码的全部格式请求，测量每页在线上传输的字节数、请求耗时，
+并对比json与orjson解析评论页的耗时。安装brotli或zstandard后会自动包含br和zstd。
+
+用法:
+    python benchmarks/transfer_benchmark.py
+    python benchmarks/transfer_benchmark.py --pages 500
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import gzip
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.transfer import TransferStats, accept_encoding, orjson
+from benchmarks.response_cache_benchmark import generate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 服务器按优先级选择客户端声明支持的第一种格式
+ENCODERS = {'zstd': zstandard and (lambda body: zstandard.ZstdCompressor(level=3).compress(body)),
+            'br': brotli and (lambda body: brotli.compress(body, quality=5)),
+            'gzip': lambda body: gzip.compress(body, 6),
+            'deflate': lambda body: zlib.compress(body, 6)}
+
+# 改为接口请求头之前的浏览器导航请求头，只用于比较请求头的大小
+NAVIGATION_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'sec-fetch-dest': 'document',
+    'sec-fetch-mode': 'navigate',
+    'sec-fetch-site': 'none',
+    'sec-fetch-user': '?1',
+    'upgrade-insecure-requests': '1',
+    'cache-control': 'no-cache',
+    'pragma': 'no-cache'
+}
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """按页码返回预先生成的评论页"""
+
+    pages = []
+    encoded = {}
+
+    def do_GET(self):
+        page = int(self.path.rsplit('pn=', 1)[-1]) % len(self.pages)
+        accepted = [item.split(';')[0].strip() for item in self.headers.get('Accept-Encoding', '').split(',')]
+        encoding = next((name for name in ENCODERS if ENCODERS[name] and name in accepted), 'identity')
+
+        key = (encoding, page)
+        if key not in self.encoded:
+            body = self.pages[page]
+            self.encoded[key] = body if encoding == 'identity' else ENCODERS[encoding](body)
+        body = self.encoded[key]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def header_size(headers):
+    return sum(len(name) + len(value) + 4 for name, value in headers.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="传输与解码基准")
+    parser.add_argument('--pages', type=int, default=200, help="请求的页数")
+    args = parser.parse_args()
+
+    PageHandler.pages = [body for url, body in generate(1, 50) if '/x/v2/reply' in url]
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/x/v2/reply?pn='
+
+    config = Config()
+    api_headers = dict(config.base_headers)
+    navigation_headers = dict(api_headers, **NAVIGATION_HEADERS)
+    print(f"请求头: 导航 {header_size(navigation_headers)} 字节 -> 接口 {header_size(api_headers)} 字节")
+    print(f"当前环境可解码: {accept_encoding()}\n")
+
+    print(f"{'Accept-Encoding':<28}{'每页传输(KB)':>14}{'每页耗时(ms)':>14}")
+    session = requests.Session()
+    for encodings in dict.fromkeys(['identity', 'gzip, deflate', accept_encoding()]):
+        stats = TransferStats()
+        headers = dict(api_headers, **{'Accept-Encoding': encodings})
+        start = time.perf_counter()
+        for page in range(args.pages):
+            response = session.get(f'{base_url}{page}', headers=headers, timeout=10)
+            response.content
+            stats.record(response)
+        elapsed = (time.perf_counter() - start) / args.pages * 1000
+        print(f"{encodings:<28}{stats.wire_bytes / stats.requests / 1024:>14.1f}{elapsed:>14.2f}")
+
+    # 解析耗时
+    bodies = PageHandler.pages
+    start = time.perf_counter()
+    for body in bodies:
+        json.loads(body)
+    json_ms = (time.perf_counter() - start) / len(bodies) * 1000
+    print(f"\njson解析每页: {json_ms:.3f} ms")
+    if orjson is not None:
+        start = time.perf_counter()
+        for body in bodies:
+            orjson.loads(body)
+        orjson_ms = (time.perf_counter() - start) / len(bodies) * 1000
+        print(f"orjson解析每页: {orjson_ms:.3f} ms ({json_ms / orjson_ms:.1f}x)")
+    else:
+        print("未安装orjson，跳过orjson对比")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
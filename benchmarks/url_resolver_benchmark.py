@@ -0,0 +1,151 @@
+# benchmarks/url_resolver_benchmark.py
+
+"""链接批量解析基准
+
+生成混合各种形式的链接列表(桌面版和移动版视频页、带查询参数的av号、分享文案中的短链接、
+BV号和无法识别的内容)，短链接指向本地模拟的跳转服务，服务对每个请求加入固定延迟。
+分别测量本地识别的速度、单线程和并发跟随短链接的吞吐，以及缓存命中后再次解析的耗时。
+模拟服务与解析器在同一进程中运行，延迟设得很低时两者争用CPU，并发的收益会被低估。
+
+用法:
+    python benchmarks/url_resolver_benchmark.py
+    python benchmarks/url_resolver_benchmark.py --lines 50000 --short-ratio 0.3 --latency 50
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.video_url import av2bv, parse_video_url
+from bilibili_spider.spiders.url_resolver import UrlResolver
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    """按短链接代码返回302跳转，未知代码返回404"""
+
+    targets = {}
+    latency = 0.02
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        target = self.targets.get(self.path.strip('/').split('?')[0])
+        if target is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+        else:
+            self.send_response(302)
+            self.send_header('Location', target)
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def generate(lines, short_ratio, short_base, seed=42):
+    """生成混合形式的链接列表
+
+    @param {int} lines - 行数
+    @param {float} short_ratio - 短链接所占比例
+    @param {string} short_base - 短链接的地址前缀
+    @param {int} seed - 随机种子
+    @return {tuple} - (链接列表, 短链接代码到跳转地址的映射)
+    """
+    rng = random.Random(seed)
+    targets = {}
+    result = []
+    for index in range(lines):
+        aid = rng.randrange(1, 10 ** 9)
+        bvid = av2bv(aid)
+        roll = rng.random()
+        if roll < short_ratio:
+            # 同一个短链接会在列表中重复出现
+            code = f'{rng.randrange(lines // 4 + 1):07x}'
+            targets.setdefault(code, f'https://m.bilibili.com/video/{av2bv(int(code, 16) + 1)}?share_source=copy')
+            result.append(f'【视频{index}】 {short_base}/{code} 点击链接观看')
+        elif roll < short_ratio + 0.02:
+            result.append(f'{short_base}/missing{index}')
+        elif roll < short_ratio + 0.04:
+            result.append(f'这一行不是链接 {index}')
+        else:
+            result.append(rng.choice([
+                f'https://www.bilibili.com/video/{bvid}/?spm_id_from=333.1007&vd_source=abc',
+                f'https://m.bilibili.com/video/av{aid}?p=2&share_medium=android',
+                f'www.bilibili.com/video/av{aid}/?t=30',
+                f'bilibili://video/{aid}',
+                bvid,
+                f'AV{aid}'
+            ]))
+    return result, targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="链接批量解析基准")
+    parser.add_argument('--lines', type=int, default=20000, help="链接行数")
+    parser.add_argument('--short-ratio', type=float, default=0.2, help="短链接所占比例")
+    parser.add_argument('--latency', type=float, default=100, help="模拟跳转服务的延迟(毫秒)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    short_host = '127.0.0.1'
+    short_base = f'http://{short_host}:{server.server_address[1]}'
+    lines, RedirectHandler.targets = generate(args.lines, args.short_ratio, short_base)
+    RedirectHandler.latency = args.latency / 1000
+
+    start = time.perf_counter()
+    parsed = [parse_video_url(line, (short_host,)) for line in lines]
+    parse_seconds = time.perf_counter() - start
+    short_links = len({item[1] for item in parsed if item and item[0] == 'short'})
+
+    config = Config()
+    workdir = tempfile.mkdtemp()
+
+    # 单线程只解析一小部分短链接，按数量推算
+    sample = [line for line in lines if short_base in line][:100]
+    single = Config()
+    single.URL_RESOLVE_WORKERS = 1
+    resolver = UrlResolver(single, None, short_hosts=(short_host,))
+    start = time.perf_counter()
+    resolver.resolve_all(sample)
+    single_rate = len(set(parse_video_url(line, (short_host,))[1] for line in sample)) / (time.perf_counter() - start)
+
+    db_handler = DatabaseHandler(os.path.join(workdir, 'resolver.db'))
+    resolver = UrlResolver(config, db_handler, short_hosts=(short_host,))
+    start = time.perf_counter()
+    results = resolver.resolve_all(lines)
+    cold_seconds = time.perf_counter() - start
+
+    # 新的解析器实例只能从数据库缓存中读取
+    resolver = UrlResolver(config, db_handler, short_hosts=(short_host,))
+    start = time.perf_counter()
+    warm_results = resolver.resolve_all(lines)
+    warm_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    failed = sum(1 for result in results if result['error'])
+    assert [result['bvid'] for result in warm_results] == [result['bvid'] for result in results]
+
+    print(f"行数: {len(lines)}, 不同的短链接: {short_links}, 跳转延迟 {args.latency:.0f} ms")
+    print(f"本地识别: {len(lines) / parse_seconds:.0f} 行/秒")
+    print(f"跟随短链接: 单线程 {single_rate:.0f} 个/秒, "
+          f"{config.URL_RESOLVE_WORKERS} 线程 {short_links / cold_seconds:.0f} 个/秒")
+    print(f"首次解析: {cold_seconds:.2f} s, {len(lines) / cold_seconds:.0f} 行/秒, 失败 {failed} 行")
+    print(f"缓存命中后再次解析: {warm_seconds:.2f} s, {len(lines) / warm_seconds:.0f} 行/秒")
+    print(f"去重后的视频数: {len(UrlResolver.unique_videos(results))}")
+    print("\n失败报告(前5行):")
+    print('\n'.join(UrlResolver.format_report(results).splitlines()[:5]))
+
+
+if __name__ == '__main__':
+    main()
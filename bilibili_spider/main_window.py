@@ -3,27 +3,53 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QTabWidget,
                              QLabel, QStatusBar, QMessageBox)
 from PyQt6.QtCore import Qt
+import os
+import importlib
 import logging
 
 from bilibili_spider.utils.config import Config
-from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.db_handler import open_database
 from bilibili_spider.pages.home_page import HomePage
-from bilibili_spider.pages.crawl_page import CrawlPage
-from bilibili_spider.pages.search_page import SearchPage
-from bilibili_spider.pages.settings_page import SettingsPage
+
+
+class LazyPage(QWidget):
+    """延迟加载的页面容器，首次切换到该标签页时才导入模块并创建页面"""
+
+    def __init__(self, module_name, class_name, *args):
+        super().__init__()
+        self.module_name = module_name
+        self.class_name = class_name
+        self.args = args
+        self.page = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def load(self):
+        """创建实际页面，已创建时直接返回
+
+        @return {QWidget} - 实际页面
+        """
+        if self.page is None:
+            module = importlib.import_module(self.module_name)
+            self.page = getattr(module, self.class_name)(*self.args)
+            self.layout().addWidget(self.page)
+        return self.page
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger('BilibiliSpider')
+        self.cookie_refresher = None
         self.init_backend()
         self.init_ui()
+        self.start_cookie_refresh()
 
     def init_backend(self):
         try:
             self.config = Config()
-            self.db_handler = DatabaseHandler('bilibili_comments.db')
+            self.db_handler = open_database(self.config)
             self.spider = None
             self.logger.info("后端组件初始化成功")
         except Exception as e:
@@ -46,18 +72,25 @@ class MainWindow(QMainWindow):
             self.tab_widget = QTabWidget()
             self.setup_tab_style()
 
-            # 初始化各页面
+            # 初始化各页面，除主页外均在首次打开时才加载
             self.home_page = HomePage(self.db_handler)
-            self.crawl_page = CrawlPage(self.db_handler, self.config)
-            self.search_page = SearchPage(self.db_handler)
-            self.settings_page = SettingsPage(self.config, self.db_handler)
+            self.crawl_page = LazyPage('bilibili_spider.pages.crawl_page', 'CrawlPage',
+                                       self.db_handler, self.config)
+            self.search_page = LazyPage('bilibili_spider.pages.search_page', 'SearchPage',
+                                        self.db_handler)
+            self.settings_page = LazyPage('bilibili_spider.pages.settings_page', 'SettingsPage',
+                                          self.config, self.db_handler)
+            self.analytics_page = LazyPage('bilibili_spider.pages.analytics_page', 'AnalyticsPage',
+                                           self.db_handler, self.config)
 
             self.tab_widget.addTab(self.home_page, "主页")
             self.tab_widget.addTab(self.crawl_page, "评论爬取")
             self.tab_widget.addTab(self.search_page, "评论查询")
             self.tab_widget.addTab(self.settings_page, "系统设置")
+            self.tab_widget.addTab(self.analytics_page, "数据分析")
 
             main_layout.addWidget(self.tab_widget)
+            self.tab_widget.currentChanged.connect(self.load_tab)
 
             self.home_page.connect_buttons(self.tab_widget)
 
@@ -68,6 +101,50 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "错误", "界面初始化失败")
             raise
 
+    def start_cookie_refresh(self):
+        """Cookie即将过期时，用保存的浏览器登录状态在后台刷新"""
+        try:
+            if not os.path.isdir(self.config.BROWSER_PROFILE_DIR):
+                return
+
+            cookie, need_update = self.db_handler.get_valid_cookie()
+            if not (cookie and need_update):
+                return
+
+            # 只有需要刷新时才导入，避免启动时加载selenium
+            from bilibili_spider.utils.cookie_helper import CookieHelper
+
+            self.cookie_refresher = CookieHelper(self.config, self.db_handler, headless=True)
+            self.cookie_refresher.cookie_ready.connect(self.on_cookie_refreshed)
+            self.cookie_refresher.login_required.connect(
+                lambda: self.statusBar().showMessage("Cookie即将过期，请在系统设置中重新登录")
+            )
+            self.statusBar().showMessage("正在后台刷新Cookie...")
+
+        except Exception as e:
+            self.logger.error(f"后台刷新Cookie失败: {str(e)}")
+
+    def on_cookie_refreshed(self, cookie):
+        """保存后台刷新得到的Cookie"""
+        try:
+            if self.config.set_cookie(cookie):
+                self.db_handler.save_cookie(cookie)
+                if self.settings_page.page:
+                    self.settings_page.page.load_settings()
+                self.statusBar().showMessage("Cookie已在后台刷新", 5000)
+        except Exception as e:
+            self.logger.error(f"保存刷新后的Cookie失败: {str(e)}")
+
+    def load_tab(self, index):
+        """切换标签页时加载尚未创建的页面"""
+        widget = self.tab_widget.widget(index)
+        if isinstance(widget, LazyPage):
+            try:
+                widget.load()
+            except Exception as e:
+                self.logger.error(f"加载页面失败: {str(e)}")
+                QMessageBox.critical(self, "错误", f"加载页面失败: {str(e)}")
+
     def setup_tab_style(self):
         self.tab_widget.setStyleSheet("""
             QTabWidget::pane {
@@ -116,7 +193,14 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         try:
             self.logger.info("正在关闭应用程序...")
-            # 在这里添加清理代码
+            if self.cookie_refresher:
+                self.cookie_refresher.close()
+            # 等待各页面的后台线程退出，避免关闭后仍有线程在写数据库
+            for index in range(self.tab_widget.count()):
+                widget = self.tab_widget.widget(index)
+                page = widget.page if isinstance(widget, LazyPage) else widget
+                if hasattr(page, 'shutdown'):
+                    page.shutdown()
             event.accept()
         except Exception as e:
             self.logger.error(f"程序关闭时发生错误: {str(e)}")
@@ -10,8 +10,8 @@ class Comment:
     """
 
     def __init__(self, video_id, video_title, comment_id, user_name, content,
-                 publish_time, like_count, replies=None):
-        """初始化评论对象"""
+                 publish_time, like_count, replies=None, user_mid=None, user_level=None, user_avatar=None):
+        """初始化评论对象，user_mid等作者信息写入users表"""
         self.video_id = video_id
         self.video_title = video_title
         self.comment_id = comment_id
@@ -19,4 +19,7 @@ class Comment:
         self.content = content
         self.publish_time = publish_time
         self.like_count = like_count
-        self.replies = replies or []
\ No newline at end of file
+        self.replies = replies or []
+        self.user_mid = user_mid
+        self.user_level = user_level
+        self.user_avatar = user_avatar
\ No newline at end of file
@@ -0,0 +1,227 @@
+# pages/analytics_page.py
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QTableWidget, QTableWidgetItem,
+                             QFrame, QProgressBar, QHeaderView, QMessageBox)
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from bilibili_spider.utils.analytics import CommentAnalyzer
+
+
+class AnalyticsWorker(QThread):
+    """在后台线程中调度多进程评论分析"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, db_handler, config):
+        super().__init__()
+        self.analyzer = CommentAnalyzer(db_handler, config, on_progress=self.progress.emit)
+
+    def run(self):
+        try:
+            processed = self.analyzer.run()
+            if not self.analyzer.stop_event.is_set():
+                self.finished.emit(processed)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def stop(self):
+        self.analyzer.stop()
+
+
+class StyledFrame(QFrame):
+    def __init__(self, title="", parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("""
+            StyledFrame {
+                background-color: #2d2d2d;
+                border-radius: 8px;
+                padding: 15px;
+                margin: 5px;
+            }
+        """)
+        self.layout = QVBoxLayout(self)
+        self.layout.setSpacing(10)
+
+        if title:
+            label = QLabel(title)
+            label.setStyleSheet("""
+                font-size: 16px;
+                font-weight: bold;
+                color: white;
+                padding: 5px;
+                margin-bottom: 10px;
+            """)
+            self.layout.addWidget(label)
+
+
+class AnalyticsPage(QWidget):
+    def __init__(self, db_handler, config):
+        super().__init__()
+        self.db_handler = db_handler
+        self.config = config
+        self.analytics_worker = None
+        self.init_ui()
+        self.load_results()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        # 分析控制区域
+        control_frame = StyledFrame("评论分析")
+        control_layout = QHBoxLayout()
+        control_layout.setContentsMargins(5, 5, 5, 5)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #1e1e1e;
+                color: white;
+                text-align: center;
+                height: 24px;
+            }
+            QProgressBar::chunk {
+                background-color: #0078d4;
+                border-radius: 4px;
+            }
+        """)
+        control_layout.addWidget(self.progress_bar)
+
+        self.run_button = QPushButton("开始分析")
+        self.run_button.setStyleSheet("""
+            QPushButton {
+                padding: 8px 30px;
+                background-color: #0078d4;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 14px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #1184db;
+            }
+            QPushButton:pressed {
+                background-color: #006abc;
+            }
+            QPushButton:disabled {
+                background-color: #666666;
+            }
+        """)
+        control_layout.addWidget(self.run_button)
+
+        control_frame.layout.addLayout(control_layout)
+        layout.addWidget(control_frame)
+
+        # 结果区域
+        results_layout = QHBoxLayout()
+
+        keyword_frame = StyledFrame("高频关键词")
+        self.keyword_table = self.create_table(['关键词', '出现次数'])
+        keyword_frame.layout.addWidget(self.keyword_table)
+        results_layout.addWidget(keyword_frame, 1)
+
+        sentiment_frame = StyledFrame("视频情感")
+        self.sentiment_table = self.create_table(['视频ID', '视频标题', '评论数', '平均得分', '正面', '负面'])
+        sentiment_frame.layout.addWidget(self.sentiment_table)
+        results_layout.addWidget(sentiment_frame, 2)
+
+        layout.addLayout(results_layout)
+
+        user_frame = StyledFrame("活跃用户")
+        self.user_table = self.create_table(['用户名', '评论数', '总点赞数', '视频数', '首次评论', '最近评论'])
+        user_frame.layout.addWidget(self.user_table)
+        layout.addWidget(user_frame)
+
+        # 连接信号
+        self.run_button.clicked.connect(self.start_analysis)
+
+    def create_table(self, headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setStyleSheet("""
+            QTableWidget {
+                background-color: #1e1e1e;
+                border: 1px solid #3d3d3d;
+                gridline-color: #3d3d3d;
+                color: white;
+            }
+            QHeaderView::section {
+                background-color: #2d2d2d;
+                padding: 8px;
+                border: none;
+                border-right: 1px solid #3d3d3d;
+                border-bottom: 1px solid #3d3d3d;
+                font-weight: bold;
+                color: white;
+            }
+        """)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, row_data in enumerate(rows):
+            for col, data in enumerate(row_data):
+                text = f"{data:.3f}" if isinstance(data, float) else str(data if data is not None else '')
+                table.setItem(row, col, QTableWidgetItem(text))
+
+    def load_results(self):
+        """从汇总表加载上次的分析结果，存储后端不支持评论分析时禁用分析"""
+        if not self.db_handler.supports('analytics'):
+            self.run_button.setEnabled(False)
+            self.progress_bar.setFormat(self.db_handler.unsupported_message('analytics'))
+            return
+        try:
+            self.fill_table(self.keyword_table, self.db_handler.get_top_keywords())
+            self.fill_table(self.sentiment_table, self.db_handler.get_video_sentiment())
+            self.fill_table(self.user_table, self.db_handler.get_user_activity())
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载分析结果失败: {str(e)}")
+
+    def start_analysis(self):
+        if self.analytics_worker and self.analytics_worker.isRunning():
+            return
+        if not self.db_handler.supports('analytics'):
+            QMessageBox.warning(self, "提示", self.db_handler.unsupported_message('analytics'))
+            return
+
+        self.run_button.setEnabled(False)
+        self.run_button.setText("正在分析...")
+        self.progress_bar.setValue(0)
+
+        self.analytics_worker = AnalyticsWorker(self.db_handler, self.config)
+        self.analytics_worker.progress.connect(self.handle_progress)
+        self.analytics_worker.finished.connect(self.handle_finished)
+        self.analytics_worker.error.connect(self.handle_error)
+        self.analytics_worker.start()
+
+    def shutdown(self):
+        """停止分析并等待后台线程和分析进程退出，关闭主窗口时调用"""
+        if self.analytics_worker and self.analytics_worker.isRunning():
+            self.analytics_worker.stop()
+            self.analytics_worker.wait()
+
+    def handle_progress(self, processed, total):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(min(processed, max(total, 1)))
+
+    def handle_finished(self, processed):
+        self.run_button.setEnabled(True)
+        self.run_button.setText("开始分析")
+        self.load_results()
+        QMessageBox.information(self, "完成", f"分析完成，共分析 {processed} 条评论")
+
+    def handle_error(self, error_message):
+        self.run_button.setEnabled(True)
+        self.run_button.setText("开始分析")
+        QMessageBox.critical(self, "错误", f"分析失败: {error_message}")
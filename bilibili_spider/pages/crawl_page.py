@@ -1,138 +1,168 @@
 # pages/crawl_page.py
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QLineEdit, QSpinBox, QTextEdit,
-                             QProgressBar, QFrame, QMessageBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                             QPushButton, QLineEdit, QSpinBox, QPlainTextEdit,
+                             QProgressBar, QFrame, QMessageBox, QComboBox, QCheckBox)
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer
 from datetime import datetime
+from collections import deque
+from logging.handlers import RotatingFileHandler
+import logging
 
 from bilibili_spider.spiders.comment_spider import BilibiliSpider
+from bilibili_spider.spiders.watch_scheduler import WatchScheduler
+from bilibili_spider.spiders.video_discovery import VideoDiscovery
+from bilibili_spider.spiders.url_resolver import UrlResolver
+from bilibili_spider.spiders.crawl_engine import CrawlEngine, CrawlProcess
 from bilibili_spider.models.comments import Comment
 
-# pages/crawl_page.py 顶部添加导入
-import time
-import requests
-import random
-
 
 class CrawlWorker(QThread):
+    """在后台线程中运行爬取引擎，评论通过信号交给界面线程入库"""
     progress = pyqtSignal(str)  # 用于发送进度信息
+    page_progress = pyqtSignal(int, int, float)  # 已完成页数、计划页数、预计剩余秒数(未知时为-1)
     error = pyqtSignal(str)
     comment_received = pyqtSignal(dict)  # 用于发送单条评论数据
+    likes_received = pyqtSignal(dict)  # 用于发送一页评论的点赞数
+    stats_received = pyqtSignal(int, int, int, int)  # 独立进程模式下的入库统计，线程模式下不使用
     finished = pyqtSignal(dict)
+    stopped = pyqtSignal(dict)  # 被停止时发送断点，可据此从下一页继续
+
+    # 爬取模式
+    MODE_FULL = CrawlEngine.MODE_FULL
+    MODE_INCREMENTAL = CrawlEngine.MODE_INCREMENTAL
+    MODE_REFRESH_HOT = CrawlEngine.MODE_REFRESH_HOT
+
+    def __init__(self, spider, url, max_pages, mode=MODE_FULL, db_handler=None, start_page=1, total_comments=0):
+        """初始化
 
-    def __init__(self, spider, url, max_pages):
+        @param {int} max_pages - 最多爬取的页数，0表示按评论总数爬取全部页
+        """
         super().__init__()
-        self.spider = spider
-        self.url = url
-        self.max_pages = max_pages
-        self.is_running = False
+        self.engine = CrawlEngine(
+            spider, url, max_pages,
+            mode=mode,
+            db_handler=db_handler,
+            start_page=start_page,
+            total_comments=total_comments,
+            on_progress=self.progress.emit,
+            on_page_progress=self.page_progress.emit,
+            on_comment=self.comment_received.emit,
+            on_likes=self.likes_received.emit
+        )
+
+    @property
+    def is_running(self):
+        return self.isRunning() and not self.engine.stopped
+
+    @property
+    def is_paused(self):
+        return self.engine.is_paused
 
     def run(self):
-        self.is_running = True
         try:
-            video_id = self.spider.extract_video_id(self.url)
-            if not video_id:
-                self.error.emit("无法从URL中提取视频ID")
-                return
+            result = self.engine.run()
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+
+        if result['stopped']:
+            self.stopped.emit(result)
+        else:
+            self.finished.emit(result)
+
+    def pause(self):
+        """暂停，进行中的页处理完后在下一页开始前阻塞"""
+        self.engine.pause()
+
+    def resume(self):
+        self.engine.resume()
 
-            # 获取视频标题
-            video_title = ""
-            if video_id.startswith('BV'):
-                view_url = f'https://api.bilibili.com/x/web-interface/view?bvid={video_id}'
+    def stop(self):
+        """要求停止，等待中的延迟立即结束，进行中的请求最长在读取超时后返回"""
+        self.engine.stop()
+
+
+class ProcessCrawlWorker(QObject):
+    """在独立进程中运行爬取引擎
+
+    与CrawlWorker信号一致。子进程自己入库，只发回合并后的日志、页进度和入库统计，
+    由定时器在界面线程中非阻塞地读取，爬取速度再快界面也只按固定间隔处理少量消息。
+    子进程崩溃时发送error信号，界面进程不受影响。
+    """
+    progress = pyqtSignal(str)
+    page_progress = pyqtSignal(int, int, float)
+    error = pyqtSignal(str)
+    comment_received = pyqtSignal(dict)  # 评论在子进程中入库，不发送
+    likes_received = pyqtSignal(dict)  # 点赞数在子进程中更新，不发送
+    stats_received = pyqtSignal(int, int, int, int)  # 新增、更新、重复、失败的评论数
+    finished = pyqtSignal(dict)
+    stopped = pyqtSignal(dict)
+
+    def __init__(self, config, db_file, url, max_pages, mode=CrawlEngine.MODE_FULL, start_page=1, total_comments=0):
+        super().__init__()
+        self.crawl_process = CrawlProcess(
+            config, db_file, url, max_pages,
+            mode=mode, start_page=start_page, total_comments=total_comments
+        )
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(config.LOG_FLUSH_INTERVAL)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def start(self):
+        self.crawl_process.start()
+        self.poll_timer.start()
+
+    def isRunning(self):
+        return self.poll_timer.isActive()
+
+    @property
+    def is_running(self):
+        return self.isRunning() and not self.crawl_process.stop_event.is_set()
+
+    @property
+    def is_paused(self):
+        return self.crawl_process.is_paused
+
+    def poll(self):
+        """处理子进程发回的消息，页进度只取最新一条"""
+        page = None
+        for message in self.crawl_process.receive():
+            kind = message[0]
+            if kind == 'log':
+                for line in message[1]:
+                    self.progress.emit(line)
+            elif kind == 'page':
+                page = message[1:]
+            elif kind == 'stats':
+                self.stats_received.emit(*message[1:])
             else:
-                view_url = f'https://api.bilibili.com/x/web-interface/view?aid={video_id.lstrip("av")}'
-
-            try:
-                response = requests.get(view_url, headers=self.spider.headers)
-                response.raise_for_status()
-                data = response.json()
-                if data['code'] == 0:
-                    video_title = data['data']['title']
-                    self.progress.emit(f"获取到视频标题: {video_title}")
-                else:
-                    self.progress.emit(f"获取视频标题失败: {data.get('message', '未知错误')}")
-                    return
-            except Exception as e:
-                self.progress.emit(f"获取视频标题失败: {str(e)}")
-                return
+                if page:
+                    self.page_progress.emit(*page)
+                    page = None
+                self.poll_timer.stop()
+                self.crawl_process.join(1)
+                getattr(self, kind).emit(message[1])
+        if page:
+            self.page_progress.emit(*page)
 
-            self.progress.emit(f"开始爬取视频 {video_id} 的评论...")
-            current_page = 1
-            total_comments = 0
-
-            while current_page <= self.max_pages and self.is_running:
-                self.progress.emit(f"正在爬取第 {current_page} 页...")
-
-                api_url = self.spider.get_api_url(video_id, current_page)
-                if not api_url:
-                    break
-
-                try:
-                    response = requests.get(api_url, headers=self.spider.headers)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    if data['code'] != 0:
-                        self.progress.emit(f"API返回错误: {data.get('message', '未知错误')}")
-                        break
-
-                    replies = data['data'].get('replies', [])
-                    if not replies:
-                        self.progress.emit("没有更多评论了")
-                        break
-
-                    for reply in replies:
-                        comment_data = {
-                            'video_id': video_id,
-                            'video_title': video_title,
-                            'comment_id': str(reply['rpid']),
-                            'user_name': reply['member']['uname'],
-                            'content': reply['content']['message'],
-                            'publish_time': datetime.fromtimestamp(
-                                reply['ctime']
-                            ).strftime('%Y-%m-%d %H:%M:%S'),
-                            'like_count': reply['like'],
-                            'replies': []
-                        }
-
-                        # 处理子回复
-                        if reply.get('replies'):
-                            for sub_reply in reply['replies']:
-                                reply_data = {
-                                    'user_name': sub_reply['member']['uname'],
-                                    'content': sub_reply['content']['message'],
-                                    'time': datetime.fromtimestamp(
-                                        sub_reply['ctime']
-                                    ).strftime('%Y-%m-%d %H:%M:%S')
-                                }
-                                comment_data['replies'].append(reply_data)
-
-                        # 发送单条评论信号
-                        self.comment_received.emit(comment_data)
-                        total_comments += 1
-                        self.progress.emit(f"已获取 {total_comments} 条评论")
-
-                except requests.exceptions.RequestException as e:
-                    self.progress.emit(f"请求失败: {str(e)}")
-                    continue
-
-                current_page += 1
-                time.sleep(random.uniform(1, 3))  # 添加随机延迟
-
-            if self.is_running:
-                self.finished.emit({
-                    'video_id': video_id,
-                    'total_comments': total_comments
-                })
+    def wait(self, msecs):
+        """等待子进程退出，超时后强制结束
 
-        except Exception as e:
-            self.error.emit(str(e))
-        finally:
-            self.is_running = False
+        @param {int} msecs - 超时毫秒数
+        @return {bool} - 是否在超时内正常退出
+        """
+        self.poll_timer.stop()
+        return self.crawl_process.join(msecs / 1000)
+
+    def pause(self):
+        self.crawl_process.pause()
+
+    def resume(self):
+        self.crawl_process.resume()
 
     def stop(self):
-        self.is_running = False
+        self.crawl_process.stop()
 
 
 class StyledFrame(QFrame):
@@ -161,18 +191,152 @@ class StyledFrame(QFrame):
             self.layout.addWidget(label)
 
 
+class WatchWorker(QThread):
+    """在后台线程中运行监控调度"""
+    progress = pyqtSignal(str)
+
+    def __init__(self, spider, db_handler, config):
+        super().__init__()
+        self.scheduler = WatchScheduler(spider, db_handler, config, on_progress=self.progress.emit)
+
+    def run(self):
+        self.scheduler.run_forever()
+
+    def stop(self):
+        self.scheduler.stop()
+
+
+class DiscoveryWorker(QThread):
+    """在后台线程中列出发现来源中的视频"""
+    progress = pyqtSignal(str)
+    error = pyqtSignal(str)
+    videos_found = pyqtSignal(list)
+
+    def __init__(self, spider, db_handler, config, source, query='', max_pages=0):
+        super().__init__()
+        self.discovery = VideoDiscovery(spider, db_handler, config, on_progress=self.progress.emit)
+        self.source = source
+        self.query = query
+        self.max_pages = max_pages
+
+    def run(self):
+        try:
+            self.videos_found.emit(self.discovery.discover(self.source, self.query, self.max_pages))
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def stop(self):
+        self.discovery.stop()
+
+
+class ResolveWorker(QThread):
+    """在后台线程中批量解析导入的链接"""
+    progress = pyqtSignal(str)
+    error = pyqtSignal(str)
+    resolved = pyqtSignal(list)
+
+    def __init__(self, config, db_handler, lines):
+        super().__init__()
+        self.resolver = UrlResolver(config, db_handler, on_progress=self.progress.emit)
+        self.lines = lines
+
+    def run(self):
+        try:
+            self.resolved.emit(self.resolver.resolve_all(self.lines))
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def stop(self):
+        self.resolver.stop()
+
+
+class LogView(QPlainTextEdit):
+    """有界、限速刷新的日志显示控件
+
+    新日志先写入环形缓冲区，由定时器合并后一次性追加到文档，
+    文档本身限制最大行数，长时间爬取时界面内存和CPU占用保持恒定。
+    """
+
+    def __init__(self, max_lines=2000, flush_interval=200, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def append_line(self, line):
+        """追加一行日志，实际写入由定时器合并完成"""
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(line)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        """将缓冲区中的日志一次性写入文档"""
+        if not self.pending:
+            self.flush_timer.stop()
+            return
+
+        lines = list(self.pending)
+        self.pending.clear()
+        if self.dropped:
+            lines.insert(0, f"... 已省略 {self.dropped} 行日志，完整内容见日志文件 ...")
+            self.dropped = 0
+
+        self.appendPlainText('\n'.join(lines))
+        self.verticalScrollBar().setValue(
+            self.verticalScrollBar().maximum()
+        )
+
+
+def setup_crawl_logger(config):
+    """获取爬取日志记录器，完整日志写入滚动日志文件
+
+    @param {Config} config - 配置对象
+    @return {Logger} - 爬取日志记录器
+    """
+    logger = logging.getLogger('BilibiliSpider.crawl')
+
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        handler = RotatingFileHandler(
+            config.LOG_FILE,
+            maxBytes=config.LOG_FILE_MAX_BYTES,
+            backupCount=config.LOG_FILE_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(handler)
+
+    # 完整日志只进入文件，不再刷到控制台
+    logger.propagate = False
+    return logger
+
+
 class CrawlPage(QWidget):
     def __init__(self, db_handler, config):
         super().__init__()
         self.db_handler = db_handler
         self.config = config
         self.crawl_worker = None
+        self.watch_worker = None
+        self.discovery_worker = None
+        self.resolve_worker = None
+        self.crawl_queue = deque()  # 发现的视频中等待爬取的URL
+        self.resume_state = None  # 上次被停止的爬取断点
+        self.crawl_stats = [0, 0, 0, 0]  # 本次爬取新增、更新、重复、失败的评论数
+        self.crawl_logger = setup_crawl_logger(config)
+
+        self.spider = None  # 首次开始爬取时按当前Cookie创建
 
         cookie, _ = self.db_handler.get_valid_cookie()
-        if cookie and self.config.set_cookie(cookie):
-            self.spider = BilibiliSpider(self.config)
-        else:
-            self.spider = None
+        if cookie:
+            self.config.set_cookie(cookie)
 
         self.init_ui()
 
@@ -203,9 +367,120 @@ class CrawlPage(QWidget):
         """)
 
         url_layout.addWidget(self.url_input)
+
+        self.import_button = QPushButton("批量导入")
+        self.import_button.setToolTip("从文本文件导入链接，每行一个，支持短链接、移动版链接和分享文案")
+        self.import_button.setStyleSheet("""
+            QPushButton {
+                padding: 8px 20px;
+                background-color: #404040;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #505050;
+            }
+            QPushButton:disabled {
+                background-color: #666666;
+            }
+        """)
+        url_layout.addWidget(self.import_button)
         url_frame.layout.addLayout(url_layout)
         layout.addWidget(url_frame)
 
+        # 视频发现区域，发现的视频按爬取控制中的页数和模式依次爬取
+        discovery_frame = StyledFrame("视频发现")
+        discovery_layout = QHBoxLayout()
+        discovery_layout.setContentsMargins(5, 5, 5, 5)
+
+        self.source_combo = QComboBox()
+        for source_text, source in [
+            ("UP主投稿", VideoDiscovery.SOURCE_UPLOADER),
+            ("关键词搜索", VideoDiscovery.SOURCE_SEARCH),
+            ("综合热门", VideoDiscovery.SOURCE_POPULAR),
+            ("排行榜", VideoDiscovery.SOURCE_RANKING)
+        ]:
+            self.source_combo.addItem(source_text, source)
+        self.source_combo.setStyleSheet("""
+            QComboBox {
+                padding: 8px;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #1e1e1e;
+                color: white;
+                min-width: 120px;
+                font-size: 14px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #1e1e1e;
+                border: 1px solid #3d3d3d;
+                selection-background-color: #0078d4;
+                color: white;
+            }
+        """)
+        discovery_layout.addWidget(self.source_combo)
+
+        self.source_input = QLineEdit()
+        self.source_input.setStyleSheet("""
+            QLineEdit {
+                padding: 8px;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #1e1e1e;
+                color: white;
+                font-size: 14px;
+            }
+            QLineEdit:focus {
+                border: 1px solid #0078d4;
+            }
+        """)
+        discovery_layout.addWidget(self.source_input)
+
+        self.listing_spinbox = QSpinBox()
+        self.listing_spinbox.setRange(0, 1000)
+        self.listing_spinbox.setSpecialValueText("全部列表页")
+        self.listing_spinbox.setSuffix(" 页列表")
+        self.listing_spinbox.setValue(0)
+        self.listing_spinbox.setMinimumWidth(130)
+        self.listing_spinbox.setStyleSheet("""
+            QSpinBox {
+                padding: 8px;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #1e1e1e;
+                color: white;
+                font-size: 14px;
+            }
+        """)
+        discovery_layout.addWidget(self.listing_spinbox)
+
+        self.discover_button = QPushButton("发现并爬取")
+        self.discover_button.setStyleSheet("""
+            QPushButton {
+                padding: 8px 20px;
+                background-color: #0078d4;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 14px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #1184db;
+            }
+            QPushButton:disabled {
+                background-color: #666666;
+            }
+        """)
+        discovery_layout.addWidget(self.discover_button)
+
+        discovery_frame.layout.addLayout(discovery_layout)
+        layout.addWidget(discovery_frame)
+        self.update_source_input()
+
         # 爬取控制区域
         control_frame = StyledFrame("爬取控制")
         control_layout = QHBoxLayout()
@@ -224,8 +499,9 @@ class CrawlPage(QWidget):
         control_layout.addWidget(page_label)
 
         self.page_spinbox = QSpinBox()
-        self.page_spinbox.setRange(1, 1000000)
-        self.page_spinbox.setValue(10)
+        self.page_spinbox.setRange(0, 1000000)
+        self.page_spinbox.setSpecialValueText("全部")  # 0表示按评论总数爬取全部页
+        self.page_spinbox.setValue(0)
         self.page_spinbox.setMinimumWidth(120)
         self.page_spinbox.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.page_spinbox.setButtonSymbols(QSpinBox.ButtonSymbols.UpDownArrows)
@@ -249,6 +525,44 @@ class CrawlPage(QWidget):
         """)
 
         control_layout.addWidget(self.page_spinbox)
+
+        self.mode_combo = QComboBox()
+        for mode_text, mode in [
+            ("完整爬取", CrawlWorker.MODE_FULL),
+            ("增量爬取", CrawlWorker.MODE_INCREMENTAL),
+            ("刷新热门评论点赞", CrawlWorker.MODE_REFRESH_HOT)
+        ]:
+            self.mode_combo.addItem(mode_text, mode)
+        self.mode_combo.setStyleSheet("""
+            QComboBox {
+                padding: 8px;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #2d2d2d;
+                color: white;
+                min-width: 150px;
+                font-size: 14px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #1e1e1e;
+                border: 1px solid #3d3d3d;
+                selection-background-color: #0078d4;
+                color: white;
+            }
+        """)
+        control_layout.addWidget(self.mode_combo)
+
+        self.process_checkbox = QCheckBox("独立进程")
+        self.process_checkbox.setToolTip("在独立进程中爬取和入库，界面只显示每页的汇总，爬取进程崩溃不影响界面")
+        self.process_checkbox.setChecked(self.config.CRAWL_PROCESS)
+        self.process_checkbox.setStyleSheet("""
+            QCheckBox {
+                color: white;
+                font-size: 14px;
+                padding-left: 5px;
+            }
+        """)
+        control_layout.addWidget(self.process_checkbox)
         control_layout.addStretch()
 
         self.start_button = QPushButton("开始爬取")
@@ -274,18 +588,137 @@ class CrawlPage(QWidget):
             }
         """)
 
+        crawl_button_style = """
+            QPushButton {{
+                padding: 8px 20px;
+                background-color: {color};
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 14px;
+                min-width: 80px;
+            }}
+            QPushButton:hover {{
+                background-color: {hover};
+            }}
+            QPushButton:disabled {{
+                background-color: #666666;
+            }}
+        """
+        self.pause_button = QPushButton("暂停")
+        self.pause_button.setStyleSheet(crawl_button_style.format(color='#404040', hover='#505050'))
+        self.pause_button.setEnabled(False)
+        self.stop_button = QPushButton("停止")
+        self.stop_button.setStyleSheet(crawl_button_style.format(color='#d83b01', hover='#e74c3c'))
+        self.stop_button.setEnabled(False)
+
         control_layout.addWidget(self.start_button)
+        control_layout.addWidget(self.pause_button)
+        control_layout.addWidget(self.stop_button)
         control_frame.layout.addLayout(control_layout)
+
+        # 爬取进度
+        progress_layout = QHBoxLayout()
+        progress_layout.setContentsMargins(5, 5, 5, 5)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%p% (%v/%m 页)")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #1e1e1e;
+                color: white;
+                text-align: center;
+                height: 24px;
+            }
+            QProgressBar::chunk {
+                background-color: #0078d4;
+                border-radius: 4px;
+            }
+        """)
+        progress_layout.addWidget(self.progress_bar)
+
+        self.eta_label = QLabel("预计剩余: --")
+        self.eta_label.setStyleSheet("""
+            QLabel {
+                color: white;
+                font-size: 14px;
+                padding-left: 10px;
+            }
+        """)
+        self.eta_label.setMinimumWidth(160)
+        progress_layout.addWidget(self.eta_label)
+
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("""
+            QLabel {
+                color: #aaaaaa;
+                font-size: 14px;
+                padding-left: 10px;
+            }
+        """)
+        self.stats_label.setMinimumWidth(240)
+        progress_layout.addWidget(self.stats_label)
+
+        control_frame.layout.addLayout(progress_layout)
+
+        # 监控列表操作
+        watch_layout = QHBoxLayout()
+        watch_layout.setContentsMargins(5, 5, 5, 5)
+        watch_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        self.watch_status_label = QLabel()
+        self.watch_status_label.setStyleSheet("""
+            QLabel {
+                color: white;
+                font-size: 14px;
+            }
+        """)
+        watch_layout.addWidget(self.watch_status_label)
+        watch_layout.addStretch()
+
+        watch_button_style = """
+            QPushButton {
+                padding: 8px 20px;
+                background-color: #107c10;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 14px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #13981c;
+            }
+            QPushButton:pressed {
+                background-color: #0e6a0e;
+            }
+        """
+        self.add_watch_button = QPushButton("加入监控列表")
+        self.add_watch_button.setStyleSheet(watch_button_style)
+        self.watch_button = QPushButton("启动监控")
+        self.watch_button.setStyleSheet(watch_button_style)
+        watch_layout.addWidget(self.add_watch_button)
+        watch_layout.addWidget(self.watch_button)
+
+        control_frame.layout.addLayout(watch_layout)
         layout.addWidget(control_frame)
+        self.update_watch_status()
 
         # 日志显示区域
         log_frame = StyledFrame("运行日志")
         log_frame.layout.setContentsMargins(5, 5, 5, 5)
 
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        self.log_text = LogView(
+            max_lines=self.config.LOG_VIEW_MAX_LINES,
+            flush_interval=self.config.LOG_FLUSH_INTERVAL
+        )
         self.log_text.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 border: 1px solid #3d3d3d;
                 border-radius: 4px;
                 background-color: #1e1e1e;
@@ -300,13 +733,20 @@ class CrawlPage(QWidget):
 
         # 连接信号
         self.start_button.clicked.connect(self.start_crawl)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.stop_button.clicked.connect(self.stop_crawl)
+        self.add_watch_button.clicked.connect(self.add_to_watchlist)
+        self.watch_button.clicked.connect(self.toggle_watch)
+        self.source_combo.currentIndexChanged.connect(self.update_source_input)
+        self.discover_button.clicked.connect(self.start_discovery)
+        self.import_button.clicked.connect(self.import_urls)
+        self.process_checkbox.toggled.connect(self.set_crawl_process)
 
-    def add_log(self, message):
+    def add_log(self, message, full_message=None):
+        """记录日志，界面显示可截断的内容，日志文件保存完整内容"""
         timestamp = datetime.now().strftime('%H:%M:%S')
-        self.log_text.append(f"[{timestamp}] {message}")
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum()
-        )
+        self.log_text.append_line(f"[{timestamp}] {message}")
+        self.crawl_logger.info(full_message or message)
 
     def handle_comment(self, comment_data):
         """处理单条评论数据"""
@@ -319,23 +759,70 @@ class CrawlPage(QWidget):
                 content=comment_data['content'],
                 publish_time=comment_data['publish_time'],
                 like_count=comment_data['like_count'],
-                replies=comment_data['replies']
+                replies=comment_data['replies'],
+                user_mid=comment_data.get('user_mid'),
+                user_level=comment_data.get('user_level'),
+                user_avatar=comment_data.get('user_avatar')
             )
 
             result = self.db_handler.save_comment(comment)
-            status = "新增" if result == 1 else "更新" if result == 2 else "失败"
-            # 输出到日志
-            self.add_log(f"[{status}] {comment_data['user_name']}: {comment_data['content']}")
-            # 输出到控制台
-            print(f"[{status}] {comment_data['user_name']}: {comment_data['content']}")
+            status = {1: "新增", 2: "更新", 3: "重复"}.get(result, "失败")
+            self.crawl_stats[{1: 0, 2: 1, 3: 2}.get(result, 3)] += 1
+            # 界面只显示截断后的内容，完整内容写入日志文件
+            content = comment_data['content']
+            if len(content) > self.config.LOG_CONTENT_MAX_CHARS:
+                content = content[:self.config.LOG_CONTENT_MAX_CHARS] + "..."
+            self.add_log(
+                f"[{status}] {comment_data['user_name']}: {content}",
+                f"[{status}] {comment_data['user_name']}: {comment_data['content']}"
+            )
 
         except Exception as e:
+            self.crawl_stats[3] += 1
             self.add_log(f"处理评论失败: {str(e)}")
 
+    def update_crawl_stats(self, added, updated, duplicate, failed):
+        """接收独立进程模式下的入库统计"""
+        self.crawl_stats = [added, updated, duplicate, failed]
+        self.show_crawl_stats()
+
+    def show_crawl_stats(self):
+        added, updated, duplicate, failed = self.crawl_stats
+        self.stats_label.setText(f"新增 {added} / 更新 {updated} / 重复 {duplicate} / 失败 {failed}")
+
+    def set_crawl_process(self, enabled):
+        """切换是否在独立进程中爬取，从下一次开始爬取时生效"""
+        self.config.CRAWL_PROCESS = enabled
+
+    def update_progress(self, done, total, eta):
+        """显示已完成页数占计划页数的比例和预计剩余时间"""
+        self.show_crawl_stats()
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(min(done, max(total, 1)))
+        if eta < 0:
+            self.eta_label.setText("预计剩余: --")
+        else:
+            minutes, seconds = divmod(int(eta), 60)
+            hours, minutes = divmod(minutes, 60)
+            self.eta_label.setText(f"预计剩余: {hours:d}:{minutes:02d}:{seconds:02d}")
+
+    def handle_likes(self, like_counts):
+        """批量更新一页热门评论的点赞数"""
+        try:
+            updated = self.db_handler.update_like_counts(like_counts)
+            self.add_log(f"本页 {len(like_counts)} 条热门评论中 {updated} 条点赞数有变化")
+        except Exception as e:
+            self.add_log(f"更新点赞数失败: {str(e)}")
+
     def handle_error(self, error_message):
         self.add_log(f"爬取失败: {error_message}")
+        self.log_text.flush()
+        self.set_crawl_buttons(False)
+        # 批量爬取发现的视频时，单个视频失败不打断队列
+        if self.crawl_queue:
+            self.start_next_queued()
+            return
         QMessageBox.critical(self, "错误", f"爬取过程出错: {error_message}")
-        self.start_button.setEnabled(True)
 
     def handle_crawl_finished(self, result):
         try:
@@ -345,28 +832,122 @@ class CrawlPage(QWidget):
             video_id = result.get('video_id')
             total_comments = result.get('total_comments', 0)
 
-            self.add_log(f"爬取完成! 共获取 {total_comments} 条评论")
+            if result.get('mode') == CrawlWorker.MODE_REFRESH_HOT:
+                message = f"共刷新 {total_comments} 条热门评论的点赞数"
+            else:
+                added, updated, duplicate, failed = self.crawl_stats
+                message = (f"共获取 {total_comments} 条评论，"
+                           f"新增 {added} 条，更新 {updated} 条，重复 {duplicate} 条，失败 {failed} 条")
+
+            self.add_log(f"爬取完成! {message}")
+            self.log_text.flush()
+            if self.crawl_queue:
+                return
             QMessageBox.information(
                 self,
                 "成功",
-                f"成功爬取视频 {video_id} 的评论\n共获取 {total_comments} 条评论"
+                f"成功爬取视频 {video_id} 的评论\n{message}"
             )
 
         except Exception as e:
             self.handle_error(str(e))
         finally:
+            self.resume_state = None
+            self.set_crawl_buttons(False)
+            if self.crawl_queue:
+                self.start_next_queued()
 
-            self.start_button.setEnabled(True)
+    def handle_crawl_stopped(self, result):
+        """保存被停止的爬取断点，再次以相同URL和模式开始时从断点继续"""
+        self.resume_state = result
+        self.add_log(f"爬取已停止，已获取 {result['total_comments']} 条评论，"
+                     f"再次开始时将从第 {result['next_page']} 页继续")
+        if self.crawl_queue:
+            self.add_log(f"已取消队列中剩余的 {len(self.crawl_queue)} 个视频")
+            self.crawl_queue.clear()
+        self.log_text.flush()
+        self.set_crawl_buttons(False)
 
-    def start_crawl(self):
-        cookie, _ = self.db_handler.get_valid_cookie()
-        if cookie and self.config.set_cookie(cookie):
-            self.spider = BilibiliSpider(self.config)
+    def set_crawl_buttons(self, crawling):
+        """按爬取状态切换按钮"""
+        self.start_button.setEnabled(not crawling)
+        self.pause_button.setEnabled(crawling)
+        self.pause_button.setText("暂停")
+        self.stop_button.setEnabled(crawling)
+
+    def toggle_pause(self):
+        """暂停或继续当前爬取，暂停期间线程保留已爬取的页码和计数"""
+        if not (self.crawl_worker and self.crawl_worker.is_running):
+            return
+        if self.crawl_worker.is_paused:
+            self.crawl_worker.resume()
+            self.pause_button.setText("暂停")
+            self.add_log("继续爬取")
         else:
+            self.crawl_worker.pause()
+            self.pause_button.setText("继续")
+            self.add_log("已暂停，当前页处理完后暂停")
+
+    def stop_crawl(self):
+        if self.crawl_worker and self.crawl_worker.is_running:
+            self.crawl_worker.stop()
+            self.stop_button.setEnabled(False)
+            self.pause_button.setEnabled(False)
+            self.add_log("正在停止...")
+
+    def shutdown(self):
+        """停止后台线程并等待其退出，关闭主窗口时调用"""
+        timeout = (self.config.REQUEST_CONNECT_TIMEOUT + self.config.REQUEST_READ_TIMEOUT + 1) * 1000
+        self.crawl_queue.clear()
+        for worker in (self.crawl_worker, self.watch_worker, self.discovery_worker, self.resolve_worker):
+            if worker and worker.isRunning():
+                worker.stop()
+                if not worker.wait(int(timeout)):
+                    self.crawl_logger.warning("后台线程未能在超时内退出")
+        self.config.flush_pools()
+
+    def prepare_spider(self):
+        """按当前Cookie准备爬虫，没有有效Cookie时提示设置
+
+        @return {bool} - 爬虫是否可用
+        """
+        # 配置中已有有效Cookie时不再读取数据库
+        if not self.config.has_valid_cookie():
+            cookie, _ = self.db_handler.get_valid_cookie()
+            self.config.set_cookie(cookie)
+
+        if not self.config.has_valid_cookie():
             self.spider = None
+        elif not self.spider or self.spider.profile is not self.config.profile:
+            # 只有Cookie变化时才重建爬虫和Cookie池
+            self.config.load_cookie_pool(
+                self.db_handler.get_cookie_pool(),
+                on_flush=self.db_handler.record_cookie_usage
+            )
+            self.spider = BilibiliSpider(self.config)
 
         if not self.spider:
             QMessageBox.warning(self, "提示", "请先设置Cookie")
+            return False
+        self.load_proxy_pool()
+        return True
+
+    def load_proxy_pool(self):
+        """启用代理池且池为空时从数据库加载，池中的代理全部被淘汰后也会重新读取"""
+        if not self.config.PROXY_ENABLED or len(self.config.proxy_pool):
+            return
+        if not self.db_handler.supports('proxy'):
+            self.add_log(f"{self.db_handler.unsupported_message('proxy')}，不使用代理")
+            return
+        self.config.load_proxy_pool(
+            self.db_handler.get_proxy_pool(),
+            on_flush=self.db_handler.record_proxy_usage
+        )
+        if not len(self.config.proxy_pool):
+            self.add_log("代理池中没有可用的代理，直接发送请求")
+
+    def start_crawl(self):
+        if not self.prepare_spider():
             return
 
         url = self.url_input.text().strip()
@@ -374,14 +955,210 @@ class CrawlPage(QWidget):
             QMessageBox.warning(self, "提示", "请输入视频URL")
             return
 
+        # 上次停止的是同一视频和模式时从断点继续
+        mode = self.mode_combo.currentData()
+        start_page, total_comments = 1, 0
+        state = self.resume_state
+        if state and state['url'] == url and state['mode'] == mode:
+            start_page, total_comments = state['next_page'], state['total_comments']
+        self.resume_state = None
+        self.launch_crawl(url, mode, start_page, total_comments)
+
+    def launch_crawl(self, url, mode, start_page=1, total_comments=0):
+        """创建并启动爬取线程，启用独立进程时改为启动爬取进程"""
         try:
-            self.start_button.setEnabled(False)
-            self.crawl_worker = CrawlWorker(self.spider, url, self.page_spinbox.value())
+            self.set_crawl_buttons(True)
+            self.progress_bar.setValue(0)
+            self.eta_label.setText("预计剩余: --")
+            self.crawl_stats = [0, 0, 0, 0]
+            self.show_crawl_stats()
+            if self.config.CRAWL_PROCESS and self.config.STORAGE_BACKEND != 'duckdb':
+                self.crawl_worker = ProcessCrawlWorker(
+                    self.config,
+                    self.db_handler.db_file,
+                    url,
+                    self.page_spinbox.value(),
+                    mode=mode,
+                    start_page=start_page,
+                    total_comments=total_comments
+                )
+            else:
+                self.crawl_worker = CrawlWorker(
+                    self.spider,
+                    url,
+                    self.page_spinbox.value(),
+                    mode=mode,
+                    db_handler=self.db_handler,
+                    start_page=start_page,
+                    total_comments=total_comments
+                )
             self.crawl_worker.progress.connect(self.add_log)
+            self.crawl_worker.page_progress.connect(self.update_progress)
             self.crawl_worker.error.connect(self.handle_error)
             self.crawl_worker.comment_received.connect(self.handle_comment)
+            self.crawl_worker.likes_received.connect(self.handle_likes)
+            self.crawl_worker.stats_received.connect(self.update_crawl_stats)
             self.crawl_worker.finished.connect(self.handle_crawl_finished)
+            self.crawl_worker.stopped.connect(self.handle_crawl_stopped)
             self.crawl_worker.start()
 
         except Exception as e:
-            self.handle_error(str(e))
\ No newline at end of file
+            self.handle_error(str(e))
+
+    def start_next_queued(self):
+        """爬取队列中的下一个视频，已有爬取任务时等其结束后再继续"""
+        # 结束信号在线程返回前就已发出，以按钮状态而不是isRunning()判断是否空闲
+        if not self.crawl_queue or not self.start_button.isEnabled():
+            return
+        url = self.crawl_queue.popleft()
+        self.url_input.setText(url)
+        self.add_log(f"开始爬取发现的视频 {url}，队列中还剩 {len(self.crawl_queue)} 个")
+        self.launch_crawl(url, self.mode_combo.currentData())
+
+    def update_source_input(self):
+        """按发现来源切换参数输入框的提示"""
+        source = self.source_combo.currentData()
+        self.source_input.setPlaceholderText({
+            VideoDiscovery.SOURCE_UPLOADER: "UP主mid或空间地址",
+            VideoDiscovery.SOURCE_SEARCH: "搜索关键词",
+            VideoDiscovery.SOURCE_POPULAR: "无需参数",
+            VideoDiscovery.SOURCE_RANKING: "分区ID，留空为全站"
+        }[source])
+        self.source_input.setEnabled(source != VideoDiscovery.SOURCE_POPULAR)
+
+    def start_discovery(self):
+        """列出来源中的视频，完成后加入爬取队列"""
+        if self.discovery_worker and self.discovery_worker.isRunning():
+            return
+        if not self.prepare_spider():
+            return
+
+        self.discover_button.setEnabled(False)
+        self.discovery_worker = DiscoveryWorker(
+            self.spider,
+            self.db_handler,
+            self.config,
+            self.source_combo.currentData(),
+            self.source_input.text(),
+            self.listing_spinbox.value()
+        )
+        self.discovery_worker.progress.connect(self.add_log)
+        self.discovery_worker.error.connect(self.handle_discovery_error)
+        self.discovery_worker.videos_found.connect(self.handle_videos_found)
+        self.discovery_worker.finished.connect(lambda: self.discover_button.setEnabled(True))
+        self.discovery_worker.start()
+
+    def handle_discovery_error(self, error_message):
+        self.add_log(f"发现视频失败: {error_message}")
+        QMessageBox.critical(self, "错误", f"发现视频失败: {error_message}")
+
+    def handle_videos_found(self, videos):
+        """将发现的视频加入爬取队列，当前没有爬取任务时立即开始"""
+        queued = set(self.crawl_queue)
+        urls = [f"https://www.bilibili.com/video/{video['video_id']}" for video in videos]
+        self.crawl_queue.extend(url for url in urls if url not in queued)
+        self.add_log(f"{len(videos)} 个视频已加入爬取队列，队列中共 {len(self.crawl_queue)} 个")
+        self.start_next_queued()
+
+    def import_urls(self):
+        """从文本文件导入链接，解析后加入爬取队列"""
+        if self.resolve_worker and self.resolve_worker.isRunning():
+            return
+
+        from PyQt6.QtWidgets import QFileDialog
+        file_path, _ = QFileDialog.getOpenFileName(self, "导入链接", "", "文本文件 (*.txt);;所有文件 (*)")
+        if not file_path:
+            return
+
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}")
+            return
+
+        self.import_button.setEnabled(False)
+        self.add_log(f"正在解析 {len(lines)} 行链接...")
+        self.resolve_worker = ResolveWorker(self.config, self.db_handler, lines)
+        self.resolve_worker.progress.connect(self.add_log)
+        self.resolve_worker.error.connect(self.handle_import_error)
+        self.resolve_worker.resolved.connect(self.handle_urls_resolved)
+        self.resolve_worker.finished.connect(lambda: self.import_button.setEnabled(True))
+        self.resolve_worker.start()
+
+    def handle_import_error(self, error_message):
+        self.add_log(f"解析链接失败: {error_message}")
+        QMessageBox.critical(self, "错误", f"解析链接失败: {error_message}")
+
+    def handle_urls_resolved(self, results):
+        """记录解析失败的行，成功解析的视频去重后加入爬取队列"""
+        report = UrlResolver.format_report(results)
+        if report:
+            for line in report.splitlines():
+                self.add_log(line)
+            failed = sum(1 for result in results if result['error'])
+            QMessageBox.warning(self, "部分链接无法解析", f"{failed} 行解析失败，详见运行日志")
+        self.handle_videos_found([{'video_id': bvid} for bvid in UrlResolver.unique_videos(results)])
+
+    def update_watch_status(self):
+        """刷新监控列表状态显示，存储后端不支持监控列表时禁用监控按钮"""
+        if not self.db_handler.supports('watchlist'):
+            self.watch_status_label.setText(self.db_handler.unsupported_message('watchlist'))
+            self.add_watch_button.setEnabled(False)
+            self.watch_button.setEnabled(False)
+            return
+        try:
+            count = len(self.db_handler.get_watchlist())
+            state = "运行中" if self.watch_worker and self.watch_worker.isRunning() else "未启动"
+            self.watch_status_label.setText(f"监控列表: {count} 个视频 | 监控{state}")
+        except Exception as e:
+            self.watch_status_label.setText(f"监控列表读取失败: {str(e)}")
+
+    def add_to_watchlist(self):
+        """将当前URL对应的视频加入监控列表"""
+        url = self.url_input.text().strip()
+        if not url:
+            QMessageBox.warning(self, "提示", "请输入视频URL")
+            return
+
+        video_id = BilibiliSpider.extract_video_id(url)
+        if not video_id:
+            QMessageBox.warning(self, "提示", "无法从URL中提取视频ID")
+            return
+
+        try:
+            self.db_handler.add_to_watchlist(video_id)
+            self.add_log(f"视频 {video_id} 已加入监控列表")
+            self.update_watch_status()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加入监控列表失败: {str(e)}")
+
+    def toggle_watch(self):
+        """启动或停止监控调度"""
+        if self.watch_worker and self.watch_worker.isRunning():
+            self.watch_worker.stop()
+            self.watch_button.setEnabled(False)
+            return
+
+        cookie, _ = self.db_handler.get_valid_cookie()
+        if not (cookie and self.config.set_cookie(cookie)):
+            QMessageBox.warning(self, "提示", "请先设置Cookie")
+            return
+
+        self.config.load_cookie_pool(
+            self.db_handler.get_cookie_pool(),
+            on_flush=self.db_handler.record_cookie_usage
+        )
+        self.load_proxy_pool()
+        self.watch_worker = WatchWorker(BilibiliSpider(self.config), self.db_handler, self.config)
+        self.watch_worker.progress.connect(self.add_log)
+        self.watch_worker.finished.connect(self.handle_watch_finished)
+        self.watch_worker.start()
+        self.watch_button.setText("停止监控")
+        self.update_watch_status()
+
+    def handle_watch_finished(self):
+        """监控线程结束后恢复按钮状态"""
+        self.watch_button.setText("启动监控")
+        self.watch_button.setEnabled(True)
+        self.update_watch_status()
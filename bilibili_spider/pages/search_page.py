@@ -5,19 +5,30 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation
 from PyQt6.QtGui import QColor, QCursor
 import json
+import threading
+
+from bilibili_spider.utils.storage import QueryCancelled
 
 
 class SearchWorker(QThread):
-    finished = pyqtSignal(list)
-    error = pyqtSignal(str)
+    """在后台执行一次查询，结果和错误都带上发起查询时的代次，界面据此丢弃过期的结果"""
+    finished = pyqtSignal(int, list)
+    error = pyqtSignal(int, str)
 
-    def __init__(self, db_handler, query_type, search_text='', sort_field='publish_time', sort_order='DESC'):
+    def __init__(self, db_handler, query_type, search_text='', sort_field='publish_time', sort_order='DESC',
+                 generation=0):
         super().__init__()
         self.db_handler = db_handler
         self.query_type = query_type
         self.search_text = search_text
         self.sort_field = sort_field
         self.sort_order = sort_order
+        self.generation = generation
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """取消查询，不等待线程结束，数据库中正在执行的语句会被中止"""
+        self.cancel_event.set()
 
     def run(self):
         try:
@@ -27,11 +38,16 @@ class SearchWorker(QThread):
                 batch_size=1000,
                 offset=0,
                 sort_by=self.sort_field,
-                sort_order=self.sort_order
+                sort_order=self.sort_order,
+                cancel_event=self.cancel_event
             )
-            self.finished.emit(results)
+            if not self.cancel_event.is_set():
+                self.finished.emit(self.generation, results)
+        except QueryCancelled:
+            pass
         except Exception as e:
-            self.error.emit(str(e))
+            if not self.cancel_event.is_set():
+                self.error.emit(self.generation, str(e))
 
 class StyledFrame(QFrame):
     def __init__(self, title="", parent=None):
@@ -60,10 +76,19 @@ class StyledFrame(QFrame):
 
 
 class SearchPage(QWidget):
+    # 停止输入多少毫秒后开始搜索
+    SEARCH_DELAY = 300
+
     def __init__(self, db_handler):
         super().__init__()
         self.db_handler = db_handler
         self.search_worker = None
+        self.cancelled_workers = []  # 已取消但线程尚未退出的查询，保留引用直到结束
+        self.search_generation = 0
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.start_search)
         self.sort_field = 'publish_time'
         self.sort_order = 'DESC'
         self.floating_tip = FloatingTip(self)
@@ -186,6 +211,8 @@ class SearchPage(QWidget):
 
         # 连接信号
         self.search_button.clicked.connect(self.start_search)
+        self.search_input.textChanged.connect(self.schedule_search)
+        self.search_input.returnPressed.connect(self.start_search)
         self.search_type.currentIndexChanged.connect(self.on_search_type_changed)
         self.result_table.horizontalHeader().sectionClicked.connect(self.handle_sort_click)
         self.result_table.cellDoubleClicked.connect(self.copy_cell_content)
@@ -284,6 +311,7 @@ class SearchPage(QWidget):
             self.search_input.setPlaceholderText("查看全部评论无需输入搜索内容")
         else:
             self.search_input.setPlaceholderText("请输入搜索内容...")
+        self.schedule_search()
 
     def handle_sort_click(self, column_index):
         sort_mapping = {
@@ -301,20 +329,41 @@ class SearchPage(QWidget):
 
             self.start_search()
 
-    def start_search(self):
-        if hasattr(self, 'search_worker') and self.search_worker:
-            self.search_worker.wait()
-            self.search_worker.deleteLater()
+    def schedule_search(self):
+        """输入变化后重新计时，停止输入SEARCH_DELAY毫秒后才搜索"""
+        self.search_timer.start()
+
+    def cancel_search(self):
+        """取消正在进行的查询，不在界面线程中等待查询线程结束"""
+        self.search_generation += 1
+        self.cancelled_workers = [worker for worker in self.cancelled_workers if worker.isRunning()]
+        if self.search_worker:
+            self.search_worker.cancel()
+            if self.search_worker.isRunning():
+                self.cancelled_workers.append(self.search_worker)
             self.search_worker = None
+        self.search_button.setText("搜索")
+
+    def shutdown(self):
+        """关闭程序时取消查询，已被中止的查询线程很快退出，这里才等待它们"""
+        self.search_timer.stop()
+        self.cancel_search()
+        for worker in self.cancelled_workers:
+            worker.wait()
+        self.cancelled_workers = []
+
+    def start_search(self):
+        self.search_timer.stop()
+        self.cancel_search()
 
         query_type = str(self.search_type.currentIndex() + 1)
         search_text = self.search_input.text().strip()
 
         if query_type != '1' and not search_text:
+            self.result_table.setRowCount(0)
             return
 
-        self.result_table.setRowCount(0)
-        self.search_button.setEnabled(False)
+        # 保留上一次的结果直到新结果到达，边输入边搜索时表格不会闪烁
         self.search_button.setText("正在查询...")
 
         self.search_worker = SearchWorker(
@@ -322,7 +371,8 @@ class SearchPage(QWidget):
             query_type,
             search_text,
             self.sort_field,
-            self.sort_order
+            self.sort_order,
+            self.search_generation
         )
         self.search_worker.finished.connect(self.handle_search_results)
         self.search_worker.error.connect(self.handle_search_error)
@@ -342,11 +392,17 @@ class SearchPage(QWidget):
         label.setTextFormat(Qt.TextFormat.RichText)
         return label
 
-    def handle_search_results(self, results):
+    def handle_search_results(self, generation, results):
+        # 发出后又开始了新的查询，结果已过期
+        if generation != self.search_generation:
+            return
+
         try:
+            self.result_table.setUpdatesEnabled(False)
             self.result_table.setRowCount(0)
-            query_type = str(self.search_type.currentIndex() + 1)
-            search_text = self.search_input.text().strip()
+            # 高亮按发起查询时的条件，输入框此时可能已经改变
+            query_type = self.search_worker.query_type
+            search_text = self.search_worker.search_text
 
             for row_data in results:
                 row = self.result_table.rowCount()
@@ -380,13 +436,14 @@ class SearchPage(QWidget):
                 self.result_table.setRowHeight(row, 40)
 
         except Exception as e:
-            self.handle_search_error(str(e))
+            self.handle_search_error(generation, str(e))
         finally:
-            self.search_button.setEnabled(True)
+            self.result_table.setUpdatesEnabled(True)
             self.search_button.setText("搜索")
 
-    def handle_search_error(self, error_message):
-        self.search_button.setEnabled(True)
+    def handle_search_error(self, generation, error_message):
+        if generation != self.search_generation:
+            return
         self.search_button.setText("搜索")
         QMessageBox.critical(self, "错误", f"搜索失败: {error_message}")
 
@@ -0,0 +1,100 @@
+# bilibili_spider/spiders/cache_replay.py
+
+import logging
+from urllib.parse import urlsplit, parse_qsl
+
+from bilibili_spider.models.comments import Comment
+from bilibili_spider.utils.transfer import loads
+
+
+class CacheReplay:
+    """从响应缓存离线重建评论数据
+
+    先读取缓存的view接口响应建立aid到视频ID和标题的映射，
+    再按抓取时间顺序重新解析所有缓存的评论页并入库，同一评论以最后抓取的版本为准。
+    解析逻辑修改后可以据此重建数据库，不需要重新访问网络。
+    """
+
+    VIEW_PATH = '/x/web-interface/view'
+    REPLY_PATH = '/x/v2/reply'
+
+    def __init__(self, spider, db_handler, cache, on_progress=None):
+        """初始化
+
+        @param {BilibiliSpider} spider - 爬虫实例，用于解析评论
+        @param {DatabaseHandler} db_handler - 数据库处理器
+        @param {ResponseCache} cache - 响应缓存
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        """
+        self.spider = spider
+        self.db_handler = db_handler
+        self.cache = cache
+        self.on_progress = on_progress
+        self.logger = logging.getLogger(__name__)
+
+    def report(self, message):
+        """输出进度信息"""
+        self.logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def load_videos(self):
+        """读取缓存的视频信息
+
+        @return {dict} - aid字符串到(视频ID, 视频标题)的映射
+        """
+        videos = {}
+        for url, body in self.cache.iter_entries(self.VIEW_PATH):
+            try:
+                data = loads(body)['data']
+                videos[str(data['aid'])] = (data['bvid'], data['title'])
+            except (ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"解析缓存的视频信息失败: {url} ({str(e)})")
+        return videos
+
+    def run(self):
+        """重新解析全部缓存的评论页并入库
+
+        @return {dict} - 处理的页数、评论数、新增数、更新数和失败数
+        """
+        videos = self.load_videos()
+        self.report(f"缓存中共有 {len(videos)} 个视频的信息")
+
+        result = {'pages': 0, 'comments': 0, 'added': 0, 'updated': 0, 'failed': 0}
+        for url, body in self.cache.iter_entries(self.REPLY_PATH):
+            try:
+                data = loads(body)
+                replies = data['data'].get('replies') or []
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self.logger.warning(f"解析缓存的评论页失败: {url} ({str(e)})")
+                result['failed'] += 1
+                continue
+
+            oid = dict(parse_qsl(urlsplit(url).query)).get('oid', '')
+            video_id, video_title = videos.get(oid, (f'av{oid}', ''))
+
+            for reply in replies:
+                try:
+                    comment_data = self.spider.parse_reply(reply, video_id, video_title)
+                    status = self.db_handler.save_comment(Comment(**comment_data))
+                except Exception as e:
+                    self.logger.error(f"处理评论数据失败: {str(e)}")
+                    status = 0
+
+                result['comments'] += 1
+                if status == 1:
+                    result['added'] += 1
+                elif status == 2:
+                    result['updated'] += 1
+                elif status == 0:
+                    result['failed'] += 1
+
+            result['pages'] += 1
+            if result['pages'] % 100 == 0:
+                self.report(f"已回放 {result['pages']} 页，{result['comments']} 条评论")
+
+        self.report(
+            f"回放完成: {result['pages']} 页，{result['comments']} 条评论，"
+            f"新增 {result['added']} 条，更新 {result['updated']} 条，失败 {result['failed']} 条"
+        )
+        return result
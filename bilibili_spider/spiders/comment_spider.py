@@ -1,24 +1,62 @@
 # bilibili_spider/spiders/comment_spider.py
 
-import re
 import time
 import random
 import logging
+import threading
 import requests
 from datetime import datetime
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_spider.utils.response_cache import ResponseCache, CacheMiss
+from bilibili_spider.utils.transfer import TransferStats, loads
+from bilibili_spider.utils.http2 import Http2Session
+from bilibili_spider.utils.wbi import mixin_key, key_from_url, sign_params
+from bilibili_spider.utils.video_url import parse_video_url
 
 
 class BilibiliSpider:
     """B站评论爬虫实现类"""
 
+    # 评论排序方式
+    SORT_BY_TIME = 0  # 按时间，最新的在前
+    SORT_BY_LIKE = 1  # 按点赞数
+    SORT_BY_REPLY = 2  # 按回复数
+
+    # 表示触发风控或请求过于频繁的接口返回码
+    RATE_LIMIT_CODES = (-352, -412, -509)
+
+    NAV_URL = 'https://api.bilibili.com/x/web-interface/nav'
+    WBI_KEY_TTL = 6 * 3600  # WBI签名密钥的刷新间隔(秒)，服务端每天更换密钥
+
     def __init__(self, config):
         """初始化爬虫实例
 
         @param {Config} config - 配置对象
         """
         self.headers = config.get_headers()
+        self.profile = config.profile  # 创建时的请求头配置，Cookie变化后需重建爬虫
         self.config = config
+        if config.HTTP_TRANSPORT == 'http2':
+            self.session = Http2Session(config.HTTP2_CONNECTIONS)  # 并发请求在少数连接上多路复用
+        else:
+            self.session = requests.Session()  # 复用连接
+        self.aid_cache = {}  # BV号到aid的缓存，避免每页都请求view接口
+        self.transfer_stats = TransferStats()  # 传输字节数统计
+        self.timeout = (config.REQUEST_CONNECT_TIMEOUT, config.REQUEST_READ_TIMEOUT)
+        self.wbi_key = None  # WBI签名密钥，首次请求需要签名的接口时获取
+        self.wbi_key_time = 0
+        self.wbi_lock = threading.Lock()
+
+        # 响应缓存，回放模式下所有请求只读缓存
+        self.response_cache = ResponseCache.from_config(config)
+        self.offline = bool(self.response_cache and self.response_cache.replay)
+
+        # 按爬虫实例轮换时，整个实例固定使用一个Cookie
+        self.cookie_entry = None
+        if config.COOKIE_ROTATION == 'worker':
+            self.cookie_entry = config.cookie_pool.acquire()
 
         logging.basicConfig(
             level=logging.INFO,
@@ -26,55 +64,259 @@ class BilibiliSpider:
         )
         self.logger = logging.getLogger(__name__)
 
-    def extract_video_id(self, url):
-        """从URL中提取视频ID
+    def request_json(self, url):
+        """发送GET请求并解析JSON，使用Cookie池时记录所用Cookie的健康状况
 
-        @param {string} url - 视频URL
-        @return {string} - 视频ID
+        @param {string} url - 请求地址
+        @return {dict} - 接口返回的JSON数据
+        """
+        if self.offline:
+            return self.response_cache.get_json(url)
+
+        entry = self._acquire_cookie()
+        headers = entry['profile'].headers if entry else self.headers
+        proxy = self._acquire_proxy()
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout,
+                                        proxies=proxy['proxies'] if proxy else None)
+            response.raise_for_status()
+            data = loads(response.content)
+            self.transfer_stats.record(response)
+        except Exception as e:
+            self._report_failure(entry, e, start, proxy)
+            raise
+
+        code = data.get('code')
+        latency = time.perf_counter() - start
+        if entry:
+            self.config.cookie_pool.report(entry, code == 0, latency, code in self.RATE_LIMIT_CODES)
+        if proxy:
+            # 视频不存在等业务错误与代理无关，只有风控算作代理失败
+            rate_limited = code in self.RATE_LIMIT_CODES
+            self.config.proxy_pool.report(proxy, not rate_limited, latency, rate_limited)
+
+        # 只缓存成功的响应，错误和风控响应不应在回放时重现
+        if self.response_cache and data.get('code') == 0:
+            try:
+                self.response_cache.put(url, response.content)
+            except Exception as e:
+                self.logger.warning(f"写入响应缓存失败: {str(e)}")
+        return data
+
+    def request_content(self, url):
+        """发送GET请求并返回原始响应体，用于弹幕分段等非JSON接口
+
+        @param {string} url - 请求地址
+        @return {bytes} - 响应体
         """
-        patterns = [
-            r'BV\w{10}',  # BV号格式
-            r'av\d+'  # av号格式
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group()
-        return None
-
-    def get_api_url(self, video_id, page=1):
+        if self.offline:
+            body = self.response_cache.get(url)
+            if body is None:
+                raise CacheMiss(f"缓存中没有该请求: {url}")
+            return body
+
+        entry = self._acquire_cookie()
+        headers = dict(entry['profile'].headers if entry else self.headers, Accept='*/*')
+        proxy = self._acquire_proxy()
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout,
+                                        proxies=proxy['proxies'] if proxy else None)
+            response.raise_for_status()
+            body = response.content
+            self.transfer_stats.record(response)
+        except Exception as e:
+            self._report_failure(entry, e, start, proxy)
+            raise
+
+        latency = time.perf_counter() - start
+        if entry:
+            self.config.cookie_pool.report(entry, True, latency)
+        if proxy:
+            self.config.proxy_pool.report(proxy, True, latency)
+
+        if self.response_cache:
+            try:
+                self.response_cache.put(url, body)
+            except Exception as e:
+                self.logger.warning(f"写入响应缓存失败: {str(e)}")
+        return body
+
+    def get_wbi_url(self, base_url, params):
+        """生成带WBI签名的请求地址，签名密钥过期时先从nav接口重新获取
+
+        回放模式下不获取密钥，缓存键本身忽略wts和w_rid。
+
+        @param {string} base_url - 不含查询参数的接口地址
+        @param {dict} params - 查询参数
+        @return {string} - 请求地址
+        """
+        with self.wbi_lock:
+            if not self.offline and (self.wbi_key is None or time.monotonic() - self.wbi_key_time > self.WBI_KEY_TTL):
+                # 未登录时nav接口返回-101，但仍包含wbi_img
+                data = self.request_json(self.NAV_URL)
+                wbi_img = (data.get('data') or {}).get('wbi_img')
+                if not wbi_img:
+                    raise ValueError(f"获取WBI签名密钥失败: {data.get('message', '未知错误')}")
+                self.wbi_key = mixin_key(key_from_url(wbi_img['img_url']), key_from_url(wbi_img['sub_url']))
+                self.wbi_key_time = time.monotonic()
+            key = self.wbi_key or ''
+
+        return f'{base_url}?{sign_params(params, key)}'
+
+    def _acquire_cookie(self):
+        """取本次请求使用的Cookie池条目，未使用Cookie池时为None"""
+        entry = self.cookie_entry
+        if entry is None and self.config.COOKIE_ROTATION == 'request':
+            entry = self.config.cookie_pool.acquire()
+        return entry
+
+    def _acquire_proxy(self):
+        """取本次请求使用的代理池条目，未启用代理池或池为空时为None"""
+        if not self.config.PROXY_ENABLED:
+            return None
+        return self.config.proxy_pool.acquire()
+
+    def _report_failure(self, entry, error, start, proxy=None):
+        """向Cookie池和代理池报告一次失败的请求，HTTP 412视为触发风控"""
+        rate_limited = isinstance(error, requests.exceptions.HTTPError) and error.response.status_code == 412
+        latency = time.perf_counter() - start
+        if entry:
+            self.config.cookie_pool.report(entry, False, latency, rate_limited)
+        if proxy:
+            self.config.proxy_pool.report(proxy, False, latency, rate_limited)
+
+    @staticmethod
+    def extract_video_id(url):
+        """从URL中提取视频ID，短链接需要先用UrlResolver解析
+
+        @param {string} url - 视频URL、分享文案、BV号或av号
+        @return {string} - 视频ID，BV号或av开头的av号
+        """
+        parsed = parse_video_url(url)
+        if parsed is None or parsed[0] == 'short':
+            return None
+        kind, value = parsed
+        return value if kind == 'bvid' else f'av{value}'
+
+    def get_api_url(self, video_id, page=1, sort=SORT_BY_REPLY):
         """获取评论API的URL
 
         @param {string} video_id - 视频ID
         @param {int} page - 页码
+        @param {int} sort - 排序方式，见SORT_BY_*常量
         @return {string} - API URL
         """
         if video_id.startswith('BV'):
-            self.logger.info(f"正在处理BV号: {video_id}")
-            try:
-                view_url = f'https://api.bilibili.com/x/web-interface/view?bvid={video_id}'
-                response = requests.get(view_url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
-                if data['code'] == 0:
-                    aid = data['data']['aid']
-                    self.logger.info(f"获取到aid: {aid}")
-                else:
-                    self.logger.error(f"获取aid失败: {data['message']}")
+            aid = self.aid_cache.get(video_id)
+            if aid is None:
+                self.logger.info(f"正在处理BV号: {video_id}")
+                try:
+                    view_url = f'https://api.bilibili.com/x/web-interface/view?bvid={video_id}'
+                    data = self.request_json(view_url)
+                    if data['code'] == 0:
+                        aid = data['data']['aid']
+                        self.aid_cache[video_id] = aid
+                        self.logger.info(f"获取到aid: {aid}")
+                    else:
+                        self.logger.error(f"获取aid失败: {data['message']}")
+                        return None
+                except Exception as e:
+                    self.logger.error(f"转换BV号失败: {str(e)}")
                     return None
-            except Exception as e:
-                self.logger.error(f"转换BV号失败: {str(e)}")
-                return None
         elif video_id.startswith('av'):
             aid = video_id[2:]
         else:
             aid = video_id
 
-        return f'http://api.bilibili.com/x/v2/reply?pn={page}&type=1&oid={aid}&sort=2'
+        return f'http://api.bilibili.com/x/v2/reply?pn={page}&type=1&oid={aid}&sort={sort}'
+
+    def parse_reply(self, reply, video_id, video_title):
+        """将API返回的单条评论转换为评论数据字典
 
-    def crawl_video_comments(self, url, max_pages=10):
-        """爬取视频评论"""
+        @param {dict} reply - API返回的评论对象
+        @param {string} video_id - 视频ID
+        @param {string} video_title - 视频标题
+        @return {dict} - 评论数据
+        """
+        comment_data = {
+            'comment_id': str(reply['rpid']),
+            'video_id': video_id,
+            'video_title': video_title,
+            'user_name': reply['member']['uname'],
+            'user_mid': int(reply.get('mid') or reply['member'].get('mid') or 0) or None,
+            'user_level': reply['member'].get('level_info', {}).get('current_level'),
+            'user_avatar': reply['member'].get('avatar'),
+            'content': reply['content']['message'],
+            'publish_time': datetime.fromtimestamp(
+                reply['ctime']
+            ).strftime('%Y-%m-%d %H:%M:%S'),
+            'like_count': reply['like'],
+            'replies': []
+        }
+
+        # 处理子回复
+        if reply.get('replies'):
+            for sub_reply in reply['replies']:
+                reply_data = {
+                    'user_name': sub_reply['member']['uname'],
+                    'content': sub_reply['content']['message'],
+                    'time': datetime.fromtimestamp(
+                        sub_reply['ctime']
+                    ).strftime('%Y-%m-%d %H:%M:%S')
+                }
+                comment_data['replies'].append(reply_data)
+
+        return comment_data
+
+    def get_video_info(self, video_id):
+        """获取视频基本信息(view接口)
+
+        @param {string} video_id - 视频ID
+        @return {dict} - view接口返回的data字段，包含aid、title、stat等
+        """
+        if video_id.startswith('BV'):
+            view_url = f'https://api.bilibili.com/x/web-interface/view?bvid={video_id}'
+        else:
+            view_url = f'https://api.bilibili.com/x/web-interface/view?aid={video_id.lstrip("av")}'
+
+        data = self.request_json(view_url)
+        if data['code'] != 0:
+            raise ValueError(f"获取视频信息失败: {data.get('message', '未知错误')}")
+
+        self.aid_cache[video_id] = data['data']['aid']
+        return data['data']
+
+    def fetch_reply_page(self, video_id, page=1, sort=SORT_BY_REPLY):
+        """获取一页评论
+
+        @param {string} video_id - 视频ID
+        @param {int} page - 页码
+        @param {int} sort - 排序方式，见SORT_BY_*常量
+        @return {list} - 本页的评论对象列表，没有更多评论时为空列表
+        """
+        api_url = self.get_api_url(video_id, page, sort)
+        if not api_url:
+            raise ValueError(f"无法获取视频 {video_id} 的评论接口")
+
+        data = self.request_json(api_url)
+        if data['code'] != 0:
+            raise ValueError(f"API返回错误: {data.get('message', '未知错误')}")
+
+        return data['data'].get('replies') or []
+
+    def crawl_video_comments(self, url, max_pages=10, stop_event=None):
+        """爬取视频评论
+
+        @param {string} url - 视频URL
+        @param {int} max_pages - 最大页数
+        @param {Event} stop_event - 设置后在当前页结束时停止，页间延迟也会立即结束
+        @return {list} - 评论数据列表
+        """
+        stop_event = stop_event or threading.Event()
         self.logger.info(f"开始爬取视频评论: {url}")
         video_id = self.extract_video_id(url)
         if not video_id:
@@ -89,9 +331,7 @@ class BilibiliSpider:
             else:
                 view_url = f'https://api.bilibili.com/x/web-interface/view?aid={video_id.lstrip("av")}'
 
-            response = requests.get(view_url, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
+            data = self.request_json(view_url)
             if data['code'] == 0:
                 video_title = data['data']['title']
                 self.logger.info(f"获取到视频标题: {video_title}")
@@ -102,7 +342,7 @@ class BilibiliSpider:
         all_comments = []
         current_page = 1
 
-        while current_page <= max_pages:
+        while current_page <= max_pages and not stop_event.is_set():
             try:
                 self.logger.info(f"正在爬取第 {current_page} 页")
 
@@ -110,9 +350,7 @@ class BilibiliSpider:
                 if not api_url:
                     break
 
-                response = requests.get(api_url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
+                data = self.request_json(api_url)
 
                 if data['code'] != 0:
                     self.logger.error(f"API返回错误: {data.get('message', '未知错误')}")
@@ -125,41 +363,18 @@ class BilibiliSpider:
 
                 for reply in replies:
                     try:
-                        comment_data = {
-                            'comment_id': str(reply['rpid']),
-                            'video_id': video_id,
-                            'video_title': video_title,
-                            'user_name': reply['member']['uname'],
-                            'content': reply['content']['message'],
-                            'publish_time': datetime.fromtimestamp(
-                                reply['ctime']
-                            ).strftime('%Y-%m-%d %H:%M:%S'),
-                            'like_count': reply['like'],
-                            'replies': []
-                        }
-
-                        # 处理子回复
-                        if reply.get('replies'):
-                            for sub_reply in reply['replies']:
-                                reply_data = {
-                                    'user_name': sub_reply['member']['uname'],
-                                    'content': sub_reply['content']['message'],
-                                    'time': datetime.fromtimestamp(
-                                        sub_reply['ctime']
-                                    ).strftime('%Y-%m-%d %H:%M:%S')
-                                }
-                                comment_data['replies'].append(reply_data)
-
-                        all_comments.append(comment_data)
+                        all_comments.append(self.parse_reply(reply, video_id, video_title))
                     except Exception as e:
                         self.logger.error(f"处理评论数据失败: {str(e)}")
                         continue
 
                 self.logger.info(f"第 {current_page} 页爬取完成，获取到 {len(replies)} 条评论")
 
-                delay = random.uniform(self.config.DELAY_MIN, self.config.DELAY_MAX)
-                self.logger.debug(f"等待 {delay:.2f} 秒后继续...")
-                time.sleep(delay)
+                if not self.offline:
+                    delay = random.uniform(self.config.DELAY_MIN, self.config.DELAY_MAX)
+                    self.logger.debug(f"等待 {delay:.2f} 秒后继续...")
+                    if stop_event.wait(delay):
+                        break
 
                 current_page += 1
 
@@ -176,15 +391,17 @@ class BilibiliSpider:
         self.logger.info(f"爬取完成，共获取 {len(all_comments)} 条评论")
         return all_comments
 
-    def test_cookie(self):
+    def test_cookie(self, cookie=None):
         """测试Cookie是否有效
 
+        @param {string} cookie - 要测试的Cookie，为空时测试当前配置的Cookie
         @return {bool} - Cookie是否有效
         """
         try:
+            headers = self.headers if cookie is None else self.config.get_profile(cookie).headers
             test_url = 'http://api.bilibili.com/x/web-interface/nav'
-            response = requests.get(test_url, headers=self.headers)
-            data = response.json()
+            response = self.session.get(test_url, headers=headers, timeout=self.timeout)
+            data = loads(response.content)
 
             if data['code'] == 0:
                 user_name = data['data'].get('uname', '')
@@ -196,4 +413,47 @@ class BilibiliSpider:
 
         except Exception as e:
             self.logger.error(f"测试Cookie失败: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def test_proxy(self, proxy_url):
+        """测试代理能否访问接口
+
+        @param {string} proxy_url - 代理地址
+        @return {float} - 请求耗时(秒)，不可用时为None
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.NAV_URL, headers=self.headers, timeout=self.timeout,
+                                        proxies={'http': proxy_url, 'https': proxy_url})
+            response.raise_for_status()
+            loads(response.content)
+            return time.perf_counter() - start
+        except Exception as e:
+            self.logger.warning(f"代理不可用 {proxy_url}: {str(e)}")
+            return None
+
+    def check_proxies(self, records):
+        """并行检测代理是否可用
+
+        @param {list} records - DatabaseHandler.get_proxies()返回的记录
+        @return {dict} - 代理记录ID到请求耗时的映射，不可用的代理为None
+        """
+        if not records:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=self.config.PROXY_CHECK_WORKERS) as executor:
+            results = executor.map(lambda record: self.test_proxy(record['url']), records)
+            return {record['id']: latency for record, latency in zip(records, results)}
+
+    def check_cookie_pool(self, records):
+        """并行检测Cookie池中每个Cookie是否有效
+
+        @param {list} records - DatabaseHandler.get_cookie_pool()返回的记录
+        @return {dict} - Cookie记录ID到是否有效的映射
+        """
+        if not records:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=self.config.COOKIE_CHECK_WORKERS) as executor:
+            results = executor.map(lambda record: self.test_cookie(record['cookie']), records)
+            return {record['id']: valid for record, valid in zip(records, results)}
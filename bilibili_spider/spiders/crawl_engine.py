@@ -0,0 +1,558 @@
+# bilibili_spider/spiders/crawl_engine.py
+
+import math
+import time
+import threading
+import multiprocessing
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_spider.models.comments import Comment
+from bilibili_spider.spiders.watch_scheduler import WatchScheduler
+from bilibili_spider.utils.rate_limit import RateLimiter
+
+
+class CrawlEngine:
+    """单个视频的评论爬取引擎
+
+    先请求第一页确定总页数，完整爬取时其余页在线程池中并发请求并共享同一个速率限制，
+    增量爬取按时间倒序逐页进行，遇到整页都已入库时停止。
+    引擎不依赖界面，评论、点赞数和进度都通过回调交出，可以在界面线程之外或独立进程中运行。
+    """
+
+    # 爬取模式
+    MODE_FULL = 'full'  # 完整爬取
+    MODE_INCREMENTAL = 'incremental'  # 增量爬取，遇到已入库的评论页即停止
+    MODE_REFRESH_HOT = 'refresh_hot'  # 只刷新热门评论的点赞数
+
+    def __init__(self, spider, url, max_pages, mode=MODE_FULL, db_handler=None, start_page=1, total_comments=0,
+                 on_progress=None, on_page_progress=None, on_comment=None, on_likes=None,
+                 stop_event=None, resume_event=None):
+        """初始化
+
+        @param {BilibiliSpider} spider - 爬虫实例
+        @param {string} url - 视频URL
+        @param {int} max_pages - 最多爬取的页数，0表示按评论总数爬取全部页
+        @param {string} mode - 爬取模式，见MODE_*常量
+        @param {DatabaseHandler} db_handler - 数据库处理器，增量模式下用于判断评论是否已入库
+        @param {int} start_page - 从断点继续时的起始页
+        @param {int} total_comments - 已获取的评论数，从断点继续时包含断点之前的数量
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        @param {callable} on_page_progress - 页进度回调，接收已完成页数、计划页数、预计剩余秒数(未知时为-1)
+        @param {callable} on_comment - 评论回调，接收parse_reply()解析出的单条评论
+        @param {callable} on_likes - 点赞数回调，刷新热门评论时接收一页评论ID到点赞数的映射
+        @param {Event} stop_event - 停止事件，跨进程控制时传入multiprocessing.Event
+        @param {Event} resume_event - 继续事件，清除时表示已暂停
+        """
+        self.spider = spider
+        self.url = url
+        self.max_pages = max_pages
+        self.mode = mode
+        self.db_handler = db_handler
+        self.start_page = start_page
+        self.total_comments = total_comments
+        self.on_progress = on_progress
+        self.on_page_progress = on_page_progress
+        self.on_comment = on_comment
+        self.on_likes = on_likes
+        self.stop_event = stop_event or threading.Event()
+        self.resume_event = resume_event or threading.Event()
+        self.resume_event.set()
+
+        config = spider.config
+        self.workers = max(config.CRAWL_WORKERS, 1)
+        self.limiter = RateLimiter(config.CRAWL_INTERVAL_MIN, config.CRAWL_INTERVAL_MAX)
+        self.lock = threading.Lock()
+        self.done_pages = set()
+        self.planned_pages = 0
+        self.started_at = 0
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    @property
+    def is_paused(self):
+        return not self.resume_event.is_set()
+
+    def report(self, message):
+        """输出进度信息"""
+        if self.on_progress:
+            self.on_progress(message)
+
+    def wait_or_stop(self, seconds):
+        """可被stop()打断的等待
+
+        @param {float} seconds - 等待秒数
+        @return {bool} - 是否已被要求停止
+        """
+        return self.stop_event.wait(seconds)
+
+    def checkpoint(self):
+        """每页开始前调用，暂停时在此阻塞，已爬取的页码和计数保留在引擎中
+
+        @return {bool} - 是否已被要求停止
+        """
+        while not self.resume_event.wait(0.2):
+            if self.stop_event.is_set():
+                break
+        return self.stop_event.is_set()
+
+    @staticmethod
+    def plan_pages(page_info, fallback_count=0):
+        """根据评论页的page字段计算总页数
+
+        count为一级评论数，acount还包含楼中楼回复，评论接口按一级评论分页，优先使用count。
+
+        @param {dict} page_info - 评论接口返回的data.page
+        @param {int} fallback_count - page字段缺失时使用的评论数，如view接口的stat.reply
+        @return {int} - 总页数
+        """
+        page_info = page_info or {}
+        size = page_info.get('size') or WatchScheduler.PAGE_SIZE
+        count = page_info.get('count') or page_info.get('acount') or fallback_count
+        return max(math.ceil(count / size), 1)
+
+    def fetch_page(self, video_id, page, sort):
+        """在速率限制内请求一页评论，网络错误时退避重试
+
+        @return {dict} - 接口返回的data字段，被要求停止时为None
+        """
+        retries = 0
+        while True:
+            if self.checkpoint():
+                return None
+            if not self.spider.offline and not self.limiter.acquire(self.stop_event):
+                return None
+
+            api_url = self.spider.get_api_url(video_id, page, sort)
+            if not api_url:
+                raise ValueError(f"无法获取视频 {video_id} 的评论接口")
+
+            try:
+                data = self.spider.request_json(api_url)
+            except requests.exceptions.RequestException as e:
+                # 超时或连接失败时退避重试本页，超过重试次数后放弃，不再原地反复请求
+                retries += 1
+                if retries > self.spider.config.MAX_RETRIES:
+                    raise
+                delay = min(2 ** retries, 30)
+                self.report(
+                    f"第 {page} 页请求失败: {str(e)}，{delay} 秒后重试({retries}/{self.spider.config.MAX_RETRIES})"
+                )
+                if self.wait_or_stop(delay):
+                    return None
+                continue
+
+            if data['code'] != 0:
+                raise ValueError(f"API返回错误: {data.get('message', '未知错误')}")
+            return data['data']
+
+    def handle_replies(self, replies, video_id, video_title):
+        """交出一页评论
+
+        @return {bool} - 增量模式下本页评论是否都已入库
+        """
+        if self.mode == self.MODE_REFRESH_HOT:
+            # 只回传点赞数，由使用方批量更新
+            if self.on_likes:
+                self.on_likes({str(reply['rpid']): reply['like'] for reply in replies})
+            with self.lock:
+                self.total_comments += len(replies)
+            return False
+
+        known_ids = set()
+        if self.mode == self.MODE_INCREMENTAL and self.db_handler:
+            known_ids = self.db_handler.get_existing_comment_ids((reply['rpid'] for reply in replies), video_id)
+
+        count = 0
+        for reply in replies:
+            if str(reply['rpid']) in known_ids:
+                continue
+            if self.on_comment:
+                self.on_comment(self.spider.parse_reply(reply, video_id, video_title))
+            count += 1
+
+        with self.lock:
+            self.total_comments += count
+        return len(known_ids) == len(replies)
+
+    def mark_done(self, page):
+        """记录完成的页并发送进度和预计剩余时间"""
+        with self.lock:
+            self.done_pages.add(page)
+            done = len(self.done_pages)
+            total = max(self.planned_pages, done)
+            total_comments = self.total_comments
+
+        elapsed = time.monotonic() - self.started_at
+        eta = elapsed / done * (total - done) if done else -1
+        if self.on_page_progress:
+            self.on_page_progress(done, total, eta)
+        self.report(f"第 {page} 页完成，已获取 {total_comments} 条评论")
+
+    def crawl_parallel(self, pages, video_id, video_title, sort):
+        """多线程爬取已知范围内的页，所有线程共享同一个速率限制"""
+        page_iter = iter(pages)
+
+        def crawl_loop():
+            while not self.stop_event.is_set():
+                with self.lock:
+                    page = next(page_iter, None)
+                if page is None:
+                    return
+                try:
+                    data = self.fetch_page(video_id, page, sort)
+                    if data is None:
+                        return
+                    self.handle_replies(data.get('replies') or [], video_id, video_title)
+                    self.mark_done(page)
+                except Exception as e:
+                    self.report(f"第 {page} 页爬取失败: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for future in [executor.submit(crawl_loop) for _ in range(self.workers)]:
+                future.result()
+
+    def run(self):
+        """爬取视频评论
+
+        @return {dict} - 爬取结果，含url、video_id、mode、max_pages、next_page(断点)和total_comments，
+                         被要求停止时stopped为True，可据此从next_page继续
+        """
+        current_page = self.start_page
+        video_id = self.spider.extract_video_id(self.url)
+        if not video_id:
+            raise ValueError("无法从URL中提取视频ID")
+
+        # 获取视频标题，stat.reply在评论页缺少page字段时用于估算页数
+        if video_id.startswith('BV'):
+            view_url = f'https://api.bilibili.com/x/web-interface/view?bvid={video_id}'
+        else:
+            view_url = f'https://api.bilibili.com/x/web-interface/view?aid={video_id.lstrip("av")}'
+
+        try:
+            data = self.spider.request_json(view_url)
+        except Exception as e:
+            raise ValueError(f"获取视频标题失败: {str(e)}")
+        if data['code'] != 0:
+            raise ValueError(f"获取视频标题失败: {data.get('message', '未知错误')}")
+        video_title = data['data']['title']
+        reply_count = data['data'].get('stat', {}).get('reply', 0)
+        self.spider.aid_cache[video_id] = data['data']['aid']
+        self.report(f"获取到视频标题: {video_title}")
+
+        sort = {
+            self.MODE_INCREMENTAL: self.spider.SORT_BY_TIME,
+            self.MODE_REFRESH_HOT: self.spider.SORT_BY_LIKE
+        }.get(self.mode, self.spider.SORT_BY_REPLY)
+
+        if current_page > 1:
+            self.report(f"从第 {current_page} 页继续爬取视频 {video_id} 的评论...")
+        else:
+            self.report(f"开始爬取视频 {video_id} 的评论...")
+        transfer_start = self.spider.transfer_stats.snapshot()
+        self.started_at = time.monotonic()
+
+        # 第一页确定总页数
+        data = self.fetch_page(video_id, current_page, sort)
+        last_page = current_page - 1
+        if data is not None:
+            last_page = self.plan_pages(data.get('page'), reply_count)
+            if self.max_pages:
+                last_page = min(last_page, self.max_pages)
+            elif self.mode == self.MODE_REFRESH_HOT:
+                # 只刷新热门评论，不限页数时也不逐页刷新整个视频
+                last_page = min(last_page, current_page + self.spider.config.HOT_REFRESH_PAGES - 1)
+            self.planned_pages = max(last_page - current_page + 1, 1)
+            self.report(f"评论共 {last_page} 页，本次计划爬取第 {current_page}-{last_page} 页")
+
+            replies = data.get('replies') or []
+            all_known = self.handle_replies(replies, video_id, video_title)
+            self.mark_done(current_page)
+
+            if not replies:
+                self.report("没有更多评论了")
+            elif self.mode == self.MODE_INCREMENTAL:
+                # 按时间倒序逐页爬取，整页都已入库说明之后的评论也已入库
+                page = current_page
+                while not all_known and page < last_page:
+                    page += 1
+                    data = self.fetch_page(video_id, page, sort)
+                    if data is None or not data.get('replies'):
+                        break
+                    all_known = self.handle_replies(data['replies'], video_id, video_title)
+                    self.mark_done(page)
+                if all_known:
+                    self.report("本页评论均已入库，增量爬取结束")
+            else:
+                self.crawl_parallel(range(current_page + 1, last_page + 1), video_id, video_title, sort)
+
+        self.spider.config.flush_pools()
+
+        # 断点为第一个未完成的页，之后已完成的页继续时会重新爬取并更新
+        pending = set(range(self.start_page, last_page + 1)) - self.done_pages
+        self.report(f"传输统计: {self.spider.transfer_stats.summary(since=transfer_start)}")
+        if pending and not self.stopped and self.mode != self.MODE_INCREMENTAL:
+            self.report(f"有 {len(pending)} 页未能爬取，最早为第 {min(pending)} 页")
+        return {
+            'url': self.url,
+            'video_id': video_id,
+            'mode': self.mode,
+            'max_pages': self.max_pages,
+            'next_page': min(pending) if pending else last_page + 1,
+            'total_comments': self.total_comments,
+            'stopped': self.stopped
+        }
+
+    def pause(self):
+        """暂停，进行中的页处理完后在下一页开始前阻塞"""
+        self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def stop(self):
+        """要求停止，等待中的延迟立即结束，进行中的请求最长在读取超时后返回"""
+        self.stop_event.set()
+        self.resume_event.set()
+
+
+class CrawlChannel:
+    """爬取进程向界面发送消息的通道
+
+    引擎线程只把消息放入缓冲区，由后台线程按固定间隔合并发送：日志合并为一条消息，
+    页进度和入库统计只保留最新值。无论爬取多快，界面每个间隔最多收到三条消息。
+    评论在爬取进程中直接入库，不经过管道。
+
+    消息均为元组:
+        ('log', [行, ...])
+        ('page', 已完成页数, 计划页数, 预计剩余秒数)
+        ('stats', 新增, 更新, 重复, 失败)
+        ('finished', 结果) / ('stopped', 结果) / ('error', 错误信息)
+    """
+
+    def __init__(self, conn, db_handler, interval):
+        """初始化
+
+        @param {Connection} conn - 管道的发送端
+        @param {DatabaseHandler} db_handler - 爬取进程自己的数据库处理器
+        @param {float} interval - 合并发送的间隔(秒)
+        """
+        self.conn = conn
+        self.db_handler = db_handler
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.logs = []
+        self.page = None
+        self.stats = [0, 0, 0, 0]
+        self.stats_changed = False
+        self.closed = threading.Event()
+        self.sender = threading.Thread(target=self.send_loop, daemon=True)
+        self.sender.start()
+
+    def log(self, message):
+        with self.lock:
+            self.logs.append(message)
+
+    def page_progress(self, done, total, eta):
+        with self.lock:
+            self.page = ('page', done, total, eta)
+
+    def comment(self, comment_data):
+        """保存单条评论，多个引擎线程的写入在此串行进行"""
+        with self.lock:
+            try:
+                result = self.db_handler.save_comment(Comment(**comment_data))
+            except Exception as e:
+                self.logs.append(f"处理评论失败: {str(e)}")
+                result = 0
+            self.stats[{1: 0, 2: 1, 3: 2}.get(result, 3)] += 1
+            self.stats_changed = True
+
+    def likes(self, like_counts):
+        """批量更新一页热门评论的点赞数"""
+        try:
+            updated = self.db_handler.update_like_counts(like_counts)
+            self.log(f"本页 {len(like_counts)} 条热门评论中 {updated} 条点赞数有变化")
+        except Exception as e:
+            self.log(f"更新点赞数失败: {str(e)}")
+
+    def flush(self):
+        """发送缓冲区中的消息"""
+        with self.lock:
+            messages = []
+            if self.logs:
+                messages.append(('log', self.logs))
+                self.logs = []
+            if self.page:
+                messages.append(self.page)
+                self.page = None
+            if self.stats_changed:
+                messages.append(('stats', *self.stats))
+                self.stats_changed = False
+        for message in messages:
+            self.conn.send(message)
+
+    def send_loop(self):
+        while not self.closed.wait(self.interval):
+            self.flush()
+
+    def close(self, message):
+        """停止后台发送，发送剩余消息和最终结果
+
+        @param {tuple} message - 最终消息
+        """
+        self.closed.set()
+        self.sender.join()
+        self.flush()
+        self.conn.send(message)
+        self.conn.close()
+
+
+def run_crawl_process(task, conn, stop_event, resume_event):
+    """爬取进程的入口
+
+    按界面进程传来的配置和Cookie创建自己的爬虫和数据库连接，评论直接在本进程入库。
+
+    @param {dict} task - 爬取任务，见CrawlProcess
+    @param {Connection} conn - 管道的发送端
+    @param {Event} stop_event - 停止事件
+    @param {Event} resume_event - 继续事件
+    """
+    from bilibili_spider.utils.config import Config
+    from bilibili_spider.utils.db_handler import open_database
+    from bilibili_spider.spiders.comment_spider import BilibiliSpider
+
+    channel = None
+    try:
+        config = Config()
+        for name, value in task['config'].items():
+            setattr(config, name, value)
+        db_handler = open_database(config, task['db_file'])
+        if task['cookie']:
+            config.set_cookie(task['cookie'])
+        config.load_cookie_pool(db_handler.get_cookie_pool(), on_flush=db_handler.record_cookie_usage)
+        if config.PROXY_ENABLED and db_handler.supports('proxy'):
+            config.load_proxy_pool(db_handler.get_proxy_pool(), on_flush=db_handler.record_proxy_usage)
+
+        channel = CrawlChannel(conn, db_handler, config.LOG_FLUSH_INTERVAL / 1000)
+        engine = CrawlEngine(
+            BilibiliSpider(config),
+            task['url'],
+            task['max_pages'],
+            mode=task['mode'],
+            db_handler=db_handler,
+            start_page=task['start_page'],
+            total_comments=task['total_comments'],
+            on_progress=channel.log,
+            on_page_progress=channel.page_progress,
+            on_comment=channel.comment,
+            on_likes=channel.likes,
+            stop_event=stop_event,
+            resume_event=resume_event
+        )
+        result = engine.run()
+        message = ('stopped' if result['stopped'] else 'finished', result)
+    except Exception as e:
+        message = ('error', str(e))
+
+    if channel:
+        channel.close(message)
+    else:
+        conn.send(message)
+        conn.close()
+
+
+class CrawlProcess:
+    """在独立进程中运行的爬取任务
+
+    JSON解析、时间格式化和数据库写入都在子进程中完成，不与界面争用GIL；
+    子进程崩溃时只影响本次爬取，界面进程通过管道关闭和退出码得知。
+    使用spawn方式创建子进程，不继承界面进程中的Qt线程和数据库连接。
+    """
+
+    FINAL_MESSAGES = ('finished', 'stopped', 'error')
+
+    def __init__(self, config, db_file, url, max_pages, mode=CrawlEngine.MODE_FULL, start_page=1, total_comments=0):
+        """初始化
+
+        @param {Config} config - 配置对象，其中的大写配置项和当前Cookie传给子进程
+        @param {string} db_file - 主数据库文件路径，子进程按相同配置打开
+        其余参数同CrawlEngine
+        """
+        context = multiprocessing.get_context('spawn')
+        self.task = {
+            'config': {name: value for name, value in vars(config).items() if name.isupper()},
+            'cookie': config.cookie,
+            'db_file': db_file,
+            'url': url,
+            'max_pages': max_pages,
+            'mode': mode,
+            'start_page': start_page,
+            'total_comments': total_comments
+        }
+        self.reader, self.writer = context.Pipe(duplex=False)
+        self.stop_event = context.Event()
+        self.resume_event = context.Event()
+        self.resume_event.set()
+        self.process = context.Process(
+            target=run_crawl_process,
+            args=(self.task, self.writer, self.stop_event, self.resume_event),
+            daemon=True
+        )
+        self.ended = False  # 是否已收到最终消息或发现子进程退出
+
+    def start(self):
+        self.process.start()
+        # 关闭本进程中的发送端，子进程退出后读取端才能收到EOF
+        self.writer.close()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    @property
+    def is_paused(self):
+        return not self.resume_event.is_set()
+
+    def receive(self):
+        """取出管道中已到达的全部消息，不阻塞
+
+        子进程没有发送最终消息就退出时，追加一条error消息。
+
+        @return {list} - 消息列表
+        """
+        messages = []
+        try:
+            while not self.ended and self.reader.poll():
+                message = self.reader.recv()
+                messages.append(message)
+                self.ended = message[0] in self.FINAL_MESSAGES
+        except (EOFError, OSError):
+            self.process.join(1)
+            messages.append(('error', f"爬取进程意外退出，退出码 {self.process.exitcode}"))
+            self.ended = True
+        return messages
+
+    def pause(self):
+        self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.resume_event.set()
+
+    def join(self, timeout=None):
+        """等待子进程退出，超时后强制结束
+
+        @param {float} timeout - 超时秒数
+        @return {bool} - 是否在超时内正常退出
+        """
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+            return False
+        return True
@@ -0,0 +1,145 @@
+# bilibili_spider/spiders/danmaku_spider.py
+
+import math
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bilibili_spider.utils.danmaku import SEGMENT_SECONDS, iter_danmaku
+from bilibili_spider.utils.rate_limit import RateLimiter
+from bilibili_spider.utils.transfer import loads
+
+
+class DanmakuCrawler:
+    """弹幕爬取器
+
+    通过seg.so接口按分段获取每个分P的弹幕，每个分段覆盖6分钟。
+    所有分P的分段在线程池中并发请求，共享同一个速率限制；
+    主线程按完成顺序逐条解码分段，解码结果直接批量写入数据库，不在内存中保留整段弹幕列表。
+    """
+
+    SEGMENT_URL = 'https://api.bilibili.com/x/v2/dm/web/seg.so?type=1&oid={cid}&segment_index={index}'
+
+    def __init__(self, spider, db_handler, config, on_progress=None):
+        """初始化
+
+        @param {BilibiliSpider} spider - 爬虫实例
+        @param {DatabaseHandler} db_handler - 数据库处理器
+        @param {Config} config - 配置对象
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        """
+        self.spider = spider
+        self.db_handler = db_handler
+        self.config = config
+        self.on_progress = on_progress
+        self.workers = max(config.DANMAKU_WORKERS, 1)
+        self.limiter = RateLimiter(config.CRAWL_INTERVAL_MIN, config.CRAWL_INTERVAL_MAX)
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def report(self, message):
+        """输出进度信息"""
+        self.logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def stop(self):
+        """要求停止，等待中的请求许可立即结束"""
+        self.stop_event.set()
+
+    @staticmethod
+    def segment_count(duration):
+        """根据分P时长计算分段数
+
+        @param {int} duration - 分P时长(秒)
+        @return {int} - 分段数
+        """
+        return max(math.ceil((duration or 0) / SEGMENT_SECONDS), 1)
+
+    def get_parts(self, video_id):
+        """获取视频标题和各分P的cid、时长
+
+        @param {string} video_id - 视频ID
+        @return {tuple} - (视频标题, [(cid, 时长秒数, 分P标题), ...])
+        """
+        info = self.spider.get_video_info(video_id)
+        pages = info.get('pages') or [{'cid': info['cid'], 'duration': info.get('duration', 0), 'part': ''}]
+        return info['title'], [(page['cid'], page.get('duration', 0), page.get('part', '')) for page in pages]
+
+    def fetch_segment(self, cid, index):
+        """在速率限制内请求一个分段，网络错误时退避重试
+
+        @param {int} cid - 分P的cid
+        @param {int} index - 分段序号，从1开始
+        @return {bytes} - protobuf编码的分段，被要求停止时为None
+        """
+        url = self.SEGMENT_URL.format(cid=cid, index=index)
+        retries = 0
+        while True:
+            if not self.spider.offline and not self.limiter.acquire(self.stop_event):
+                return None
+
+            try:
+                body = self.spider.request_content(url)
+            except requests.exceptions.RequestException as e:
+                retries += 1
+                if retries > self.config.MAX_RETRIES:
+                    raise
+                delay = min(2 ** retries, 30)
+                self.report(f"分段 {cid}/{index} 请求失败: {str(e)}，{delay} 秒后重试")
+                if self.stop_event.wait(delay):
+                    return None
+                continue
+
+            # 出错时接口返回JSON而不是protobuf，合法的分段不会以'{'开头
+            if body[:1] == b'{':
+                data = loads(body)
+                raise ValueError(f"API返回错误: {data.get('message', '未知错误')}")
+            return body
+
+    def crawl(self, url):
+        """爬取视频全部分P的弹幕并入库
+
+        @param {string} url - 视频URL
+        @return {dict} - 视频ID、分P数、完成的分段数、新增弹幕数和失败的分段数
+        """
+        video_id = self.spider.extract_video_id(url)
+        if not video_id:
+            raise ValueError("无法从URL中提取视频ID")
+
+        title, parts = self.get_parts(video_id)
+        tasks = [(cid, index) for cid, duration, _ in parts for index in range(1, self.segment_count(duration) + 1)]
+        self.report(f"视频 {title} 共 {len(parts)} 个分P，{len(tasks)} 个弹幕分段")
+
+        result = {'video_id': video_id, 'parts': len(parts), 'segments': 0, 'added': 0, 'failed': 0}
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {executor.submit(self.fetch_segment, cid, index): (cid, index) for cid, index in tasks}
+            for future in as_completed(futures):
+                cid, index = futures[future]
+                try:
+                    body = future.result()
+                    if body is None:
+                        continue
+                    added = self.db_handler.save_danmaku(video_id, cid, iter_danmaku(body))
+                except Exception as e:
+                    self.report(f"分段 {cid}/{index} 处理失败: {str(e)}")
+                    result['failed'] += 1
+                    continue
+
+                result['segments'] += 1
+                result['added'] += added
+                self.report(f"分段 {cid}/{index} 完成，新增 {added} 条弹幕 ({result['segments']}/{len(tasks)})")
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.config.flush_pools()
+
+        self.report(
+            f"弹幕爬取完成: {result['segments']}/{len(tasks)} 个分段，"
+            f"新增 {result['added']} 条弹幕，失败 {result['failed']} 个分段"
+        )
+        return result
@@ -0,0 +1,181 @@
+# bilibili_spider/spiders/url_resolver.py
+
+import logging
+import threading
+import requests
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_spider.utils.video_url import SHORT_LINK_HOSTS, parse_video_url, av2bv, bv2av
+
+
+class UrlResolver:
+    """批量视频链接解析器
+
+    先在本地识别每一行输入，能直接得到av号或BV号的不访问网络；
+    短链接先查数据库中的解析缓存，未命中的去重后在线程池中并发跟随跳转，结果写回缓存。
+    所有输入处理完后一次性给出结果，无法识别或解析失败的行带有错误原因。
+    """
+
+    MAX_REDIRECTS = 5
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, config, db_handler=None, on_progress=None, short_hosts=SHORT_LINK_HOSTS):
+        """初始化
+
+        @param {Config} config - 配置对象
+        @param {DatabaseHandler} db_handler - 数据库处理器，用于持久化短链接解析结果，为空或不支持短链接缓存时只在内存中缓存
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        @param {tuple} short_hosts - 短链接域名
+        """
+        self.config = config
+        self.db_handler = db_handler if db_handler is not None and db_handler.supports('short_links') else None
+        self.on_progress = on_progress
+        self.short_hosts = short_hosts
+        self.workers = max(config.URL_RESOLVE_WORKERS, 1)
+        self.timeout = (config.REQUEST_CONNECT_TIMEOUT, config.REQUEST_READ_TIMEOUT)
+
+        # 短链接跳转只需要浏览器标识，不能带上接口域名的Host和Cookie，因此不复用爬虫的会话；
+        # 连接池大小与线程数一致，并发请求时连接不会被丢弃重建
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = config.base_headers['User-Agent']
+        self.memory_cache = {}
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def report(self, message):
+        """输出进度信息"""
+        self.logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def stop(self):
+        """要求停止，尚未开始的短链接不再请求"""
+        self.stop_event.set()
+
+    def follow(self, url):
+        """跟随短链接的跳转，直到得到视频地址
+
+        @param {string} url - 短链接地址
+        @return {string} - BV号
+        """
+        for _ in range(self.MAX_REDIRECTS):
+            response = self.session.get(url, timeout=self.timeout, allow_redirects=False, stream=True)
+            response.close()
+            location = response.headers.get('Location')
+            if response.status_code not in self.REDIRECT_CODES or not location:
+                raise ValueError(f"短链接没有跳转 (HTTP {response.status_code})")
+
+            url = urljoin(url, location)
+            parsed = parse_video_url(url, self.short_hosts)
+            if parsed is None:
+                raise ValueError(f"短链接指向的不是视频: {url}")
+            kind, value = parsed
+            if kind == 'bvid':
+                return value
+            if kind == 'aid':
+                return av2bv(value)
+
+        raise ValueError("短链接跳转次数过多")
+
+    def resolve_short_links(self, urls):
+        """解析一批短链接，先查缓存，其余并发请求
+
+        @param {iterable} urls - 短链接地址
+        @return {dict} - 短链接地址到BV号或异常的映射
+        """
+        pending = [url for url in dict.fromkeys(urls) if url not in self.memory_cache]
+        if pending and self.db_handler is not None:
+            self.memory_cache.update(self.db_handler.get_short_links(pending))
+            pending = [url for url in pending if url not in self.memory_cache]
+
+        results = {}
+        if pending:
+            self.report(f"需要请求 {len(pending)} 个短链接")
+
+            def resolve(url):
+                if self.stop_event.is_set():
+                    return InterruptedError("已停止")
+                try:
+                    return self.follow(url)
+                except requests.exceptions.RequestException as e:
+                    return ValueError(f"请求失败: {str(e)}")
+                except ValueError as e:
+                    return e
+
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+                results = dict(zip(pending, executor.map(resolve, pending)))
+
+            resolved = {url: bvid for url, bvid in results.items() if isinstance(bvid, str)}
+            self.memory_cache.update(resolved)
+            if resolved and self.db_handler is not None:
+                self.db_handler.save_short_links(resolved)
+
+        return {url: results.get(url, self.memory_cache.get(url)) for url in urls}
+
+    def resolve_all(self, lines):
+        """解析一批输入
+
+        @param {iterable} lines - 每行一个链接、分享文案、BV号或av号，空行跳过
+        @return {list} - 结果字典列表，含line(行号，从1开始)、input、bvid、aid、error
+        """
+        self.stop_event.clear()
+        results = []
+        short_links = []
+        for number, line in enumerate(lines, 1):
+            text = line.strip()
+            if not text:
+                continue
+            result = {'line': number, 'input': text, 'bvid': None, 'aid': None, 'error': None}
+            parsed = parse_video_url(text, self.short_hosts)
+            if parsed is None:
+                result['error'] = "无法识别的链接"
+            elif parsed[0] == 'short':
+                result['short'] = parsed[1]
+                short_links.append(parsed[1])
+            elif parsed[0] == 'bvid':
+                result['bvid'] = parsed[1]
+            else:
+                result['bvid'] = av2bv(parsed[1])
+            results.append(result)
+
+        resolved = self.resolve_short_links(short_links) if short_links else {}
+        for result in results:
+            short = result.pop('short', None)
+            if short is not None:
+                value = resolved.get(short)
+                if isinstance(value, str):
+                    result['bvid'] = value
+                else:
+                    result['error'] = str(value)
+            if result['bvid']:
+                result['aid'] = bv2av(result['bvid'])
+
+        failed = sum(1 for result in results if result['error'])
+        self.report(f"共 {len(results)} 行，解析成功 {len(results) - failed} 行，失败 {failed} 行")
+        return results
+
+    @staticmethod
+    def format_report(results):
+        """生成解析失败的汇总报告
+
+        @param {list} results - resolve_all()的返回值
+        @return {string} - 每个失败行一行的报告，没有失败时为空字符串
+        """
+        return '\n'.join(
+            f"第 {result['line']} 行: {result['error']} ({result['input']})"
+            for result in results if result['error']
+        )
+
+    @staticmethod
+    def unique_videos(results):
+        """按首次出现的顺序取出解析成功的视频，同一视频的不同链接只保留一个
+
+        @param {list} results - resolve_all()的返回值
+        @return {list} - BV号列表
+        """
+        return list(dict.fromkeys(result['bvid'] for result in results if result['bvid']))
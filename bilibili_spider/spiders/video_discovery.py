@@ -0,0 +1,190 @@
+# bilibili_spider/spiders/video_discovery.py
+
+import re
+import math
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_spider.utils.rate_limit import RateLimiter
+
+
+class VideoDiscovery:
+    """视频发现
+
+    从UP主空间投稿、关键词搜索结果、热门列表和排行榜中列出视频。
+    先请求第一页确定总页数，其余列表页在线程池中并发请求并共享同一个速率限制，
+    结果按视频ID去重，并跳过已有评论入库的视频，返回的视频可以直接交给爬取流程。
+    """
+
+    # 发现来源
+    SOURCE_UPLOADER = 'uploader'  # UP主空间投稿，参数为mid或空间地址
+    SOURCE_SEARCH = 'search'  # 关键词搜索，参数为关键词
+    SOURCE_POPULAR = 'popular'  # 综合热门，不需要参数
+    SOURCE_RANKING = 'ranking'  # 排行榜，参数为分区ID，为空时为全站
+
+    UPLOADER_URL = 'https://api.bilibili.com/x/space/wbi/arc/search'
+    SEARCH_URL = 'https://api.bilibili.com/x/web-interface/wbi/search/type'
+    POPULAR_URL = 'https://api.bilibili.com/x/web-interface/popular?pn={page}&ps={size}'
+    RANKING_URL = 'https://api.bilibili.com/x/web-interface/ranking/v2?rid={rid}&type=all'
+
+    UPLOADER_PAGE_SIZE = 30
+    POPULAR_PAGE_SIZE = 20
+
+    # 搜索结果标题中的高亮标签
+    HIGHLIGHT_PATTERN = re.compile(r'<[^>]+>')
+
+    def __init__(self, spider, db_handler, config, on_progress=None):
+        """初始化
+
+        @param {BilibiliSpider} spider - 爬虫实例
+        @param {DatabaseHandler} db_handler - 数据库处理器，用于跳过已爬取的视频
+        @param {Config} config - 配置对象
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        """
+        self.spider = spider
+        self.db_handler = db_handler
+        self.config = config
+        self.on_progress = on_progress
+        self.workers = max(config.DISCOVERY_WORKERS, 1)
+        self.limiter = RateLimiter(config.CRAWL_INTERVAL_MIN, config.CRAWL_INTERVAL_MAX)
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def report(self, message):
+        """输出进度信息"""
+        self.logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def stop(self):
+        """要求停止，尚未开始的列表页不再请求"""
+        self.stop_event.set()
+
+    @staticmethod
+    def extract_mid(text):
+        """从mid或空间地址中提取UP主mid
+
+        @param {string} text - mid、space.bilibili.com/<mid>形式的地址
+        @return {string} - mid，无法识别时返回None
+        """
+        text = text.strip()
+        match = re.search(r'space\.bilibili\.com/(\d+)', text) or re.fullmatch(r'(?:UID:?)?(\d+)', text, re.I)
+        return match.group(1) if match else None
+
+    def get_listing_url(self, source, query, page):
+        """生成列表页的请求地址
+
+        @param {string} source - 发现来源，见SOURCE_*常量
+        @param {string} query - 来源参数
+        @param {int} page - 页码
+        @return {string} - 请求地址
+        """
+        if source == self.SOURCE_UPLOADER:
+            mid = self.extract_mid(query)
+            if not mid:
+                raise ValueError(f"无法识别的UP主: {query}")
+            return self.spider.get_wbi_url(self.UPLOADER_URL, {
+                'mid': mid, 'ps': self.UPLOADER_PAGE_SIZE, 'pn': page, 'order': 'pubdate'
+            })
+        if source == self.SOURCE_SEARCH:
+            if not query.strip():
+                raise ValueError("请输入搜索关键词")
+            return self.spider.get_wbi_url(self.SEARCH_URL, {
+                'search_type': 'video', 'keyword': query.strip(), 'page': page
+            })
+        if source == self.SOURCE_POPULAR:
+            return self.POPULAR_URL.format(page=page, size=self.POPULAR_PAGE_SIZE)
+        if source == self.SOURCE_RANKING:
+            return self.RANKING_URL.format(rid=query.strip() or 0)
+        raise ValueError(f"不支持的发现来源: {source}")
+
+    def parse_listing(self, source, data):
+        """解析列表页
+
+        @param {string} source - 发现来源
+        @param {dict} data - 接口返回的data字段
+        @return {tuple} - (视频列表, 总页数)，视频为含video_id、title、reply_count的字典，总页数未知时为None
+        """
+        if source == self.SOURCE_UPLOADER:
+            items = (data.get('list') or {}).get('vlist') or []
+            videos = [{'video_id': item['bvid'], 'title': item['title'], 'reply_count': item.get('comment', 0)}
+                      for item in items]
+            count = (data.get('page') or {}).get('count', 0)
+            return videos, max(math.ceil(count / self.UPLOADER_PAGE_SIZE), 1)
+
+        if source == self.SOURCE_SEARCH:
+            items = [item for item in data.get('result') or [] if item.get('bvid')]
+            videos = [{'video_id': item['bvid'], 'title': self.HIGHLIGHT_PATTERN.sub('', item['title']),
+                       'reply_count': item.get('review', 0)} for item in items]
+            return videos, max(data.get('numPages') or 1, 1)
+
+        # 热门和排行榜的条目格式与view接口一致
+        videos = [{'video_id': item['bvid'], 'title': item['title'],
+                   'reply_count': (item.get('stat') or {}).get('reply', 0)} for item in data.get('list') or []]
+        if source == self.SOURCE_RANKING:
+            return videos, 1
+        return videos, 1 if data.get('no_more') else None
+
+    def fetch_listing(self, source, query, page):
+        """在速率限制内请求并解析一个列表页
+
+        @return {tuple} - 同parse_listing，被要求停止时为None
+        """
+        if not self.spider.offline and not self.limiter.acquire(self.stop_event):
+            return None
+
+        data = self.spider.request_json(self.get_listing_url(source, query, page))
+        if data['code'] != 0:
+            raise ValueError(f"API返回错误: {data.get('message', '未知错误')}")
+        return self.parse_listing(source, data['data'] or {})
+
+    def discover(self, source, query='', max_pages=0, skip_crawled=True):
+        """列出来源中的视频
+
+        @param {string} source - 发现来源，见SOURCE_*常量
+        @param {string} query - 来源参数
+        @param {int} max_pages - 最多获取的列表页数，0表示全部
+        @param {bool} skip_crawled - 是否跳过已有评论入库的视频
+        @return {list} - 视频字典列表，保持列表中的顺序
+        """
+        self.stop_event.clear()
+        first = self.fetch_listing(source, query, 1)
+        if first is None:
+            return []
+        videos, total_pages = first
+        if total_pages is None:
+            total_pages = self.config.DISCOVERY_POPULAR_PAGES
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        self.report(f"第 1 页获取到 {len(videos)} 个视频，共 {total_pages} 页")
+
+        pages = [videos]
+        if total_pages > 1:
+            def fetch(page):
+                try:
+                    result = self.fetch_listing(source, query, page)
+                except Exception as e:
+                    self.report(f"列表第 {page} 页获取失败: {str(e)}")
+                    return []
+                return result[0] if result else []
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pages.extend(executor.map(fetch, range(2, total_pages + 1)))
+        self.config.flush_pools()
+
+        # 同一视频可能出现在多页中，如翻页期间列表发生了变化
+        unique = {}
+        for page_videos in pages:
+            for video in page_videos:
+                unique.setdefault(video['video_id'], video)
+        result = list(unique.values())
+
+        skipped = 0
+        if skip_crawled and result:
+            crawled = self.db_handler.get_existing_video_ids(unique)
+            skipped = len(crawled)
+            result = [video for video in result if video['video_id'] not in crawled]
+
+        self.report(f"共发现 {len(unique)} 个视频，跳过已爬取的 {skipped} 个，待爬取 {len(result)} 个")
+        return result
@@ -0,0 +1,293 @@
+# bilibili_spider/spiders/watch_scheduler.py
+
+import math
+import logging
+import threading
+from datetime import datetime
+
+from bilibili_spider.models.comments import Comment
+from bilibili_spider.utils.rate_limit import RateLimiter
+
+
+class WatchScheduler:
+    """监控列表调度器
+
+    按每个视频的评论增长速度自适应调整检查间隔，
+    每轮检查在到期视频之间分配有限的爬取页数预算。
+    视频信息和评论页的所有请求都经过同一个速率限制，与爬取页面的请求间隔一致。
+    """
+
+    PAGE_SIZE = 20  # 评论接口每页评论数
+
+    def __init__(self, spider, db_handler, config, on_progress=None):
+        """初始化调度器
+
+        @param {BilibiliSpider} spider - 爬虫实例
+        @param {DatabaseHandler} db_handler - 数据库处理器
+        @param {Config} config - 配置对象
+        @param {callable} on_progress - 进度回调，接收一条字符串消息
+        """
+        self.spider = spider
+        self.db_handler = db_handler
+        self.config = config
+        self.on_progress = on_progress
+        self.stop_event = threading.Event()
+        self.limiter = RateLimiter(config.CRAWL_INTERVAL_MIN, config.CRAWL_INTERVAL_MAX)
+        self.logger = logging.getLogger(__name__)
+
+    def report(self, message):
+        """输出进度信息"""
+        self.logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def wait(self, seconds):
+        """可被stop()打断的等待
+
+        @param {float} seconds - 等待秒数
+        @return {bool} - 是否已被要求停止
+        """
+        return self.stop_event.wait(seconds)
+
+    def stop(self):
+        """停止调度"""
+        self.stop_event.set()
+
+    def throttle(self):
+        """等待下一个请求许可，回放模式不访问网络，无需等待
+
+        @return {bool} - 是否可以发送请求，被要求停止时为False
+        """
+        return self.spider.offline or self.limiter.acquire(self.stop_event)
+
+    def compute_interval(self, growth_rate):
+        """根据评论增长速度计算下次检查间隔
+
+        间隔取新增约一页评论所需的时间，并限制在配置的上下限之间。
+
+        @param {float} growth_rate - 评论增长速度(条/小时)
+        @return {int} - 检查间隔(分钟)
+        """
+        if growth_rate <= 0:
+            return self.config.WATCH_MAX_INTERVAL
+
+        interval = self.PAGE_SIZE / growth_rate * 60
+        return int(min(max(interval, self.config.WATCH_MIN_INTERVAL), self.config.WATCH_MAX_INTERVAL))
+
+    def allocate_budget(self, demands, budget):
+        """在视频之间分配页数预算
+
+        预算足够时每个视频至少分到一页，剩余预算按需求比例分配，单个视频不超过其需求。
+        预算少于视频数时，需求最大(新增评论最多)的budget个视频各分到一页，其余分到0页，留到下一轮。
+
+        @param {dict} demands - 视频ID到所需页数的映射
+        @param {int} budget - 本轮总页数预算
+        @return {dict} - 视频ID到分配页数的映射
+        """
+        if budget < len(demands):
+            served = set(sorted(demands, key=demands.get, reverse=True)[:max(budget, 0)])
+            return {video_id: 1 if video_id in served else 0 for video_id in demands}
+
+        allocation = {video_id: 1 for video_id in demands}
+        remaining = budget - len(demands)
+        total_extra = sum(max(demand - 1, 0) for demand in demands.values())
+
+        if remaining > 0 and total_extra > 0:
+            for video_id, demand in demands.items():
+                extra = max(demand - 1, 0)
+                allocation[video_id] += min(extra, remaining * extra // total_extra)
+
+        return allocation
+
+    def check_video(self, item):
+        """读取视频当前评论数并计算增长速度，监控状态在爬取之后再写入
+
+        @param {dict} item - 监控记录
+        @return {tuple} - (视频标题, 当前评论数, 新增评论数, 增长速度)，被要求停止时为None
+        """
+        if not self.throttle():
+            return None
+        info = self.spider.get_video_info(item['video_id'])
+        reply_count = info['stat']['reply']
+        new_replies = max(reply_count - item['reply_count'], 0)
+
+        if item['last_check_time']:
+            last_check = datetime.strptime(item['last_check_time'], '%Y-%m-%d %H:%M:%S')
+            hours = max((datetime.now() - last_check).total_seconds() / 3600, 1 / 60)
+            # 用指数平滑降低单次波动的影响
+            growth_rate = 0.5 * new_replies / hours + 0.5 * item['growth_rate']
+        else:
+            # 首次检查时用发布以来的平均增长速度，新视频不必等一个最长间隔后才开始自适应
+            hours = max((datetime.now() - datetime.fromtimestamp(info['pubdate'])).total_seconds() / 3600, 1 / 60)
+            growth_rate = reply_count / hours
+
+        return info['title'], reply_count, new_replies, growth_rate
+
+    def crawl_video(self, video_id, video_title, max_pages, backlog=(), new_replies=0):
+        """增量爬取视频的新评论，并记录已有评论的点赞数变化
+
+        按发布时间倒序从第一页读到评论全部已入库的一页为止，再依次读取积压的区间。
+        页数用完时没读到的部分记为积压，积压项含before(区间内评论的发布时间早于该时间戳)、
+        page(从该页开始读)和pages(估计的剩余页数)。读积压时跳过评论全部不早于before的页，
+        遇到评论全部已入库且有早于before的评论的一页时该区间读完。
+        之前记录的积压页码按本轮最新一段中读到的新评论数后移，少估时只会多读几页而不会漏读。
+
+        @param {string} video_id - 视频ID
+        @param {string} video_title - 视频标题
+        @param {int} max_pages - 最多爬取的页数
+        @param {list} backlog - 上次检查留下的积压，按before降序
+        @param {int} new_replies - 本次检查发现的新增评论数，用于估计积压的页数
+        @return {tuple} - (新增评论数, 实际使用的页数, 剩余的积压)
+        """
+        new_comments = 0
+        pages_used = 0
+        arrivals = 0
+        segments = [{'before': None, 'page': 1, 'pages': math.ceil(new_replies / self.PAGE_SIZE)}] + list(backlog)
+        remaining = []
+
+        for index, segment in enumerate(segments):
+            page = segment['page'] + (arrivals // self.PAGE_SIZE if index else 0)
+            before = segment['before']
+            pages_read = 0
+            finished = False
+
+            while pages_used < max_pages and self.throttle():
+                replies = self.spider.fetch_reply_page(video_id, page, self.spider.SORT_BY_TIME)
+                pages_used += 1
+                pages_read += 1
+                page += 1
+                if not replies:
+                    finished = True
+                    break
+
+                known_ids = self.db_handler.get_existing_comment_ids((reply['rpid'] for reply in replies), video_id)
+                for reply in replies:
+                    if str(reply['rpid']) in known_ids:
+                        continue
+                    comment_data = self.spider.parse_reply(reply, video_id, video_title)
+                    if self.db_handler.save_comment(Comment(**comment_data)) == 1:
+                        new_comments += 1
+                if not index:
+                    arrivals += len(replies) - len(known_ids)
+
+                self.db_handler.update_like_counts(
+                    {str(reply['rpid']): reply['like'] for reply in replies if str(reply['rpid']) in known_ids},
+                    record_history=True
+                )
+
+                oldest = min(reply['ctime'] for reply in replies)
+                if before is None or oldest < before:
+                    if len(known_ids) == len(replies):
+                        finished = True
+                        break
+                    before = oldest
+
+            if not finished:
+                # 最新一段一页都没读时新评论下次检查还会从第一页读到，不必记为积压
+                if index or pages_read:
+                    remaining.append({'before': before, 'page': page, 'pages': max(segment['pages'] - pages_read, 1)})
+                remaining.extend(
+                    dict(gap, page=gap['page'] + arrivals // self.PAGE_SIZE) for gap in segments[index + 1:]
+                )
+                break
+
+        # 热门评论的点赞数变化最快，每次检查额外刷新一页
+        if pages_used < max_pages and self.throttle():
+            replies = self.spider.fetch_reply_page(video_id, 1, self.spider.SORT_BY_LIKE)
+            pages_used += 1
+            self.db_handler.update_like_counts(
+                {str(reply['rpid']): reply['like'] for reply in replies},
+                record_history=True
+            )
+
+        return new_comments, pages_used, remaining
+
+    def run_once(self):
+        """检查所有到期的视频
+
+        监控状态在爬取之后写入。没分到页数的视频不更新状态，保持到期留到下一轮；
+        还有积压的视频按最短间隔安排下次检查，直到积压读完。
+
+        @return {int} - 本轮使用的页数
+        """
+        due_items = self.db_handler.get_watchlist(due_only=True)
+        if not due_items:
+            return 0
+
+        # 每个视频至少需要一页，超出预算的视频不检查，保持到期状态留到下一轮，
+        # 列表按下次检查时间升序，逾期最久的视频优先
+        budget = self.config.WATCH_PAGE_BUDGET
+        if len(due_items) > budget:
+            self.report(f"本轮有 {len(due_items)} 个视频需要检查，超出页数预算，先检查逾期最久的 {budget} 个")
+            due_items = due_items[:budget]
+        else:
+            self.report(f"本轮有 {len(due_items)} 个视频需要检查")
+
+        checked = []
+        for item in due_items:
+            try:
+                result = self.check_video(item)
+                if result is None:
+                    return 0
+                checked.append((item, *result))
+            except Exception as e:
+                self.report(f"检查视频 {item['video_id']} 失败: {str(e)}")
+
+        demands = {
+            item['video_id']: math.ceil(new_replies / self.PAGE_SIZE) + 1 + sum(gap['pages'] for gap in item['backlog'])
+            for item, _, _, new_replies, _ in checked
+        }
+        allocation = self.allocate_budget(demands, budget)
+
+        total_pages = 0
+        for item, video_title, reply_count, new_replies, growth_rate in checked:
+            video_id = item['video_id']
+            if self.stop_event.is_set():
+                break
+            if not allocation[video_id]:
+                continue
+            try:
+                new_comments, pages_used, backlog = self.crawl_video(
+                    video_id, video_title, allocation[video_id], item['backlog'], new_replies
+                )
+                total_pages += pages_used
+                message = f"视频 {video_id}: 新增 {new_comments} 条评论，使用 {pages_used} 页"
+                if backlog:
+                    message += f"，还有约 {sum(gap['pages'] for gap in backlog)} 页积压留到下次检查"
+                self.report(message)
+            except Exception as e:
+                # 爬取失败时积压不变，按正常间隔重试
+                self.report(f"爬取视频 {video_id} 失败: {str(e)}")
+                backlog = item['backlog']
+
+            interval = self.config.WATCH_MIN_INTERVAL if backlog else self.compute_interval(growth_rate)
+            self.db_handler.update_watch_status(video_id, video_title, reply_count, growth_rate, interval, backlog)
+
+        return total_pages
+
+    def seconds_until_next_check(self):
+        """距最近一个视频到期的秒数"""
+        items = self.db_handler.get_watchlist()
+        if not items:
+            return self.config.WATCH_MAX_INTERVAL * 60
+
+        next_check = datetime.strptime(items[0]['next_check_time'], '%Y-%m-%d %H:%M:%S')
+        return max((next_check - datetime.now()).total_seconds(), 0)
+
+    def run_forever(self):
+        """持续调度，直到stop()被调用"""
+        self.stop_event.clear()
+        self.report("监控调度已启动")
+
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.report(f"监控调度出错: {str(e)}")
+            self.config.flush_pools()
+
+            # 最多等待一分钟，以便及时发现新加入的视频
+            if self.wait(min(max(self.seconds_until_next_check(), 1), 60)):
+                break
+
+        self.report("监控调度已停止")
@@ -0,0 +1,212 @@
+# bilibili_spider/utils/analytics.py
+
+"""评论分析工具
+
+分块读取评论表，在进程池中并行完成分词、关键词统计和情感打分，
+结果写回数据库中的汇总表。读取和提交任务都有上限，内存占用与评论总数无关。
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# 未安装jieba时退回到按字的二元切分
+try:
+    import jieba
+except ImportError:
+    jieba = None
+
+WORD_PATTERN = re.compile(r'[一-鿿]+|[a-zA-Z]{2,}|\d{2,}')
+EMOTE_PATTERN = re.compile(r'\[[^\[\]]{1,10}\]')  # B站表情，如[笑哭]
+CJK_PATTERN = re.compile(r'^[一-鿿]+$')
+
+STOPWORDS = {
+    '的', '了', '是', '我', '你', '他', '她', '它', '们', '这', '那', '就', '都', '也', '还',
+    '在', '有', '和', '与', '吗', '吧', '啊', '呢', '哦', '嗯', '呀', '不', '没', '很', '又',
+    '一个', '这个', '那个', '什么', '怎么', '可以', '没有', '就是', '还是', '但是', '因为',
+    '所以', '如果', '自己', '我们', '你们', '他们', '回复', '一下', '真的', '感觉', '已经'
+}
+
+POSITIVE_WORDS = {
+    '好', '棒', '赞', '爱', '喜欢', '支持', '厉害', '牛', '感动', '优秀', '好看', '好听', '可爱',
+    '有趣', '精彩', '感谢', '谢谢', '加油', '哈哈', '哈哈哈', '开心', '温柔', '神作', '绝了',
+    '[笑哭]', '[给心心]', '[点赞]', '[星星眼]', '[支持]', '[打call]', '[喜欢]', '[爱心]'
+}
+
+NEGATIVE_WORDS = {
+    '差', '烂', '垃圾', '恶心', '失望', '难看', '难听', '无聊', '讨厌', '骗', '退钱', '尴尬',
+    '生气', '难过', '可惜', '离谱', '辣鸡', '拉胯', '无语', '崩', '烦', '吐了', '智障',
+    '[生气]', '[无语]', '[大哭]', '[吐]', '[难过]', '[怒]', '[嫌弃]'
+}
+
+
+def tokenize(text):
+    """将评论切分为词语
+
+    @param {string} text - 评论内容
+    @return {list} - 词语列表，B站表情作为单独的词保留
+    """
+    words = EMOTE_PATTERN.findall(text)
+    text = EMOTE_PATTERN.sub(' ', text)
+
+    if jieba is not None:
+        words.extend(word for word in jieba.lcut(text) if WORD_PATTERN.fullmatch(word))
+    else:
+        for segment in WORD_PATTERN.findall(text):
+            if CJK_PATTERN.match(segment) and len(segment) > 2:
+                words.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+            else:
+                words.append(segment)
+
+    return [word for word in words if word not in STOPWORDS and len(word) > 1]
+
+
+def sentiment_score(words):
+    """基于词典计算情感得分
+
+    @param {list} words - 词语列表
+    @return {float} - 得分，范围-1到1，没有情感词时为0
+    """
+    positive = sum(1 for word in words if word in POSITIVE_WORDS)
+    negative = sum(1 for word in words if word in NEGATIVE_WORDS)
+    if positive + negative == 0:
+        return 0.0
+    return (positive - negative) / (positive + negative)
+
+
+def analyze_chunk(rows):
+    """分析一块评论，在子进程中运行
+
+    @param {list} rows - (video_id, content)元组列表
+    @return {tuple} - (各视频词频, 各视频情感统计[评论数, 得分和, 正面数, 负面数])
+    """
+    keywords = defaultdict(Counter)
+    sentiment = defaultdict(lambda: [0, 0.0, 0, 0])
+
+    for video_id, content in rows:
+        words = tokenize(content or '')
+        keywords[video_id].update(words)
+
+        score = sentiment_score(words)
+        stats = sentiment[video_id]
+        stats[0] += 1
+        stats[1] += score
+        if score > 0:
+            stats[2] += 1
+        elif score < 0:
+            stats[3] += 1
+
+    return dict(keywords), dict(sentiment)
+
+
+def _init_worker():
+    """子进程初始化，提前加载分词词典"""
+    if jieba is not None:
+        jieba.setLogLevel(logging.WARNING)
+        jieba.initialize()
+
+
+class CommentAnalyzer:
+    """评论分析器"""
+
+    def __init__(self, db_handler, config, on_progress=None):
+        """初始化分析器
+
+        @param {DatabaseHandler} db_handler - 数据库处理器
+        @param {Config} config - 配置对象
+        @param {callable} on_progress - 进度回调，接收已处理评论数和评论总数
+        """
+        self.db_handler = db_handler
+        self.config = config
+        self.on_progress = on_progress
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger('BilibiliSpider')
+
+    def stop(self):
+        """要求停止，不再提交新的分块，已在子进程中运行的分块完成后退出，结果不写入数据库"""
+        self.stop_event.set()
+
+    def prune(self, counter):
+        """词频表过大时只保留高频词，限制内存占用"""
+        if len(counter) > self.config.ANALYTICS_MAX_WORDS:
+            return Counter(dict(counter.most_common(self.config.ANALYTICS_MAX_WORDS // 2)))
+        return counter
+
+    def merge(self, result, keywords, sentiment):
+        """合并一块的分析结果"""
+        chunk_keywords, chunk_sentiment = result
+        for video_id, counter in chunk_keywords.items():
+            keywords[''].update(counter)
+            keywords[video_id].update(counter)
+            keywords[video_id] = self.prune(keywords[video_id])
+        keywords[''] = self.prune(keywords[''])
+
+        for video_id, stats in chunk_sentiment.items():
+            total = sentiment[video_id]
+            for i, value in enumerate(stats):
+                total[i] += value
+
+    def run(self):
+        """分析全部评论并写入汇总表
+
+        @return {int} - 分析的评论数
+        """
+        if not self.db_handler.supports('analytics'):
+            raise NotImplementedError(self.db_handler.unsupported_message('analytics'))
+
+        total = self.db_handler.get_statistics()['total_comments']
+        max_workers = self.config.ANALYTICS_WORKERS or os.cpu_count() or 1
+        max_pending = max_workers * 2
+
+        keywords = defaultdict(Counter)  # 视频ID到词频，空字符串表示全部视频
+        sentiment = defaultdict(lambda: [0, 0.0, 0, 0])
+        processed = 0
+
+        self.logger.info(f"开始分析 {total} 条评论，使用 {max_workers} 个进程")
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            pending = {}
+            chunks = self.db_handler.iter_comment_chunks(
+                ['video_id', 'content'], self.config.ANALYTICS_CHUNK_SIZE
+            )
+
+            for rows in chunks:
+                # 提交中的任务数有上限，避免一次性读入全部评论
+                while len(pending) >= max_pending and not self.stop_event.is_set():
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        processed += pending.pop(future)
+                        self.merge(future.result(), keywords, sentiment)
+                    if self.on_progress:
+                        self.on_progress(processed, total)
+
+                if self.stop_event.is_set():
+                    break
+                pending[executor.submit(analyze_chunk, rows)] = len(rows)
+
+            for future in list(pending):
+                # 停止时取消尚未开始的分块，退出with时只等待已在运行的分块
+                if self.stop_event.is_set():
+                    future.cancel()
+                    continue
+                processed += pending.pop(future)
+                self.merge(future.result(), keywords, sentiment)
+                if self.on_progress:
+                    self.on_progress(processed, total)
+
+        if self.stop_event.is_set():
+            self.logger.info(f"评论分析已停止，已分析 {processed} 条评论，结果未保存")
+            return processed
+
+        top_keywords = {
+            video_id: counter.most_common(self.config.ANALYTICS_TOP_KEYWORDS)
+            for video_id, counter in keywords.items()
+        }
+        self.db_handler.save_analytics(top_keywords, sentiment)
+        self.db_handler.refresh_user_activity()
+
+        self.logger.info(f"评论分析完成，共分析 {processed} 条评论")
+        return processed
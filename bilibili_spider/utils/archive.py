@@ -0,0 +1,99 @@
+# bilibili_spider/utils/archive.py
+
+"""冷评论归档页的编码
+
+归档页按列存放同一视频的一批评论: 各列的值先分别序列化，再整体压缩，
+同一列中相近的值相邻存放，压缩率比逐行存放高。
+安装zstandard时用zstd压缩，否则退回到zlib，每页记录自己的编码方式，
+两种页可以混合存在。
+"""
+
+import json
+import zlib
+import threading
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 归档页保存的列，顺序即解码后行元组的顺序，新增的列只能追加在末尾
+ARCHIVE_COLUMNS = [
+    'video_id', 'video_title', 'comment_id', 'user_name', 'content',
+    'publish_time', 'like_count', 'replies', 'create_time', 'update_time', 'user_mid'
+]
+
+
+def encode_page(rows, level=10):
+    """将一批评论编码为压缩的列式归档页
+
+    @param {list} rows - 与ARCHIVE_COLUMNS顺序一致的行元组列表
+    @param {int} level - 压缩级别
+    @return {tuple} - (编码方式, 压缩数据, 压缩前字节数)
+    """
+    columns = {name: [row[index] for row in rows] for index, name in enumerate(ARCHIVE_COLUMNS)}
+    raw = json.dumps(columns, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=level).compress(raw), len(raw)
+    return 'zlib', zlib.compress(raw, min(level, 9)), len(raw)
+
+
+def decode_page(codec, data):
+    """解码归档页
+
+    @param {string} codec - 编码方式
+    @param {bytes} data - 压缩数据
+    @return {list} - 与ARCHIVE_COLUMNS顺序一致的行元组列表
+    """
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("读取zstd归档页需要安装zstandard: pip install zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = zlib.decompress(data)
+    columns = json.loads(raw)
+    # 旧版本的页缺少后来追加的列，以None补齐
+    row_count = len(columns['comment_id'])
+    return list(zip(*(columns.get(name, [None] * row_count) for name in ARCHIVE_COLUMNS)))
+
+
+class PageCache:
+    """已解码归档页的LRU缓存，翻页和重复搜索时避免重复解压"""
+
+    def __init__(self, max_pages=64):
+        """初始化
+
+        @param {int} max_pages - 最多缓存的页数
+        """
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_id, loader):
+        """获取已解码的页，未缓存时调用loader解码
+
+        @param {int} page_id - 归档页ID
+        @param {callable} loader - 返回解码后行列表的函数
+        @return {list} - 行元组列表
+        """
+        with self.lock:
+            rows = self.pages.get(page_id)
+            if rows is not None:
+                self.pages.move_to_end(page_id)
+                self.hits += 1
+                return rows
+            self.misses += 1
+
+        rows = loader()
+        with self.lock:
+            self.pages[page_id] = rows
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return rows
+
+    def clear(self):
+        with self.lock:
+            self.pages.clear()
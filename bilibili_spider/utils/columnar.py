@@ -0,0 +1,247 @@
+# bilibili_spider/utils/columnar.py
+
+"""列式分析工具
+
+配合DatabaseHandler.load_columns使用，对NumPy数组做向量化的时间分桶、
+直方图和Top-K统计，避免在Python中逐行循环评论元组。
+文本列在读取时做字典编码，分组统计只处理整数编号。
+numpy为可选依赖，只在调用这些函数时才需要安装。
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 列名到类型的映射: int为整数列，time为时间列(转换为datetime64[s])，text为文本列
+COLUMN_KINDS = {
+    'id': 'int',
+    'video_id': 'text',
+    'video_title': 'text',
+    'comment_id': 'text',
+    'user_name': 'text',
+    'content': 'text',
+    'publish_time': 'time',
+    'like_count': 'int',
+    'replies': 'text',
+    'create_time': 'time',
+    'update_time': 'time',
+}
+
+# 时间分桶支持的粒度，对应datetime64的单位
+TIME_UNITS = {'Y', 'M', 'W', 'D', 'h', 'm', 's'}
+
+
+def require_numpy():
+    """检查numpy是否可用"""
+    if np is None:
+        raise ImportError("列式查询需要安装numpy: pip install numpy")
+    return np
+
+
+def select_expression(column, source=None):
+    """生成读取某列的SQL表达式
+
+    时间列在SQLite中直接转换为Unix时间戳，整数列的空值替换为0，
+    使每块数据都能直接构造为定长数组。
+
+    @param {string} column - 列名
+    @param {string} source - 该列的取值表达式，默认为列名
+    @return {string} - SQL表达式
+    """
+    kind = COLUMN_KINDS.get(column)
+    if kind is None:
+        raise ValueError(f"未知的列: {column}")
+    source = source or column
+    if kind == 'time':
+        return f"IFNULL(CAST(strftime('%s', {source}) AS INTEGER), 0)"
+    if kind == 'int':
+        return f"IFNULL({source}, 0)"
+    return f"IFNULL({source}, '')"
+
+
+class EncodedColumn:
+    """字典编码的文本列
+
+    读取时为每个不同的值分配整数编号，分组统计直接对编号做bincount，
+    无需再对字符串排序。
+    """
+
+    def __init__(self, codes, labels):
+        """初始化
+
+        @param {ndarray} codes - int32编号数组
+        @param {ndarray} labels - 编号到原始值的object数组
+        """
+        self.codes = codes
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.codes)
+
+    def decode(self):
+        """还原为原始值数组"""
+        return self.labels[self.codes]
+
+
+class ColumnBuilder:
+    """将分块读取的行元组累积为列数组"""
+
+    def __init__(self, columns):
+        """初始化
+
+        @param {list} columns - 列名，顺序与SELECT一致
+        """
+        require_numpy()
+        self.columns = columns
+        self.parts = [[] for _ in columns]
+        self.dictionaries = [{} if COLUMN_KINDS[column] == 'text' else None for column in columns]
+
+    def append(self, rows):
+        """追加一块行元组，转换后即可释放原始行
+
+        @param {list} rows - 行元组列表
+        """
+        for index, dictionary in enumerate(self.dictionaries):
+            values = (row[index] for row in rows)
+            if dictionary is not None:
+                codes = (dictionary.setdefault(value, len(dictionary)) for value in values)
+                self.parts[index].append(np.fromiter(codes, dtype=np.int32, count=len(rows)))
+            else:
+                self.parts[index].append(np.fromiter(values, dtype=np.int64, count=len(rows)))
+
+    def build(self):
+        """合并各块
+
+        @return {dict} - 列名到数组的映射，文本列为EncodedColumn
+        """
+        result = {}
+        for column, parts, dictionary in zip(self.columns, self.parts, self.dictionaries):
+            if dictionary is not None:
+                codes = np.concatenate(parts) if parts else np.array([], dtype=np.int32)
+                labels = np.empty(len(dictionary), dtype=object)
+                labels[:] = list(dictionary)
+                result[column] = EncodedColumn(codes, labels)
+            else:
+                array = np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+                result[column] = array.astype('datetime64[s]') if COLUMN_KINDS[column] == 'time' else array
+        return result
+
+
+def factorize(keys):
+    """将分组键转换为(取值, 编号)
+
+    @param {EncodedColumn|ndarray} keys - 分组键
+    @return {tuple} - (取值数组, 与keys等长的编号数组)
+    """
+    require_numpy()
+    if isinstance(keys, EncodedColumn):
+        return keys.labels, keys.codes
+    return np.unique(keys, return_inverse=True)
+
+
+def bucket_time(times, unit='D'):
+    """将时间截断到指定粒度
+
+    @param {ndarray} times - datetime64数组
+    @param {string} unit - 粒度: Y/M/W/D/h/m/s
+    @return {ndarray} - 截断后的datetime64数组
+    """
+    require_numpy()
+    if unit not in TIME_UNITS:
+        raise ValueError(f"不支持的时间粒度: {unit}")
+    return times.astype(f'datetime64[{unit}]')
+
+
+def bucket_codes(times, unit='D'):
+    """将时间分桶并编号
+
+    时间段数不多于行数的4倍时返回从最早到最晚的连续时间段，
+    没有数据的时间段也会保留，编号由减法直接得到；否则只返回有数据的时间段。
+
+    @param {ndarray} times - datetime64数组
+    @param {string} unit - 时间粒度
+    @return {tuple} - (时间段数组, 与times等长的编号数组)
+    """
+    bucketed = bucket_time(times, unit)
+    if len(bucketed) == 0:
+        return bucketed, np.array([], dtype=np.int64)
+
+    low = bucketed.min()
+    span = int((bucketed.max() - low).astype(np.int64)) + 1
+    if span <= len(bucketed) * 4:
+        return low + np.arange(span), (bucketed - low).astype(np.int64)
+    return np.unique(bucketed, return_inverse=True)
+
+
+def time_series(times, values=None, unit='D'):
+    """按时间分桶求和，未传入values时统计每个时间段的行数
+
+    @param {ndarray} times - datetime64数组
+    @param {ndarray} values - 与times等长的数值数组
+    @param {string} unit - 时间粒度
+    @return {tuple} - (时间段数组, 每段合计数组)，按时间升序
+    """
+    buckets, codes = bucket_codes(times, unit)
+    totals = np.bincount(codes, weights=values, minlength=len(buckets))
+    return buckets, totals if values is not None else totals.astype(np.int64)
+
+
+def time_series_by(keys, times, values=None, unit='D'):
+    """按分组键和时间段二维汇总，例如各视频每天的点赞数
+
+    @param {EncodedColumn|ndarray} keys - 分组键，如video_id
+    @param {ndarray} times - datetime64数组
+    @param {ndarray} values - 数值数组，为空时统计行数
+    @param {string} unit - 时间粒度
+    @return {tuple} - (分组键数组, 时间段数组, 形状为(分组数, 时间段数)的矩阵)
+    """
+    labels, key_codes = factorize(keys)
+    buckets, codes = bucket_codes(times, unit)
+    flat = np.bincount(
+        key_codes.astype(np.int64) * len(buckets) + codes,
+        weights=values,
+        minlength=len(labels) * len(buckets)
+    )
+    if values is None:
+        flat = flat.astype(np.int64)
+    return labels, buckets, flat.reshape(len(labels), len(buckets))
+
+
+def histogram(values, bins=20, log=False):
+    """计算数值分布
+
+    @param {ndarray} values - 数值数组
+    @param {int} bins - 分箱数
+    @param {bool} log - 是否按对数刻度分箱，适合点赞数这类长尾分布
+    @return {tuple} - (每箱计数, 分箱边界)
+    """
+    require_numpy()
+    values = np.asarray(values)
+    if log:
+        upper = max(int(values.max()) if len(values) else 1, 1)
+        edges = np.unique(np.concatenate(([0], np.logspace(0, np.log10(upper + 1), bins))))
+        return np.histogram(values, bins=edges)
+    return np.histogram(values, bins=bins)
+
+
+def top_k(keys, weights=None, k=10):
+    """统计出现次数或权重合计最高的K个键
+
+    @param {EncodedColumn|ndarray} keys - 键，如user_name
+    @param {ndarray} weights - 权重数组，为空时按出现次数统计
+    @param {int} k - 返回个数
+    @return {list} - (键, 合计)元组列表，按合计降序
+    """
+    labels, codes = factorize(keys)
+    totals = np.bincount(codes, weights=weights, minlength=len(labels))
+    if weights is None:
+        totals = totals.astype(np.int64)
+
+    k = min(k, len(labels))
+    if k == 0:
+        return []
+    # 先用argpartition选出前K个，只对这K个排序
+    index = np.argpartition(-totals, k - 1)[:k]
+    index = index[np.argsort(-totals[index], kind='stable')]
+    return [(labels[i], totals[i].item()) for i in index]
@@ -1,7 +1,382 @@
 # bilibili_spider/utils/config.py
 
+import time
 import logging
-from datetime import datetime
+import threading
+from types import MappingProxyType
+from datetime import datetime, timedelta
+
+from bilibili_spider.utils.transfer import accept_encoding
+
+
+class HeaderProfile:
+    """不可变的请求头配置
+
+    Cookie字符串只在创建时解析和校验一次，之后所有请求直接复用
+    同一份只读请求头，不再逐次复制或解析。
+    """
+
+    __slots__ = ('cookie', 'fields', 'headers', 'error')
+
+    REQUIRED_FIELDS = ('SESSDATA', 'bili_jct', 'DedeUserID')
+
+    def __init__(self, base_headers, cookie=None):
+        """解析Cookie并生成请求头
+
+        @param {dict} base_headers - 基础请求头
+        @param {string} cookie - Cookie字符串，为空时生成不带Cookie的请求头
+        """
+        fields = {}
+        error = None
+        if not cookie:
+            error = "Cookie为空"
+        else:
+            for item in cookie.split(';'):
+                if '=' in item:
+                    name, value = item.strip().split('=', 1)
+                    fields[name.strip()] = value.strip()
+
+            for field in self.REQUIRED_FIELDS:
+                if field not in fields:
+                    error = f"缺少必要字段: {field}"
+                    break
+                if not fields[field]:
+                    error = f"字段值为空: {field}"
+                    break
+
+        headers = dict(base_headers)
+        if cookie and not error:
+            headers['Cookie'] = cookie
+            headers['Origin'] = 'https://www.bilibili.com'
+            headers['Host'] = 'api.bilibili.com'
+            headers['Referer'] = 'https://www.bilibili.com'
+
+        object.__setattr__(self, 'cookie', cookie)
+        object.__setattr__(self, 'fields', MappingProxyType(fields))
+        object.__setattr__(self, 'headers', MappingProxyType(headers))
+        object.__setattr__(self, 'error', error)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HeaderProfile不可修改")
+
+    @property
+    def valid(self):
+        """Cookie是否包含全部必要字段"""
+        return self.error is None
+
+
+class CookiePool:
+    """多账号Cookie池
+
+    按轮询顺序分配Cookie，记录每个Cookie的成功、失败次数和平均耗时，
+    被风控的Cookie进入冷却期，冷却期内不再分配。
+    使用统计先在内存中累计，每隔flush_interval秒、有Cookie进入冷却时或调用flush()时
+    在一个事务中批量写入数据库，请求线程不必每次请求都等待数据库写锁。
+    """
+
+    def __init__(self, cooldown_seconds=300, max_failures=5, flush_interval=10):
+        """初始化Cookie池
+
+        @param {int} cooldown_seconds - 被风控后的冷却时间(秒)
+        @param {int} max_failures - 连续失败多少次后也进入冷却
+        @param {float} flush_interval - 使用统计写入数据库的间隔(秒)
+        """
+        self.cooldown_seconds = cooldown_seconds
+        self.max_failures = max_failures
+        self.flush_interval = flush_interval
+        self.entries = []
+        self.index = 0
+        self.on_flush = None
+        self.pending = {}  # Cookie记录ID到尚未写入数据库的统计
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # 批量写入按顺序进行，较旧的平均耗时不会覆盖较新的
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, records, on_flush=None):
+        """从数据库记录加载Cookie池，原有的未写入统计先写入
+
+        @param {list} records - DatabaseHandler.get_cookie_pool()返回的记录
+        @param {callable} on_flush - 批量写入回调，参数同DatabaseHandler.record_cookie_usage
+        """
+        self.flush()
+        entries = []
+        for record in records:
+            cooldown_until = 0
+            if record.get('cooldown_until'):
+                cooldown_end = datetime.strptime(record['cooldown_until'], '%Y-%m-%d %H:%M:%S')
+                cooldown_until = time.monotonic() + max((cooldown_end - datetime.now()).total_seconds(), 0)
+
+            entries.append({
+                'id': record['id'],
+                'cookie': record['cookie'],
+                'profile': record.get('profile'),
+                'success_count': record.get('success_count') or 0,
+                'fail_count': record.get('fail_count') or 0,
+                'consecutive_failures': 0,
+                'avg_latency': record.get('avg_latency') or 0,
+                'cooldown_until': cooldown_until
+            })
+
+        with self.lock:
+            self.entries = entries
+            self.index = 0
+            self.on_flush = on_flush
+
+    def acquire(self):
+        """按轮询顺序取一个可用的Cookie
+
+        所有Cookie都在冷却时，返回最早结束冷却的一个。
+
+        @return {dict} - Cookie条目，池为空时返回None
+        """
+        with self.lock:
+            if not self.entries:
+                return None
+
+            now = time.monotonic()
+            for _ in range(len(self.entries)):
+                entry = self.entries[self.index % len(self.entries)]
+                self.index += 1
+                if entry['cooldown_until'] <= now:
+                    return entry
+
+            return min(self.entries, key=lambda item: item['cooldown_until'])
+
+    def report(self, entry, success, latency, rate_limited=False):
+        """记录一次请求的结果
+
+        @param {dict} entry - acquire()返回的Cookie条目
+        @param {bool} success - 请求是否成功
+        @param {float} latency - 请求耗时(秒)
+        @param {bool} rate_limited - 是否触发了风控
+        """
+        with self.lock:
+            if success:
+                entry['success_count'] += 1
+                entry['consecutive_failures'] = 0
+            else:
+                entry['fail_count'] += 1
+                entry['consecutive_failures'] += 1
+
+            if entry['avg_latency'] > 0:
+                entry['avg_latency'] = entry['avg_latency'] * 0.8 + latency * 0.2
+            else:
+                entry['avg_latency'] = latency
+
+            now = datetime.now()
+            pending = self.pending.setdefault(entry['id'], {
+                'id': entry['id'], 'success_count': 0, 'fail_count': 0, 'cooldown_until': None
+            })
+            pending['success_count' if success else 'fail_count'] += 1
+            pending['avg_latency'] = entry['avg_latency']
+            pending['last_used_time'] = now.strftime('%Y-%m-%d %H:%M:%S')
+
+            # 进入冷却时立即写入，其他进程或下次启动时能看到冷却状态
+            flush = time.monotonic() - self.last_flush >= self.flush_interval
+            if rate_limited or entry['consecutive_failures'] >= self.max_failures:
+                entry['cooldown_until'] = time.monotonic() + self.cooldown_seconds
+                entry['consecutive_failures'] = 0
+                pending['cooldown_until'] = (now + timedelta(seconds=self.cooldown_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+                flush = True
+
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """将累计的使用统计批量写入数据库"""
+        with self.flush_lock:
+            with self.lock:
+                usages = list(self.pending.values())
+                self.pending = {}
+                self.last_flush = time.monotonic()
+                on_flush = self.on_flush
+            if usages and on_flush:
+                on_flush(usages)
+
+
+class ProxyPool:
+    """代理池
+
+    每次请求选择得分最高的代理。得分是该代理的预计成功请求速率，即近期成功率除以平均耗时，
+    再除以该代理上进行中的请求数加一，并发请求因此分散到多个代理，快且稳定的代理承担更多请求。
+    尚无耗时记录的代理得分最高，会被优先试用。
+    触发风控或连续失败的代理进入冷却；本次运行中请求数足够后近期成功率仍过低的代理被淘汰，
+    从池中移除并在数据库中停用。
+    使用统计与Cookie池一样先在内存中累计，定期、有代理进入冷却或被淘汰时或调用flush()时批量写入数据库。
+    """
+
+    HEALTH_DECAY = 0.9  # 近期成功率的指数移动平均系数，越大越看重历史
+
+    def __init__(self, cooldown_seconds=120, max_failures=3, min_samples=20, evict_success_rate=0.5,
+                 flush_interval=10):
+        """初始化代理池
+
+        @param {int} cooldown_seconds - 触发风控或连续失败后的冷却时间(秒)
+        @param {int} max_failures - 连续失败多少次后进入冷却
+        @param {int} min_samples - 本次运行中请求数达到该值后才按成功率淘汰
+        @param {float} evict_success_rate - 近期成功率低于该值的代理被淘汰
+        @param {float} flush_interval - 使用统计写入数据库的间隔(秒)
+        """
+        self.cooldown_seconds = cooldown_seconds
+        self.max_failures = max_failures
+        self.min_samples = min_samples
+        self.evict_success_rate = evict_success_rate
+        self.flush_interval = flush_interval
+        self.entries = []
+        self.on_flush = None
+        self.pending = {}  # 代理记录ID到尚未写入数据库的统计
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, records, on_flush=None):
+        """从数据库记录加载代理池
+
+        @param {list} records - DatabaseHandler.get_proxy_pool()返回的记录
+        @param {callable} on_flush - 批量写入回调，参数同DatabaseHandler.record_proxy_usage
+        """
+        self.flush()
+        entries = []
+        for record in records:
+            cooldown_until = 0
+            if record.get('cooldown_until'):
+                cooldown_end = datetime.strptime(record['cooldown_until'], '%Y-%m-%d %H:%M:%S')
+                cooldown_until = time.monotonic() + max((cooldown_end - datetime.now()).total_seconds(), 0)
+
+            # 近期成功率从历史计数开始，加一平滑避免新代理为0
+            success_count = record.get('success_count') or 0
+            fail_count = record.get('fail_count') or 0
+            entries.append({
+                'id': record['id'],
+                'url': record['url'],
+                'proxies': {'http': record['url'], 'https': record['url']},
+                'success_count': success_count,
+                'fail_count': fail_count,
+                'rate_limit_count': record.get('rate_limit_count') or 0,
+                'consecutive_failures': 0,
+                'samples': 0,
+                'health': (success_count + 1) / (success_count + fail_count + 2),
+                'avg_latency': record.get('avg_latency') or 0,
+                'cooldown_until': cooldown_until,
+                'in_flight': 0
+            })
+
+        with self.lock:
+            self.entries = entries
+            self.on_flush = on_flush
+
+    @staticmethod
+    def score(entry):
+        """代理的得分，即预计的每秒成功请求数按进行中的请求数分摊后的值"""
+        latency = entry['avg_latency'] or 0.001
+        return entry['health'] / latency / (entry['in_flight'] + 1)
+
+    def acquire(self):
+        """取得分最高的可用代理
+
+        所有代理都在冷却时，返回最早结束冷却的一个。
+
+        @return {dict} - 代理条目，池为空时返回None，用完后必须调用report()
+        """
+        with self.lock:
+            if not self.entries:
+                return None
+
+            now = time.monotonic()
+            available = [entry for entry in self.entries if entry['cooldown_until'] <= now]
+            if available:
+                entry = max(available, key=self.score)
+            else:
+                entry = min(self.entries, key=lambda item: item['cooldown_until'])
+            entry['in_flight'] += 1
+            return entry
+
+    def report(self, entry, success, latency, rate_limited=False):
+        """记录一次请求的结果
+
+        @param {dict} entry - acquire()返回的代理条目
+        @param {bool} success - 请求是否成功，接口返回的业务错误不算代理失败
+        @param {float} latency - 请求耗时(秒)
+        @param {bool} rate_limited - 是否触发了风控
+        """
+        with self.lock:
+            entry['in_flight'] -= 1
+            entry['samples'] += 1
+            if success:
+                entry['success_count'] += 1
+                entry['consecutive_failures'] = 0
+            else:
+                entry['fail_count'] += 1
+                entry['consecutive_failures'] += 1
+            if rate_limited:
+                entry['rate_limit_count'] += 1
+            entry['health'] = entry['health'] * self.HEALTH_DECAY + (1 - self.HEALTH_DECAY) * (1 if success else 0)
+
+            if entry['avg_latency'] > 0:
+                entry['avg_latency'] = entry['avg_latency'] * 0.8 + latency * 0.2
+            else:
+                entry['avg_latency'] = latency
+
+            now = datetime.now()
+            pending = self.pending.setdefault(entry['id'], {
+                'id': entry['id'], 'success_count': 0, 'fail_count': 0, 'rate_limit_count': 0,
+                'cooldown_until': None, 'evicted': False
+            })
+            pending['success_count' if success else 'fail_count'] += 1
+            if rate_limited:
+                pending['rate_limit_count'] += 1
+            pending['avg_latency'] = entry['avg_latency']
+            pending['last_used_time'] = now.strftime('%Y-%m-%d %H:%M:%S')
+
+            # 进入冷却或被淘汰时立即写入，其他进程或下次启动时能看到代理状态
+            flush = time.monotonic() - self.last_flush >= self.flush_interval
+            if entry['samples'] >= self.min_samples and entry['health'] < self.evict_success_rate:
+                if entry in self.entries:
+                    self.entries.remove(entry)
+                    pending['evicted'] = True
+                    flush = True
+            elif rate_limited or entry['consecutive_failures'] >= self.max_failures:
+                entry['cooldown_until'] = time.monotonic() + self.cooldown_seconds
+                entry['consecutive_failures'] = 0
+                pending['cooldown_until'] = (now + timedelta(seconds=self.cooldown_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+                flush = True
+
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """将累计的使用统计批量写入数据库"""
+        with self.flush_lock:
+            with self.lock:
+                usages = list(self.pending.values())
+                self.pending = {}
+                self.last_flush = time.monotonic()
+                on_flush = self.on_flush
+            if usages and on_flush:
+                on_flush(usages)
+
+    def snapshot(self):
+        """当前池中各代理的统计
+
+        @return {list} - 含url、success_count、fail_count、rate_limit_count、health、avg_latency、cooling的字典列表
+        """
+        now = time.monotonic()
+        with self.lock:
+            return [{
+                'url': entry['url'],
+                'success_count': entry['success_count'],
+                'fail_count': entry['fail_count'],
+                'rate_limit_count': entry['rate_limit_count'],
+                'health': entry['health'],
+                'avg_latency': entry['avg_latency'],
+                'cooling': entry['cooldown_until'] > now
+            } for entry in self.entries]
 
 
 class Config:
@@ -9,36 +384,116 @@ class Config:
 
     def __init__(self):
         """初始化配置"""
-        # 基础请求头
+        # 基础请求头，与浏览器页面内调用JSON接口时的请求一致，不带页面导航相关的字段
         self.base_headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7,zh-TW;q=0.6',
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
+            'Accept-Encoding': accept_encoding(),  # 只声明能解码的格式，br和zstd需要安装brotli和zstandard
             'sec-ch-ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
             'sec-ch-ua-mobile': '?0',
             'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'document',
-            'sec-fetch-mode': 'navigate',
-            'sec-fetch-site': 'none',
-            'sec-fetch-user': '?1',
-            'upgrade-insecure-requests': '1',
-            'cache-control': 'no-cache',
-            'pragma': 'no-cache'
+            'sec-fetch-dest': 'empty',
+            'sec-fetch-mode': 'cors',
+            'sec-fetch-site': 'same-site'
         }
 
-        # 当前使用的headers
-        self.headers = self.base_headers.copy()
+        # 当前使用的请求头配置，只在set_cookie/clear_cookie时替换
+        self._anonymous_profile = HeaderProfile(self.base_headers)
+        self.profile = self._anonymous_profile
+        self._profile_cache = {}  # Cookie字符串到解析结果的缓存
+        self._warned_no_cookie = False
 
         # 爬虫配置
         self.DELAY_MIN = 3  # 最小延迟秒数
         self.DELAY_MAX = 7  # 最大延迟秒数
         self.MAX_RETRIES = 3  # 最大重试次数
         self.MAX_PAGES = 10  # 默认最大爬取页数
+        self.HOT_REFRESH_PAGES = 10  # 刷新热门评论点赞且页数选择"全部"时，最多刷新按热度排序的前几页
+        self.REQUEST_CONNECT_TIMEOUT = 5  # 建立连接的超时(秒)
+        self.REQUEST_READ_TIMEOUT = 15  # 等待响应数据的超时(秒)，也是停止爬取的最长等待时间
+        self.CRAWL_WORKERS = 4  # 已知总页数后并发爬取的线程数
+        self.CRAWL_INTERVAL_MIN = 1  # 相邻评论页请求的最小间隔(秒)，所有并发线程共享
+        self.CRAWL_INTERVAL_MAX = 3  # 相邻评论页请求的最大间隔(秒)
+        self.HTTP_TRANSPORT = 'http1'  # http1使用requests连接池，http2在少数连接上多路复用，需要安装httpx[http2]
+        self.HTTP2_CONNECTIONS = 2  # HTTP/2连接数，并发请求分摊到这些连接上
+        self.CRAWL_PROCESS = False  # 是否在独立进程中爬取和入库，界面按LOG_FLUSH_INTERVAL接收合并后的进度，duckdb不支持多进程写入，使用时忽略
+
+        # 日志配置
+        self.LOG_FILE = 'bilibili_spider.log'  # 完整爬取日志文件
+        self.LOG_FILE_MAX_BYTES = 5 * 1024 * 1024  # 单个日志文件最大字节数
+        self.LOG_FILE_BACKUP_COUNT = 3  # 保留的历史日志文件数
+        self.LOG_VIEW_MAX_LINES = 2000  # 界面日志最大行数
+        self.LOG_FLUSH_INTERVAL = 200  # 界面日志合并刷新间隔(毫秒)
+        self.LOG_CONTENT_MAX_CHARS = 100  # 界面日志中评论内容的最大显示长度
+
+        # 弹幕配置
+        self.DANMAKU_WORKERS = 4  # 并发请求弹幕分段的线程数，与评论页共用CRAWL_INTERVAL_*请求间隔
+
+        # 视频发现配置
+        self.DISCOVERY_WORKERS = 4  # 并发获取列表页的线程数，与评论页共用CRAWL_INTERVAL_*请求间隔
+        self.DISCOVERY_POPULAR_PAGES = 10  # 热门列表不返回总页数，最多获取的页数
+
+        # 链接解析配置
+        self.URL_RESOLVE_WORKERS = 16  # 并发跟随短链接跳转的线程数
+
+        # 监控配置
+        self.WATCH_MIN_INTERVAL = 10  # 最短检查间隔(分钟)
+        self.WATCH_MAX_INTERVAL = 24 * 60  # 最长检查间隔(分钟)
+        self.WATCH_PAGE_BUDGET = 50  # 每轮检查的总页数预算
 
         # Cookie配置
         self.cookie = None
         self._cookie_valid = False
+        self.BROWSER_PROFILE_DIR = 'browser_profile'  # 保存浏览器登录状态的用户数据目录
+        self.COOKIE_WAIT_TIMEOUT = 30  # 等待登录Cookie的单次超时(秒)
+
+        # Cookie池配置
+        self.COOKIE_ROTATION = 'request'  # 轮换粒度: request每次请求轮换, worker每个爬虫实例固定一个
+        self.COOKIE_COOLDOWN = 300  # 被风控后的冷却时间(秒)
+        self.COOKIE_MAX_FAILURES = 5  # 连续失败多少次后进入冷却
+        self.COOKIE_CHECK_WORKERS = 4  # 并行检测Cookie的线程数
+        self.POOL_FLUSH_INTERVAL = 10  # Cookie池和代理池的使用统计在内存中累计，每隔多少秒批量写入数据库
+        self.cookie_pool = CookiePool(self.COOKIE_COOLDOWN, self.COOKIE_MAX_FAILURES, self.POOL_FLUSH_INTERVAL)
+
+        # 代理池配置
+        self.PROXY_ENABLED = False  # 是否通过代理池发送接口请求，代理列表保存在数据库中
+        self.PROXY_COOLDOWN = 120  # 触发风控或连续失败后的冷却时间(秒)
+        self.PROXY_MAX_FAILURES = 3  # 连续失败多少次后进入冷却
+        self.PROXY_MIN_SAMPLES = 20  # 本次运行中请求数达到该值后才按成功率淘汰代理
+        self.PROXY_EVICT_SUCCESS_RATE = 0.5  # 近期成功率低于该值的代理被淘汰
+        self.PROXY_CHECK_WORKERS = 8  # 并行检测代理的线程数
+        self.proxy_pool = ProxyPool(self.PROXY_COOLDOWN, self.PROXY_MAX_FAILURES, flush_interval=self.POOL_FLUSH_INTERVAL)
+
+        # 评论分析配置
+        self.ANALYTICS_WORKERS = 0  # 分析进程数，0表示使用全部CPU核心
+        self.ANALYTICS_CHUNK_SIZE = 5000  # 每个分析任务处理的评论数
+        self.ANALYTICS_MAX_WORDS = 100000  # 单个词频表的最大词数，超出后只保留高频词
+        self.ANALYTICS_TOP_KEYWORDS = 100  # 每个视频保存的关键词数
+
+        # 评论去重配置
+        self.DEDUP_ENABLED = True  # 入库时标记近似重复的评论簇
+        self.DEDUP_SKIP_EXACT = False  # 是否跳过内容完全相同的评论
+        self.DEDUP_BANDS = 8  # LSH段数
+        self.DEDUP_ROWS = 4  # 每段的签名行数，相似度阈值约为(1/段数)^(1/行数)
+        self.DEDUP_MIN_LENGTH = 5  # 归一化后短于该长度的评论不参与去重
+
+        # 存储配置
+        self.STORAGE_BACKEND = 'sqlite'  # sqlite或duckdb，duckdb只支持评论和Cookie等核心功能，且不分片
+        self.STORAGE_MODE = 'single'  # single为单一数据库文件，video按视频分片，month按评论发布月份分片
+        self.SHARD_DIR = 'shards'  # 分片文件目录
+        self.SHARD_WORKERS = 4  # 跨分片查询的并发线程数
+
+        # 归档配置
+        self.ARCHIVE_AFTER_DAYS = 180  # 发布超过该天数的评论可以归档
+        self.ARCHIVE_PAGE_SIZE = 1000  # 每个归档页的评论数
+        self.ARCHIVE_COMPRESSION_LEVEL = 10  # zstd压缩级别，未安装zstandard时使用zlib
+
+        # 响应缓存配置
+        self.RESPONSE_CACHE_MODE = 'off'  # off不缓存，record缓存成功的接口响应，replay只从缓存读取不访问网络
+        self.RESPONSE_CACHE_DIR = 'response_cache'  # 缓存目录
+        self.RESPONSE_CACHE_TTL = 30 * 86400  # 缓存条目的保留时间(秒)，0表示不过期
+        self.RESPONSE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 压缩后的缓存总大小上限
 
         # 配置日志
         logging.basicConfig(
@@ -47,35 +502,36 @@ class Config:
         )
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def headers(self):
+        """当前请求头(只读)"""
+        return self.profile.headers
+
+    def get_profile(self, cookie):
+        """获取Cookie对应的请求头配置，同一Cookie只解析一次
+
+        @param {string} cookie - Cookie字符串
+        @return {HeaderProfile} - 请求头配置
+        """
+        profile = self._profile_cache.get(cookie)
+        if profile is None:
+            if len(self._profile_cache) >= 64:
+                self._profile_cache.clear()
+            profile = HeaderProfile(self.base_headers, cookie)
+            self._profile_cache[cookie] = profile
+        return profile
+
     def validate_cookie(self, cookie):
         """验证Cookie是否包含必要字段和格式是否正确
 
         @param {string} cookie - 要验证的Cookie字符串
         @return {bool} - Cookie是否有效
         """
-        if not cookie:
-            self.logger.info("Cookie为空")
-            return False
-
         try:
-            # 解析Cookie字符串为字典
-            cookie_dict = {}
-            for item in cookie.split(';'):
-                if '=' in item:
-                    name, value = item.strip().split('=', 1)
-                    cookie_dict[name.strip()] = value.strip()
-
-            # 检查必要字段
-            required_fields = ['SESSDATA', 'bili_jct', 'DedeUserID']
-            for field in required_fields:
-                if field not in cookie_dict:
-                    self.logger.info(f"缺少必要字段: {field}")
-                    return False
-                if not cookie_dict[field]:
-                    self.logger.info(f"字段值为空: {field}")
-                    return False
-
-            return True
+            profile = self.get_profile(cookie)
+            if not profile.valid:
+                self.logger.info(profile.error)
+            return profile.valid
 
         except Exception as e:
             self.logger.error(f"Cookie验证失败: {str(e)}")
@@ -92,35 +548,26 @@ class Config:
             self.clear_cookie()
             return False
 
+        # 与当前Cookie相同时保留已有配置，使用方可据此复用会话
+        if cookie == self.cookie and self._cookie_valid:
+            return True
+
         # 先验证Cookie
         if not self.validate_cookie(cookie):
             return False
 
-        try:
-            # 重置headers
-            self.headers = self.base_headers.copy()
-
-            # 设置新的Cookie相关字段
-            self.cookie = cookie
-            self.headers['Cookie'] = cookie
-            self.headers['Origin'] = 'https://www.bilibili.com'
-            self.headers['Host'] = 'api.bilibili.com'
-            self.headers['Referer'] = 'https://www.bilibili.com'
-
-            self._cookie_valid = True
-            self.logger.info("Cookie设置成功")
-            return True
-
-        except Exception as e:
-            self.logger.error(f"设置Cookie失败: {str(e)}")
-            self.clear_cookie()
-            return False
+        self.profile = self.get_profile(cookie)
+        self.cookie = cookie
+        self._cookie_valid = True
+        self.logger.info("Cookie设置成功")
+        return True
 
     def clear_cookie(self):
         """清除Cookie相关的所有信息"""
         self.cookie = None
         self._cookie_valid = False
-        self.headers = self.base_headers.copy()
+        self.profile = self._anonymous_profile
+        self._warned_no_cookie = False
         self.logger.info("Cookie已清除")
 
     def has_valid_cookie(self):
@@ -130,11 +577,48 @@ class Config:
         """
         return bool(self.cookie and self._cookie_valid)
 
+    def load_cookie_pool(self, records, on_flush=None):
+        """加载多账号Cookie池
+
+        @param {list} records - DatabaseHandler.get_cookie_pool()返回的记录
+        @param {callable} on_flush - 使用统计的批量写入回调，通常为DatabaseHandler.record_cookie_usage
+        """
+        self.cookie_pool.cooldown_seconds = self.COOKIE_COOLDOWN
+        self.cookie_pool.max_failures = self.COOKIE_MAX_FAILURES
+        self.cookie_pool.flush_interval = self.POOL_FLUSH_INTERVAL
+        records = [
+            dict(record, profile=self.get_profile(record['cookie']))
+            for record in records
+            if self.get_profile(record['cookie']).valid
+        ]
+        self.cookie_pool.load(records, on_flush)
+        self.logger.info(f"Cookie池已加载，共 {len(self.cookie_pool)} 个Cookie")
+
+    def flush_pools(self):
+        """将Cookie池和代理池尚未写入的使用统计写入数据库，一次爬取结束时调用"""
+        self.cookie_pool.flush()
+        self.proxy_pool.flush()
+
+    def load_proxy_pool(self, records, on_flush=None):
+        """加载代理池
+
+        @param {list} records - DatabaseHandler.get_proxy_pool()返回的记录
+        @param {callable} on_flush - 使用统计的批量写入回调，通常为DatabaseHandler.record_proxy_usage
+        """
+        self.proxy_pool.cooldown_seconds = self.PROXY_COOLDOWN
+        self.proxy_pool.max_failures = self.PROXY_MAX_FAILURES
+        self.proxy_pool.min_samples = self.PROXY_MIN_SAMPLES
+        self.proxy_pool.evict_success_rate = self.PROXY_EVICT_SUCCESS_RATE
+        self.proxy_pool.flush_interval = self.POOL_FLUSH_INTERVAL
+        self.proxy_pool.load(records, on_flush)
+        self.logger.info(f"代理池已加载，共 {len(self.proxy_pool)} 个代理")
+
     def get_headers(self):
         """获取请求头
 
-        @return {dict} - 完整的请求头字典
+        @return {Mapping} - 完整的只读请求头
         """
-        if not self.has_valid_cookie():
+        if not self.has_valid_cookie() and not self._warned_no_cookie:
             self.logger.warning("当前没有有效的Cookie")
-        return self.headers.copy()
\ No newline at end of file
+            self._warned_no_cookie = True
+        return self.profile.headers
\ No newline at end of file
@@ -1,23 +1,63 @@
 # bilibili_spider/utils/cookie_helper.py
 
 from PyQt6.QtCore import QObject, pyqtSignal
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+import os
 import threading
 import logging
 
 
+# 在页面中监听cookieStore的change事件，登录写入所需Cookie时立即返回。
+# SESSDATA是HttpOnly Cookie，脚本中不可见，因此只等待bili_jct和DedeUserID，
+# 两者与SESSDATA在登录时同时写入，随后再通过WebDriver读取完整Cookie。
+WAIT_COOKIE_SCRIPT = """
+const required = arguments[0];
+const done = arguments[arguments.length - 1];
+if (!window.cookieStore) {
+    done('unsupported');
+    return;
+}
+const check = async () => {
+    const names = (await cookieStore.getAll()).map(cookie => cookie.name);
+    return required.every(name => names.includes(name));
+};
+check().then(ready => {
+    if (ready) {
+        done('ready');
+        return;
+    }
+    cookieStore.addEventListener('change', async () => {
+        if (await check()) {
+            done('ready');
+        }
+    });
+});
+"""
+
+
 class CookieHelper(QObject):
-    """Cookie获取工具类"""
+    """Cookie获取工具类
+
+    浏览器使用持久化的用户数据目录，登录状态在多次启动之间保留。
+    交互模式下打开浏览器等待用户登录；后台模式下以无头浏览器复用
+    已保存的登录状态刷新Cookie，无需用户再次操作。
+    """
     cookie_ready = pyqtSignal(str)
+    login_required = pyqtSignal()  # 后台刷新时发现登录状态已失效
+
+    REQUIRED_FIELDS = ['SESSDATA', 'bili_jct', 'DedeUserID']
+    SCRIPT_FIELDS = ['bili_jct', 'DedeUserID']  # 页面脚本可见的登录Cookie
+
+    def __init__(self, config, db_handler, headless=False):
+        """初始化并在后台线程中启动浏览器
 
-    def __init__(self, config, db_handler):
+        @param {Config} config - 配置对象
+        @param {DatabaseHandler} db_handler - 数据库处理器
+        @param {bool} headless - 是否以无头模式后台刷新Cookie
+        """
         super().__init__()
         self.config = config
         self.db_handler = db_handler
+        self.headless = headless
         self.driver = None
         self.is_running = False
 
@@ -45,26 +85,93 @@ class CookieHelper(QObject):
     def start_browser_thread(self):
         """在新线程中启动浏览器"""
         self.is_running = True
-        threading.Thread(target=self.run_browser, daemon=True).start()
+        target = self.refresh_cookie if self.headless else self.run_browser
+        threading.Thread(target=target, daemon=True).start()
+
+    def create_driver(self):
+        """创建使用持久化用户数据目录的浏览器实例"""
+        from selenium import webdriver
+
+        if self.browser_type == 'edge':
+            from selenium.webdriver.edge.options import Options
+        else:
+            from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument(f'--user-data-dir={os.path.abspath(self.config.BROWSER_PROFILE_DIR)}')
+        if self.headless:
+            options.add_argument('--headless=new')
+        else:
+            options.add_argument('--start-maximized')
+
+        if self.browser_type == 'edge':
+            return webdriver.Edge(options=options)
+        return webdriver.Chrome(options=options)
+
+    def read_cookie(self):
+        """读取浏览器中的完整Cookie
+
+        @return {string} - 包含必要字段的Cookie字符串，未登录时返回None
+        """
+        cookie_dict = {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+        if not all(field in cookie_dict for field in self.REQUIRED_FIELDS):
+            return None
+
+        cookie_str = '; '.join([f"{k}={v}" for k, v in cookie_dict.items()])
+        return cookie_str if self.config.validate_cookie(cookie_str) else None
+
+    def wait_for_login(self):
+        """等待登录Cookie写入，由cookieStore的change事件驱动
+
+        @return {string} - 登录后的Cookie字符串，被取消时返回None
+        """
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import WebDriverException
+
+        self.driver.set_script_timeout(self.config.COOKIE_WAIT_TIMEOUT)
+
+        while self.is_running:
+            try:
+                result = self.driver.execute_async_script(WAIT_COOKIE_SCRIPT, self.SCRIPT_FIELDS)
+            except WebDriverException:
+                # 等待超时，或登录后页面跳转中断了脚本，重新检查即可
+                result = None
+
+            if result == 'unsupported':
+                # 浏览器不支持cookieStore时退回到WebDriverWait
+                try:
+                    WebDriverWait(self.driver, self.config.COOKIE_WAIT_TIMEOUT).until(
+                        lambda driver: self.read_cookie()
+                    )
+                except WebDriverException:
+                    pass
+
+            cookie_str = self.read_cookie()
+            if cookie_str:
+                return cookie_str
+
+        return None
 
     def run_browser(self):
-        """运行浏览器并监视Cookie"""
+        """运行浏览器并等待用户登录"""
+        # selenium导入较慢，只在真正启动浏览器时加载
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
         try:
-            # 根据检测结果创建对应的浏览器实例
-            if self.browser_type == 'edge':
-                from selenium.webdriver.edge.options import Options
-                options = Options()
-                options.add_argument('--start-maximized')
-                self.driver = webdriver.Edge(options=options)
-            else:
-                from selenium.webdriver.chrome.options import Options
-                options = Options()
-                options.add_argument('--start-maximized')
-                self.driver = webdriver.Chrome(options=options)
+            self.driver = self.create_driver()
 
             # 访问B站首页
             self.driver.get('https://www.bilibili.com')
 
+            # 浏览器数据目录中已有登录状态时直接返回
+            cookie_str = self.read_cookie()
+            if cookie_str:
+                self.cookie_ready.emit(cookie_str)
+                return
+
             try:
                 # 等待并点击登录按钮
                 wait = WebDriverWait(self.driver, 10)
@@ -73,21 +180,9 @@ class CookieHelper(QObject):
                 )
                 login_button.click()
 
-                # 开始检查Cookie
-                while self.is_running:
-                    cookies = self.driver.get_cookies()
-                    cookie_dict = {cookie['name']: cookie['value'] for cookie in cookies}
-
-                    required_fields = ['SESSDATA', 'bili_jct', 'DedeUserID']
-                    if all(field in cookie_dict for field in required_fields):
-                        cookie_str = '; '.join([f"{k}={v}" for k, v in cookie_dict.items()])
-
-                        if self.config.validate_cookie(cookie_str):
-                            self.cookie_ready.emit(cookie_str)
-                            break
-
-                    import time
-                    time.sleep(2)
+                cookie_str = self.wait_for_login()
+                if cookie_str:
+                    self.cookie_ready.emit(cookie_str)
 
             except TimeoutException:
                 logging.error("加载登录页面失败")
@@ -98,6 +193,26 @@ class CookieHelper(QObject):
         finally:
             self.cleanup()
 
+    def refresh_cookie(self):
+        """以无头浏览器复用已保存的登录状态刷新Cookie"""
+        try:
+            self.driver = self.create_driver()
+            self.driver.get('https://www.bilibili.com')
+
+            cookie_str = self.read_cookie()
+            if cookie_str:
+                logging.info("已在后台刷新Cookie")
+                self.cookie_ready.emit(cookie_str)
+            else:
+                logging.warning("浏览器登录状态已失效，需要重新登录")
+                self.login_required.emit()
+
+        except Exception as e:
+            logging.error(f"后台刷新Cookie失败: {str(e)}")
+
+        finally:
+            self.cleanup()
+
     def cleanup(self):
         """清理资源"""
         self.is_running = False
@@ -106,4 +221,8 @@ class CookieHelper(QObject):
                 self.driver.quit()
             except:
                 pass
-            self.driver = None
\ No newline at end of file
+            self.driver = None
+
+    def close(self):
+        """停止等待并关闭浏览器"""
+        self.cleanup()
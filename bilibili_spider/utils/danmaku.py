@@ -0,0 +1,169 @@
+# bilibili_spider/utils/danmaku.py
+
+"""弹幕分段接口(seg.so)的protobuf解码
+
+响应体是DmSegMobileReply消息，字段1为重复的DanmakuElem。这里按wire格式手工解码，
+不依赖protobuf运行库: 逐条弹幕解析并以元组产出，不构造中间的消息对象，
+只保留入库需要的字段，其余字段直接跳过。
+"""
+
+# 解码后弹幕元组的字段，顺序即元组下标
+DANMAKU_FIELDS = (
+    'dmid', 'progress', 'mode', 'fontsize', 'color', 'mid_hash', 'content', 'ctime', 'weight', 'pool'
+)
+
+# DanmakuElem的字段号到元组下标，未列出的字段(action、idStr、attr等)跳过
+_FIELD_INDEX = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6, 8: 7, 9: 8, 11: 9}
+_STRING_FIELDS = {6, 7}
+
+# 按proto3语义，值为0或空串的字段不出现在编码中
+_DEFAULTS = (0, 0, 0, 0, 0, '', '', 0, 0, 0)
+
+# 负的int32/int64按64位补码编码为10字节varint
+_INT64_SIGN = 1 << 63
+_UINT64 = 1 << 64
+
+SEGMENT_SECONDS = 360  # 每个分段覆盖的视频时长(秒)
+
+
+def read_varint(data, pos):
+    """读取一个varint
+
+    @param {bytes} data - 数据
+    @param {int} pos - 起始位置
+    @return {tuple} - (值, 下一个位置)
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise ValueError("varint超过10字节")
+
+
+def skip_field(data, pos, wire_type):
+    """跳过一个字段的值
+
+    @param {bytes} data - 数据
+    @param {int} pos - 值的起始位置
+    @param {int} wire_type - wire类型
+    @return {int} - 下一个位置
+    """
+    if wire_type == 0:
+        while data[pos] >= 0x80:
+            pos += 1
+        return pos + 1
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = read_varint(data, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"不支持的wire类型: {wire_type}")
+
+
+def decode_elem(data, pos, end):
+    """解码一条DanmakuElem
+
+    @param {bytes} data - 数据
+    @param {int} pos - 消息的起始位置
+    @param {int} end - 消息的结束位置
+    @return {tuple} - 与DANMAKU_FIELDS顺序一致的弹幕元组
+    """
+    row = list(_DEFAULTS)
+    while pos < end:
+        key = data[pos]
+        if key < 0x80:
+            pos += 1
+        else:
+            key, pos = read_varint(data, pos)
+        field = key >> 3
+        wire_type = key & 7
+
+        index = _FIELD_INDEX.get(field)
+        if index is None:
+            pos = skip_field(data, pos, wire_type)
+        elif wire_type == 0:
+            # 绝大多数小整数只占一个字节
+            value = data[pos]
+            if value < 0x80:
+                pos += 1
+            else:
+                value, pos = read_varint(data, pos)
+                if value >= _INT64_SIGN:
+                    value -= _UINT64
+            row[index] = value
+        elif wire_type == 2 and field in _STRING_FIELDS:
+            length, pos = read_varint(data, pos)
+            row[index] = data[pos:pos + length].decode('utf-8', 'replace')
+            pos += length
+        else:
+            pos = skip_field(data, pos, wire_type)
+
+    if pos != end:
+        raise ValueError("弹幕消息长度与内容不符")
+    return tuple(row)
+
+
+def iter_danmaku(data):
+    """逐条解码一个分段中的弹幕
+
+    @param {bytes} data - seg.so接口返回的响应体
+    @return {generator} - 与DANMAKU_FIELDS顺序一致的弹幕元组
+    """
+    data = bytes(data)
+    pos = 0
+    end = len(data)
+    while pos < end:
+        key = data[pos]
+        if key < 0x80:
+            pos += 1
+        else:
+            key, pos = read_varint(data, pos)
+
+        if key == 0x0a:  # 字段1，长度分隔
+            length, pos = read_varint(data, pos)
+            if pos + length > end:
+                raise ValueError("弹幕分段数据不完整")
+            yield decode_elem(data, pos, pos + length)
+            pos += length
+        else:
+            pos = skip_field(data, pos, key & 7)
+
+
+def _encode_varint(value):
+    if value < 0:
+        value += _UINT64
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_segment(rows):
+    """将弹幕元组编码为DmSegMobileReply，用于生成测试数据
+
+    @param {iterable} rows - 与DANMAKU_FIELDS顺序一致的弹幕元组
+    @return {bytes} - protobuf编码的分段
+    """
+    fields = sorted(_FIELD_INDEX.items())
+    out = bytearray()
+    for row in rows:
+        elem = bytearray()
+        for field, index in fields:
+            value = row[index]
+            if field in _STRING_FIELDS:
+                raw = value.encode('utf-8')
+                elem += _encode_varint(field << 3 | 2) + _encode_varint(len(raw)) + raw
+            elif value:
+                elem += _encode_varint(field << 3) + _encode_varint(value)
+        out += b'\x0a' + _encode_varint(len(elem)) + elem
+    return bytes(out)
@@ -0,0 +1,123 @@
+# bilibili_spider/utils/dedup.py
+
+"""评论去重工具
+
+用MinHash估计两条评论字符n-gram集合的Jaccard相似度，再用LSH分段:
+签名被切成若干段，每段哈希为一个桶键，任意一段桶键相同的评论视为近似重复。
+桶键由DatabaseHandler保存在lsh_buckets表中，入库时增量查找和写入。
+
+安装numpy时签名计算是向量化的，否则退回到纯Python实现，两者结果完全一致，
+因此已保存的索引不受运行环境影响。
+"""
+
+import re
+import zlib
+import random
+import struct
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 归一化时去掉空白、标点和符号，只比较文字内容
+NORMALIZE_PATTERN = re.compile(r'[\W_]+')
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def stable_hash(data):
+    """计算与进程无关的64位有符号哈希，可直接作为SQLite整数保存
+
+    @param {bytes} data - 待哈希数据
+    @return {int} - 64位有符号整数
+    """
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+class MinHashIndex:
+    """MinHash签名与LSH桶键计算
+
+    只负责计算，不保存状态；桶键的存储和查找由DatabaseHandler完成。
+    相似度阈值约为(1/bands)^(1/rows)，默认8段每段4行时约为0.6。
+    """
+
+    def __init__(self, bands=8, rows=4, shingle_size=3, min_length=5, seed=1):
+        """初始化
+
+        @param {int} bands - LSH段数
+        @param {int} rows - 每段的签名行数
+        @param {int} shingle_size - 字符n-gram长度
+        @param {int} min_length - 归一化后短于该长度的评论不参与去重
+        @param {int} seed - 生成哈希参数的随机种子，修改后已有索引失效
+        """
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.min_length = min_length
+
+        # 参数a小于2^31，使a*h+b在uint64范围内不会溢出
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, 1 << 31) for _ in range(bands * rows)]
+        self.b = [rng.randrange(0, MERSENNE_PRIME) for _ in range(bands * rows)]
+        if np is not None:
+            self.a_array = np.array(self.a, dtype=np.uint64)[:, None]
+            self.b_array = np.array(self.b, dtype=np.uint64)[:, None]
+        self.band_format = struct.Struct(f'<B{rows}Q')
+
+    def normalize(self, text):
+        """归一化评论内容
+
+        @param {string} text - 评论内容
+        @return {string} - 去掉空白和标点并转为小写后的内容
+        """
+        return NORMALIZE_PATTERN.sub('', text).lower()
+
+    def shingles(self, text):
+        """计算字符n-gram的32位哈希集合
+
+        @param {string} text - 归一化后的内容
+        @return {set} - n-gram哈希集合
+        """
+        size = min(self.shingle_size, len(text))
+        return {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+
+    def signature(self, shingles):
+        """计算MinHash签名
+
+        @param {set} shingles - n-gram哈希集合
+        @return {list} - 长度为bands*rows的签名
+        """
+        if np is not None:
+            hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))[None, :]
+            return ((self.a_array * hashes + self.b_array) % MERSENNE_PRIME).min(axis=1).tolist()
+        return [min((a * h + b) % MERSENNE_PRIME for h in shingles) for a, b in zip(self.a, self.b)]
+
+    def band_keys(self, signature):
+        """将签名切段并计算每段的桶键
+
+        @param {list} signature - MinHash签名
+        @return {list} - 每段一个64位整数桶键
+        """
+        rows = self.rows
+        return [
+            stable_hash(self.band_format.pack(band, *signature[band * rows:(band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def content_hash(self, text):
+        """计算归一化内容的哈希，用于识别完全重复的评论
+
+        @param {string} text - 归一化后的内容
+        @return {int} - 64位有符号整数
+        """
+        return stable_hash(text.encode('utf-8'))
+
+    def lsh_keys(self, text):
+        """计算归一化内容的LSH桶键
+
+        @param {string} text - 归一化后的内容
+        @return {list} - 每段一个64位整数桶键
+        """
+        return self.band_keys(self.signature(self.shingles(text)))
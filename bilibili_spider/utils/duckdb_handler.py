@@ -0,0 +1,469 @@
+# bilibili_spider/utils/duckdb_handler.py
+
+"""DuckDB存储后端
+
+DuckDB是嵌入式的列式数据库，统计、排序和模糊搜索这类需要扫描整列的查询
+比SQLite快得多，适合评论量很大、以查询分析为主的数据库。
+只实现StorageBackend的核心接口，监控、分析和去重等扩展功能需使用SQLite后端。
+duckdb为可选依赖，只在选择该后端时才需要安装。
+"""
+
+import csv
+import json
+import threading
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from bilibili_spider.utils.storage import StorageBackend, QueryCancelled
+
+
+class DuckDBHandler(StorageBackend):
+    """DuckDB存储后端"""
+
+    EXPORT_BATCH_SIZE = 10000
+
+    def __init__(self, db_file):
+        """初始化数据库处理器
+
+        @param {string} db_file - 数据库文件路径
+        """
+        if duckdb is None:
+            raise ImportError("使用DuckDB存储需要安装duckdb: pip install duckdb")
+
+        self.db_file = db_file
+        self.logger = self._setup_logger()
+        # DuckDB同一文件只允许一个实例写入，进程内共用一个连接，各操作使用独立游标
+        self.conn = duckdb.connect(db_file)
+        self.conn_lock = threading.Lock()
+        self.init_db()
+
+    @contextmanager
+    def get_connection(self):
+        """获取独立游标，游标可在创建它的线程中安全使用"""
+        with self.conn_lock:
+            cursor = self.conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def init_db(self):
+        """初始化数据库结构"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('CREATE SEQUENCE IF NOT EXISTS comments_id_seq')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS comments (
+                        id BIGINT PRIMARY KEY DEFAULT nextval('comments_id_seq'),
+                        video_id VARCHAR NOT NULL,
+                        video_title VARCHAR NOT NULL,
+                        comment_id VARCHAR NOT NULL UNIQUE,
+                        user_name VARCHAR NOT NULL,
+                        content VARCHAR NOT NULL,
+                        publish_time VARCHAR NOT NULL,
+                        like_count INTEGER DEFAULT 0,
+                        replies VARCHAR,
+                        create_time VARCHAR NOT NULL,
+                        update_time VARCHAR NOT NULL
+                    )
+                ''')
+
+                conn.execute('CREATE SEQUENCE IF NOT EXISTS cookie_manager_id_seq')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cookie_manager (
+                        id BIGINT PRIMARY KEY DEFAULT nextval('cookie_manager_id_seq'),
+                        cookie VARCHAR NOT NULL UNIQUE,
+                        create_time VARCHAR NOT NULL,
+                        expire_time VARCHAR NOT NULL,
+                        last_check_time VARCHAR NOT NULL,
+                        is_valid INTEGER DEFAULT 1,
+                        success_count INTEGER DEFAULT 0,
+                        fail_count INTEGER DEFAULT 0,
+                        avg_latency DOUBLE DEFAULT 0,
+                        cooldown_until VARCHAR,
+                        last_used_time VARCHAR
+                    )
+                ''')
+                self.logger.info("DuckDB表结构初始化成功")
+
+        except Exception as e:
+            self.logger.error(f"初始化数据库失败: {str(e)}")
+            raise
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def save_cookie(self, cookie, expire_days=30, exclusive=False):
+        try:
+            with self.get_connection() as conn:
+                conn.begin()
+                if exclusive:
+                    conn.execute('UPDATE cookie_manager SET is_valid = 0')
+
+                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                expire_time = (datetime.now() + timedelta(days=expire_days)).strftime('%Y-%m-%d %H:%M:%S')
+                conn.execute('''
+                    INSERT INTO cookie_manager (
+                        cookie, create_time, expire_time, last_check_time, is_valid
+                    ) VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT (cookie) DO UPDATE SET
+                        create_time = excluded.create_time,
+                        expire_time = excluded.expire_time,
+                        last_check_time = excluded.last_check_time,
+                        is_valid = 1,
+                        cooldown_until = NULL
+                ''', (cookie, current_time, expire_time, current_time))
+                conn.commit()
+                self.logger.info("Cookie已成功保存到数据库")
+
+        except Exception as e:
+            self.logger.error(f"保存Cookie失败: {str(e)}")
+            raise
+
+    def get_valid_cookie(self):
+        try:
+            with self.get_connection() as conn:
+                result = conn.execute('''
+                    SELECT cookie, expire_time, create_time
+                    FROM cookie_manager
+                    WHERE is_valid = 1
+                    ORDER BY create_time DESC
+                    LIMIT 1
+                ''').fetchone()
+
+                if not result:
+                    self.logger.info("数据库中未找到有效的Cookie")
+                    return None, True
+
+                cookie, expire_time, create_time = result
+                self.logger.info(f"找到Cookie记录，创建时间: {create_time}")
+                expire_time = datetime.strptime(expire_time, '%Y-%m-%d %H:%M:%S')
+                return cookie, datetime.now() + timedelta(days=3) > expire_time
+
+        except Exception as e:
+            self.logger.error(f"获取Cookie失败: {str(e)}")
+            raise
+
+    def get_cookie_pool(self):
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    SELECT id, cookie, expire_time, success_count, fail_count,
+                           avg_latency, cooldown_until, last_used_time
+                    FROM cookie_manager
+                    WHERE is_valid = 1 AND expire_time > ?
+                    ORDER BY create_time DESC
+                ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+                columns = [description[0] for description in conn.description]
+                return [dict(zip(columns, row)) for row in conn.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"获取Cookie池失败: {str(e)}")
+            raise
+
+    def record_cookie_usage(self, usages):
+        try:
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    UPDATE cookie_manager
+                    SET success_count = success_count + ?,
+                        fail_count = fail_count + ?,
+                        avg_latency = ?,
+                        cooldown_until = COALESCE(?, cooldown_until),
+                        last_used_time = ?
+                    WHERE id = ?
+                ''', [(
+                    usage['success_count'],
+                    usage['fail_count'],
+                    usage['avg_latency'],
+                    usage['cooldown_until'],
+                    usage['last_used_time'],
+                    usage['id']
+                ) for usage in usages])
+
+        except Exception as e:
+            self.logger.error(f"记录Cookie使用情况失败: {str(e)}")
+
+    def set_cookie_valid(self, cookie_id, is_valid):
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    UPDATE cookie_manager
+                    SET is_valid = ?,
+                        last_check_time = ?
+                    WHERE id = ?
+                ''', (1 if is_valid else 0, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), cookie_id))
+
+        except Exception as e:
+            self.logger.error(f"更新Cookie状态失败: {str(e)}")
+            raise
+
+    def clear_cookies(self):
+        try:
+            with self.get_connection() as conn:
+                conn.execute('DELETE FROM cookie_manager')
+                self.logger.info("已清除所有Cookie记录")
+
+        except Exception as e:
+            self.logger.error(f"清除Cookie失败: {str(e)}")
+            raise
+
+    def save_comment(self, comment):
+        try:
+            with self.get_connection() as conn:
+                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                replies = json.dumps(comment.replies, ensure_ascii=False)
+
+                conn.begin()
+                exists = conn.execute(
+                    'SELECT id FROM comments WHERE comment_id = ?', (comment.comment_id,)
+                ).fetchone()
+
+                if exists:
+                    conn.execute('''
+                        UPDATE comments
+                        SET user_name = ?,
+                            content = ?,
+                            publish_time = ?,
+                            like_count = ?,
+                            replies = ?,
+                            video_title = ?,
+                            update_time = ?
+                        WHERE id = ?
+                    ''', (
+                        comment.user_name,
+                        comment.content,
+                        comment.publish_time,
+                        comment.like_count,
+                        replies,
+                        comment.video_title,
+                        current_time,
+                        exists[0]
+                    ))
+                    conn.commit()
+                    return 2  # 更新成功
+
+                conn.execute('''
+                    INSERT INTO comments (
+                        video_id, video_title, comment_id, user_name, content,
+                        publish_time, like_count, replies, create_time, update_time
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    comment.video_id,
+                    comment.video_title,
+                    comment.comment_id,
+                    comment.user_name,
+                    comment.content,
+                    comment.publish_time,
+                    comment.like_count,
+                    replies,
+                    current_time,
+                    current_time
+                ))
+                conn.commit()
+                return 1  # 新增成功
+
+        except Exception as e:
+            self.logger.error(f"保存评论失败: {str(e)}")
+            return 0  # 保存失败
+
+    def get_existing_comment_ids(self, comment_ids, video_id=None):
+        comment_ids = [str(comment_id) for comment_id in comment_ids]
+        if not comment_ids:
+            return set()
+
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    f"SELECT comment_id FROM comments WHERE comment_id IN ({','.join('?' * len(comment_ids))})",
+                    comment_ids
+                )
+                return {row[0] for row in conn.fetchall()}
+
+        except Exception as e:
+            self.logger.error(f"查询已存在评论失败: {str(e)}")
+            raise
+
+    def get_existing_video_ids(self, video_ids):
+        video_ids = list(video_ids)
+        if not video_ids:
+            return set()
+
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    f"SELECT DISTINCT video_id FROM comments WHERE video_id IN ({','.join('?' * len(video_ids))})",
+                    video_ids
+                )
+                return {row[0] for row in conn.fetchall()}
+
+        except Exception as e:
+            self.logger.error(f"查询已爬取视频失败: {str(e)}")
+            raise
+
+    def update_like_counts(self, like_counts, record_history=False):
+        """批量更新点赞数，DuckDB后端不记录点赞数历史"""
+        if not like_counts:
+            return 0
+
+        try:
+            with self.get_connection() as conn:
+                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                conn.begin()
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS like_updates (comment_id VARCHAR, like_count INTEGER)')
+                conn.execute('DELETE FROM like_updates')
+                conn.executemany('INSERT INTO like_updates VALUES (?, ?)', [
+                    (str(comment_id), like_count) for comment_id, like_count in like_counts.items()
+                ])
+                # 一条UPDATE完成整批更新，点赞数未变化的评论不做写入
+                updated = conn.execute('''
+                    UPDATE comments
+                    SET like_count = u.like_count,
+                        update_time = ?
+                    FROM like_updates u
+                    WHERE comments.comment_id = u.comment_id AND comments.like_count != u.like_count
+                ''', (current_time,)).fetchone()[0]
+                conn.commit()
+                return updated
+
+        except Exception as e:
+            self.logger.error(f"批量更新点赞数失败: {str(e)}")
+            return 0
+
+    def query_comments_batch(self, query_type, search_text='', batch_size=100, offset=0, sort_by='publish_time',
+                             sort_order='DESC', cancel_event=None):
+        """分批查询评论，列式扫描很快，取消事件只在查询开始前和结束后检查"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise QueryCancelled("查询已取消")
+        try:
+            with self.get_connection() as conn:
+                sort_field = {
+                    'publish_time': 'publish_time',
+                    'like_count': 'like_count',
+                    'replies': 'json_array_length(replies)'
+                }.get(sort_by, 'publish_time')
+                sort_order = 'DESC' if sort_order.upper() == 'DESC' else 'ASC'
+
+                where_clause = {
+                    '2': "WHERE video_id LIKE ?",  # 按视频ID搜索
+                    '3': "WHERE video_title LIKE ?",  # 按视频标题搜索
+                    '4': "WHERE user_name LIKE ?",  # 按用户名搜索
+                    '5': "WHERE content LIKE ?"  # 按评论内容搜索
+                }.get(query_type, "")
+                params = (f'%{search_text}%', batch_size, offset) if where_clause else (batch_size, offset)
+
+                conn.execute(f'''
+                    SELECT video_id, video_title, user_name, content, publish_time,
+                           like_count, replies, update_time
+                    FROM comments
+                    {where_clause}
+                    ORDER BY {sort_field} {sort_order}
+                    LIMIT ? OFFSET ?
+                ''', params)
+                results = conn.fetchall()
+
+        except Exception as e:
+            self.logger.error(f"分批查询评论失败: {str(e)}")
+            raise
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise QueryCancelled("查询已取消")
+        return results
+
+    def iter_comment_chunks(self, columns, chunk_size=10000):
+        valid_columns = {
+            'id', 'video_id', 'video_title', 'comment_id', 'user_name', 'content',
+            'publish_time', 'like_count', 'replies', 'create_time', 'update_time'
+        }
+        invalid = set(columns) - valid_columns
+        if invalid:
+            raise ValueError(f"未知的列: {', '.join(invalid)}")
+
+        sql = f'''
+            SELECT id, {', '.join(columns)}
+            FROM comments
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        '''
+
+        last_id = 0
+        with self.get_connection() as conn:
+            while True:
+                rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                yield [row[1:] for row in rows]
+
+    def get_all_comments(self):
+        try:
+            with self.get_connection() as conn:
+                return conn.execute('SELECT * FROM comments ORDER BY publish_time DESC').fetchall()
+
+        except Exception as e:
+            self.logger.error(f"获取所有评论失败: {str(e)}")
+            raise
+
+    def clear_database(self):
+        try:
+            with self.get_connection() as conn:
+                conn.execute('DELETE FROM comments')
+                # 删除的数据在检查点时才会释放空间
+                conn.execute('CHECKPOINT')
+                self.logger.info("数据库评论数据已清空")
+
+        except Exception as e:
+            self.logger.error(f"清空数据库失败: {str(e)}")
+            raise
+
+    def get_statistics(self):
+        """获取数据库统计信息，一次扫描完成全部聚合"""
+        try:
+            with self.get_connection() as conn:
+                total_comments, total_videos, total_users, latest_comment = conn.execute('''
+                    SELECT COUNT(*), COUNT(DISTINCT video_id), COUNT(DISTINCT user_name), MAX(create_time)
+                    FROM comments
+                ''').fetchone()
+                return {
+                    'total_comments': total_comments,
+                    'total_videos': total_videos,
+                    'total_users': total_users,
+                    'latest_comment': latest_comment
+                }
+
+        except Exception as e:
+            self.logger.error(f"获取统计信息失败: {str(e)}")
+            return {
+                'total_comments': 0,
+                'total_videos': 0,
+                'total_users': 0,
+                'latest_comment': None
+            }
+
+    def export_comments_to_csv(self, file_path):
+        """将评论数据分批写入CSV文件"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('SELECT * FROM comments ORDER BY publish_time DESC')
+                rows = conn.fetchmany(self.EXPORT_BATCH_SIZE)
+                if not rows:
+                    return
+
+                columns = [description[0] for description in conn.description]
+                with open(file_path, 'w', newline='', encoding='utf-8-sig') as csv_file:
+                    writer = csv.writer(csv_file)
+                    writer.writerow(columns)
+                    while rows:
+                        writer.writerows(rows)
+                        rows = conn.fetchmany(self.EXPORT_BATCH_SIZE)
+
+        except Exception as e:
+            self.logger.error(f"导出CSV文件失败: {str(e)}")
+            raise
@@ -0,0 +1,109 @@
+# bilibili_spider/utils/http2.py
+
+"""HTTP/2传输
+
+HTTP/1.1下一个连接同时只能有一个请求，并发爬取时每个线程各占一个连接。
+HTTP/2在一个连接上同时传输多个请求，这里用httpx把全部并发请求分摊到少数几个连接上多路复用。
+对外提供与requests.Session相同的get()接口和响应属性，网络异常转换为requests的异常类型，
+爬虫中的重试、风控判断和传输统计不需要区分传输方式。
+"""
+
+import itertools
+import threading
+
+import requests
+
+# 未安装httpx或h2时只能使用HTTP/1.1，httpx的http2=True依赖h2
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+
+class Http2Response:
+    """httpx响应的包装，提供爬虫用到的requests.Response属性"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = response.content
+        self.http_version = response.http_version
+        self.num_bytes_downloaded = response.num_bytes_downloaded  # 解压前的字节数
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {self.reason} for url: {self.url}", response=self
+            )
+
+    def close(self):
+        pass
+
+
+class Http2Session:
+    """在固定数量的HTTP/2连接上多路复用请求
+
+    每个连接对应一个最多只建立一个连接的httpx客户端，请求按轮转分配到各个连接，
+    同一连接上的并发请求作为不同的流同时传输。服务器不支持HTTP/2时httpx自动退回HTTP/1.1。
+    httpx的代理按客户端设置，经代理的请求使用按代理地址分别创建的一组客户端。
+    """
+
+    def __init__(self, connections=2, http1=True):
+        """初始化
+
+        @param {int} connections - 连接数
+        @param {bool} http1 - 是否允许退回HTTP/1.1，为False时对http://地址直接以HTTP/2明文通信
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2传输需要安装httpx和h2: pip install httpx[http2]")
+
+        self.connections = max(connections, 1)
+        self.http1 = http1
+        self.clients = self.create_clients()
+        self.proxy_clients = {}  # 代理地址到客户端列表
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+
+    def create_clients(self, proxy=None):
+        limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+        return [httpx.Client(http1=self.http1, http2=True, limits=limits, proxy=proxy)
+                for _ in range(self.connections)]
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=True, proxies=None, **kwargs):
+        """发送GET请求
+
+        @param {string} url - 请求地址
+        @param {dict} headers - 请求头
+        @param {tuple} timeout - (连接超时, 读取超时)或单个秒数，与requests一致
+        @param {bool} allow_redirects - 是否跟随跳转
+        @param {dict} proxies - 协议到代理地址的映射，与requests一致
+        @return {Http2Response} - 已读取完的响应
+        """
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+        clients = self.clients
+        proxy = (proxies or {}).get(url.split(':', 1)[0])
+        if proxy:
+            with self.lock:
+                clients = self.proxy_clients.get(proxy)
+                if clients is None:
+                    clients = self.proxy_clients[proxy] = self.create_clients(proxy)
+
+        # itertools.count的next()在多线程下是原子的
+        client = clients[next(self.counter) % len(clients)]
+        try:
+            response = client.get(url, headers=headers, timeout=timeout, follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        return Http2Response(response)
+
+    def close(self):
+        for clients in [self.clients, *self.proxy_clients.values()]:
+            for client in clients:
+                client.close()
@@ -0,0 +1,42 @@
+# bilibili_spider/utils/rate_limit.py
+
+import time
+import random
+import threading
+
+
+class RateLimiter:
+    """多个线程共享的请求间隔限制
+
+    每次发放许可后，下一次许可至少间隔一个在[min_interval, max_interval]内随机取的时间，
+    并发线程只是重叠了各自请求的网络耗时，总的请求频率与单线程顺序爬取时相同。
+    """
+
+    def __init__(self, min_interval, max_interval=None):
+        """初始化
+
+        @param {float} min_interval - 相邻请求的最小间隔(秒)
+        @param {float} max_interval - 相邻请求的最大间隔(秒)，为空时与最小间隔相同
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval if max_interval is not None else min_interval
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """等待下一个请求许可
+
+        @param {Event} stop_event - 设置后立即结束等待
+        @return {bool} - 是否取得许可，等待期间被要求停止时为False
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + random.uniform(self.min_interval, self.max_interval)
+
+        delay = slot - now
+        if stop_event is not None:
+            return not stop_event.wait(delay) if delay > 0 else not stop_event.is_set()
+        if delay > 0:
+            time.sleep(delay)
+        return True
@@ -0,0 +1,286 @@
+# bilibili_spider/utils/response_cache.py
+
+"""接口原始响应的磁盘缓存
+
+每个响应体按内容哈希压缩存放在objects目录下，相同内容只存一份；
+index.db记录请求地址到内容哈希的映射、抓取时间和最近访问时间，
+超过有效期的条目和超出容量时最久未访问的条目会被淘汰。
+回放模式只从缓存读取，不访问网络，可在解析逻辑修改后离线重建数据库。
+"""
+
+import os
+import time
+import zlib
+import hashlib
+import sqlite3
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from bilibili_spider.utils.transfer import loads
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CacheMiss(LookupError):
+    """回放模式下请求的地址不在缓存中"""
+
+
+class ResponseCache:
+    """内容寻址的接口响应缓存"""
+
+    # 每次请求都会变化、不影响响应内容的查询参数，计算缓存键时忽略
+    VOLATILE_PARAMS = {'w_rid', 'wts', '_'}
+
+    # 每写入多少条后检查一次容量
+    EVICT_EVERY = 100
+
+    def __init__(self, cache_dir='response_cache', ttl_seconds=7 * 86400, max_bytes=512 * 1024 * 1024,
+                 replay=False, level=3):
+        """打开或创建缓存目录
+
+        @param {string} cache_dir - 缓存目录
+        @param {int} ttl_seconds - 条目的有效期(秒)，0表示不过期
+        @param {int} max_bytes - 压缩后响应体的总字节数上限
+        @param {bool} replay - 是否为回放模式，回放模式只读缓存且不淘汰过期条目
+        @param {int} level - 压缩级别
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self.pending_writes = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('BilibiliSpider')
+
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                fetch_time REAL NOT NULL,
+                access_time REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(access_time)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_fetch ON entries(fetch_time)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest)')
+        self.conn.commit()
+
+        if not replay:
+            self.evict()
+
+    @classmethod
+    def from_config(cls, config):
+        """按配置创建缓存，未启用时返回None
+
+        @param {Config} config - 配置对象
+        @return {ResponseCache} - 缓存实例
+        """
+        if config.RESPONSE_CACHE_MODE not in ('record', 'replay'):
+            return None
+        return cls(
+            config.RESPONSE_CACHE_DIR,
+            config.RESPONSE_CACHE_TTL,
+            config.RESPONSE_CACHE_MAX_BYTES,
+            replay=config.RESPONSE_CACHE_MODE == 'replay'
+        )
+
+    @classmethod
+    def cache_key(cls, url):
+        """计算请求地址的缓存键，查询参数按名称排序并去掉易变参数
+
+        @param {string} url - 请求地址
+        @return {string} - 缓存键
+        """
+        parts = urlsplit(url)
+        query = sorted((name, value) for name, value in parse_qsl(parts.query) if name not in cls.VOLATILE_PARAMS)
+        return f"{parts.netloc}{parts.path}?{urlencode(query)}"
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest)
+
+    def put(self, url, body):
+        """保存一个响应体
+
+        @param {string} url - 请求地址
+        @param {bytes} body - 原始响应体
+        """
+        digest = hashlib.blake2b(body, digest_size=20).hexdigest()
+        now = time.time()
+
+        with self.lock:
+            exists = self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if not exists:
+                if zstandard is not None:
+                    codec, data = 'zstd', zstandard.ZstdCompressor(level=self.level).compress(body)
+                else:
+                    codec, data = 'zlib', zlib.compress(body, min(self.level, 9))
+                path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # 先写临时文件再重命名，中途退出不会留下不完整的内容
+                with open(path + '.tmp', 'wb') as blob_file:
+                    blob_file.write(data)
+                os.replace(path + '.tmp', path)
+                self.conn.execute('INSERT INTO blobs (digest, codec, size) VALUES (?, ?, ?)',
+                                  (digest, codec, len(data)))
+
+            self.conn.execute('''
+                INSERT OR REPLACE INTO entries (key, url, digest, fetch_time, access_time)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (self.cache_key(url), url, digest, now, now))
+            self.conn.commit()
+            self.pending_writes += 1
+            due = self.pending_writes >= self.EVICT_EVERY
+
+        if due:
+            self.evict()
+
+    def _read_blob(self, digest):
+        """读取并解压一个响应体"""
+        codec = self.conn.execute('SELECT codec FROM blobs WHERE digest = ?', (digest,)).fetchone()[0]
+        with open(self._blob_path(digest), 'rb') as blob_file:
+            data = blob_file.read()
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ImportError("读取zstd缓存需要安装zstandard: pip install zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def get(self, url):
+        """读取缓存的响应体，回放模式下忽略有效期
+
+        @param {string} url - 请求地址
+        @return {bytes} - 原始响应体，未命中或已过期时为None
+        """
+        key = self.cache_key(url)
+        with self.lock:
+            row = self.conn.execute('SELECT digest, fetch_time FROM entries WHERE key = ?', (key,)).fetchone()
+            expired = row and not self.replay and self.ttl_seconds and row[1] < time.time() - self.ttl_seconds
+            if not row or expired:
+                self.misses += 1
+                return None
+
+            try:
+                body = self._read_blob(row[0])
+            except (OSError, zlib.error, TypeError) as e:
+                self.logger.warning(f"缓存内容损坏，已丢弃: {url} ({str(e)})")
+                self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.conn.commit()
+                self.misses += 1
+                return None
+
+            if not self.replay:
+                self.conn.execute('UPDATE entries SET access_time = ? WHERE key = ?', (time.time(), key))
+                self.conn.commit()
+            self.hits += 1
+            return body
+
+    def get_json(self, url):
+        """回放模式下读取缓存的JSON响应
+
+        @param {string} url - 请求地址
+        @return {dict} - 解析后的JSON数据
+        """
+        body = self.get(url)
+        if body is None:
+            raise CacheMiss(f"缓存中没有该请求: {url}")
+        return loads(body)
+
+    def iter_entries(self, path_prefix=''):
+        """按抓取时间顺序遍历缓存条目，用于离线回放
+
+        @param {string} path_prefix - 只返回接口路径以此开头的条目，如/x/v2/reply
+        @return {generator} - (请求地址, 原始响应体)
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT url, digest FROM entries ORDER BY fetch_time').fetchall()
+
+        for url, digest in rows:
+            if not urlsplit(url).path.startswith(path_prefix):
+                continue
+            with self.lock:
+                try:
+                    body = self._read_blob(digest)
+                except (OSError, zlib.error, TypeError) as e:
+                    self.logger.warning(f"缓存内容损坏，已跳过: {url} ({str(e)})")
+                    continue
+            yield url, body
+
+    def evict(self):
+        """删除过期条目，再按最近访问时间淘汰超出容量的条目，最后删除不再被引用的响应体
+
+        @return {int} - 删除的响应体数
+        """
+        with self.lock:
+            self.pending_writes = 0
+            if self.ttl_seconds:
+                self.conn.execute('DELETE FROM entries WHERE fetch_time < ?', (time.time() - self.ttl_seconds,))
+
+            total = self.conn.execute('''
+                SELECT IFNULL(SUM(size), 0) FROM blobs
+                WHERE digest IN (SELECT digest FROM entries)
+            ''').fetchone()[0]
+            if total > self.max_bytes:
+                # 按访问时间从旧到新累计，只有最后一次引用被删除的响应体才释放空间
+                rows = self.conn.execute('''
+                    SELECT e.key, e.digest, b.size,
+                           (SELECT MAX(access_time) FROM entries WHERE digest = e.digest) AS last_access
+                    FROM entries e JOIN blobs b ON b.digest = e.digest
+                    ORDER BY last_access, e.access_time
+                ''').fetchall()
+                released = set()
+                keys = []
+                for key, digest, size, _ in rows:
+                    if total <= self.max_bytes:
+                        break
+                    keys.append((key,))
+                    if digest not in released:
+                        released.add(digest)
+                        total -= size
+                self.conn.executemany('DELETE FROM entries WHERE key = ?', keys)
+
+            orphans = self.conn.execute('''
+                SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)
+            ''').fetchall()
+            for (digest,) in orphans:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+            self.conn.executemany('DELETE FROM blobs WHERE digest = ?', orphans)
+            self.conn.commit()
+
+        if orphans:
+            self.logger.info(f"响应缓存已淘汰 {len(orphans)} 个响应体")
+        return len(orphans)
+
+    def get_stats(self):
+        """获取缓存的条目数、响应体数、占用字节数和命中情况
+
+        @return {dict} - 缓存统计
+        """
+        with self.lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            blobs, size = self.conn.execute('SELECT COUNT(*), IFNULL(SUM(size), 0) FROM blobs').fetchone()
+        return {'entries': entries, 'blobs': blobs, 'size': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
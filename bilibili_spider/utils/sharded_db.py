@@ -0,0 +1,474 @@
+# bilibili_spider/utils/sharded_db.py
+
+"""分片存储
+
+评论按视频或发布月份写入独立的分片文件，每个分片都是一个普通的评论数据库，
+不同分片的写入互不阻塞，删除或归档一个分片只是删除或移动一个文件。
+Cookie、代理池、监控列表、弹幕、短链接缓存和分析结果等其余数据仍保存在主数据库中。
+
+跨分片查询有两种方式:
+  - 线程池: 在各分片上并发执行同一查询，再按排序键归并结果
+  - ATTACH: 在主数据库连接上逐个挂载分片，聚合结果写入临时表后在SQLite中汇总，
+    用于需要跨分片去重计数的统计
+"""
+
+import os
+import re
+import csv
+import json
+import heapq
+import shutil
+import threading
+from itertools import islice
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.archive import ARCHIVE_COLUMNS
+
+
+class ShardedDatabaseHandler(DatabaseHandler):
+    """按视频或月份分片存储评论的数据库处理器"""
+
+    SHARD_MODES = ('video', 'month')
+    SHARD_PREFIX = 'comments_'
+    MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}')
+
+    def __init__(self, db_file, shard_dir='shards', shard_by='month', workers=4):
+        """初始化并加载已有分片
+
+        @param {string} db_file - 主数据库文件路径
+        @param {string} shard_dir - 分片文件目录
+        @param {string} shard_by - 分片方式: video或month
+        @param {int} workers - 跨分片查询的并发线程数
+        """
+        if shard_by not in self.SHARD_MODES:
+            raise ValueError(f"不支持的分片方式: {shard_by}")
+
+        self.shard_dir = shard_dir
+        self.shard_by = shard_by
+        self.workers = workers
+        self.shards = {}
+        self.shard_lock = threading.Lock()
+        self.shard_dir_mtime = None
+        super().__init__(db_file)
+
+        os.makedirs(shard_dir, exist_ok=True)
+        with self.shard_lock:
+            self._scan_shards()
+
+        self.logger.info(f"分片存储已加载 {len(self.shards)} 个分片，分片方式: {shard_by}")
+
+    def enable_dedup(self, config):
+        """按配置启用评论去重，去重范围为单个分片"""
+        super().enable_dedup(config)
+        with self.shard_lock:
+            for shard in self.shards.values():
+                shard.dedup_index = self.dedup_index
+                shard.dedup_skip_exact = self.dedup_skip_exact
+
+    def shard_key(self, comment):
+        """计算评论所属的分片
+
+        @param {Comment} comment - 评论对象
+        @return {string} - 分片键，按视频分片时为视频ID，按月分片时为YYYY-MM
+        """
+        if self.shard_by == 'video':
+            return self.video_shard_key(comment.video_id)
+        match = self.MONTH_PATTERN.match(comment.publish_time or '')
+        return match.group(0) if match else 'unknown'
+
+    @staticmethod
+    def video_shard_key(video_id):
+        """按视频分片时视频ID对应的分片键，替换掉不能出现在文件名中的字符"""
+        return re.sub(r'[^\w-]', '_', video_id)
+
+    def shard_path(self, key):
+        """分片文件路径"""
+        return os.path.join(self.shard_dir, f'{self.SHARD_PREFIX}{key}.db')
+
+    def get_shard(self, key):
+        """获取分片，不存在时创建
+
+        @param {string} key - 分片键
+        @return {DatabaseHandler} - 分片的数据库处理器
+        """
+        with self.shard_lock:
+            shard = self.shards.get(key)
+            if shard is None:
+                shard = DatabaseHandler(self.shard_path(key))
+                shard.dedup_index = self.dedup_index
+                shard.dedup_skip_exact = self.dedup_skip_exact
+                self.shards[key] = shard
+                self.logger.info(f"创建分片: {key}")
+            return shard
+
+    def _scan_shards(self):
+        """按分片目录同步已加载的分片，调用方需持有shard_lock
+
+        其他进程(如独立的爬取进程)可能在同一目录中创建或删除分片，目录的修改时间变化时才重新列出文件。
+        """
+        try:
+            mtime = os.stat(self.shard_dir).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.shard_dir_mtime:
+            return
+        self.shard_dir_mtime = mtime
+
+        keys = set()
+        for name in sorted(os.listdir(self.shard_dir)):
+            if name.startswith(self.SHARD_PREFIX) and name.endswith('.db'):
+                key = name[len(self.SHARD_PREFIX):-len('.db')]
+                keys.add(key)
+                if key not in self.shards:
+                    shard = DatabaseHandler(os.path.join(self.shard_dir, name))
+                    shard.dedup_index = self.dedup_index
+                    shard.dedup_skip_exact = self.dedup_skip_exact
+                    self.shards[key] = shard
+        for key in set(self.shards) - keys:
+            del self.shards[key]
+
+    def _comment_stores(self):
+        with self.shard_lock:
+            self._scan_shards()
+            return list(self.shards.values())
+
+    def _fan_out(self, func):
+        """在所有分片上并发执行函数
+
+        @param {callable} func - 接收分片DatabaseHandler的函数
+        @return {list} - 各分片的返回值
+        """
+        shards = self._comment_stores()
+        if len(shards) <= 1:
+            return [func(shard) for shard in shards]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(shards))) as executor:
+            return list(executor.map(func, shards))
+
+    @contextmanager
+    def _attached(self, conn, shard):
+        """在连接上临时挂载一个分片，挂载名为shard
+
+        @param {Connection} conn - 主数据库连接
+        @param {DatabaseHandler} shard - 分片
+        """
+        conn.execute('ATTACH DATABASE ? AS shard', (shard.db_file,))
+        try:
+            yield
+        finally:
+            # 事务未结束时无法卸载
+            conn.commit()
+            conn.execute('DETACH DATABASE shard')
+
+    def list_shards(self):
+        """列出所有分片
+
+        @return {list} - (分片键, 文件大小字节)元组列表
+        """
+        with self.shard_lock:
+            self._scan_shards()
+            return [(key, os.path.getsize(shard.db_file)) for key, shard in sorted(self.shards.items())]
+
+    def drop_shard(self, key):
+        """删除一个分片的全部评论
+
+        @param {string} key - 分片键
+        """
+        with self.shard_lock:
+            shard = self.shards.pop(key)
+        os.remove(shard.db_file)
+        self.logger.info(f"已删除分片: {key}")
+
+    def archive_shard(self, key, archive_dir):
+        """将一个分片移出在线存储，之后的查询不再包含该分片
+
+        @param {string} key - 分片键
+        @param {string} archive_dir - 归档目录
+        @return {string} - 归档后的文件路径
+        """
+        os.makedirs(archive_dir, exist_ok=True)
+        with self.shard_lock:
+            shard = self.shards.pop(key)
+        target = shutil.move(shard.db_file, os.path.join(archive_dir, os.path.basename(shard.db_file)))
+        self.logger.info(f"已归档分片: {key} -> {target}")
+        return target
+
+    def archive_comments(self, before_time, page_size=1000, level=10):
+        """在每个分片内归档旧评论，返回汇总结果"""
+        result = {'comments': 0, 'pages': 0, 'raw_size': 0, 'compressed_size': 0}
+        for shard_result in self._fan_out(lambda shard: shard.archive_comments(before_time, page_size, level)):
+            for key in result:
+                result[key] += shard_result[key]
+        return result
+
+    def get_archive_stats(self):
+        stats = {'pages': 0, 'comments': 0, 'raw_size': 0, 'compressed_size': 0, 'cache_hits': 0, 'cache_misses': 0}
+        for shard_stats in self._fan_out(lambda shard: shard.get_archive_stats()):
+            for key in stats:
+                stats[key] += shard_stats[key]
+        stats['ratio'] = stats['raw_size'] / stats['compressed_size'] if stats['compressed_size'] else 0
+        return stats
+
+    def vacuum(self):
+        self._fan_out(lambda shard: shard.vacuum())
+        super().vacuum()
+
+    def save_comment(self, comment):
+        return self.get_shard(self.shard_key(comment)).save_comment(comment)
+
+    def get_existing_comment_ids(self, comment_ids, video_id=None):
+        """按视频分片且给出video_id时只查询该视频的分片，分片不存在时不创建；否则查询所有分片"""
+        comment_ids = [str(comment_id) for comment_id in comment_ids]
+        if not comment_ids:
+            return set()
+        if video_id and self.shard_by == 'video':
+            with self.shard_lock:
+                self._scan_shards()
+                shard = self.shards.get(self.video_shard_key(video_id))
+            return shard.get_existing_comment_ids(comment_ids) if shard else set()
+        return set().union(*self._fan_out(lambda shard: shard.get_existing_comment_ids(comment_ids)))
+
+    def get_existing_video_ids(self, video_ids):
+        video_ids = list(video_ids)
+        if not video_ids:
+            return set()
+        return set().union(*self._fan_out(lambda shard: shard.get_existing_video_ids(video_ids)))
+
+    def update_like_counts(self, like_counts, record_history=False):
+        if not like_counts:
+            return 0
+        return sum(self._fan_out(lambda shard: shard.update_like_counts(like_counts, record_history)))
+
+    def get_like_history(self, comment_id):
+        return sorted(history for result in self._fan_out(lambda shard: shard.get_like_history(comment_id))
+                      for history in result)
+
+    def get_user(self, mid):
+        """各分片都记录了自己评论的作者，取最近更新的一份"""
+        users = [user for user in self._fan_out(lambda shard: shard.get_user(mid)) if user]
+        return max(users, key=lambda user: user['update_time']) if users else None
+
+    def find_users(self, name, limit=50):
+        users = {}
+        for result in self._fan_out(lambda shard: shard.find_users(name, limit)):
+            for user in result:
+                known = users.get(user['mid'])
+                if known is None:
+                    users[user['mid']] = user
+                else:
+                    comment_count = known['comment_count'] + user['comment_count']
+                    if user['update_time'] > known['update_time']:
+                        users[user['mid']] = user
+                    users[user['mid']]['comment_count'] = comment_count
+        return sorted(users.values(), key=lambda user: user['name'])[:limit]
+
+    def get_user_comments(self, mid, batch_size=100, offset=0):
+        results = self._fan_out(lambda shard: shard.get_user_comments(mid, offset + batch_size, 0))
+        merged = heapq.merge(*results, key=lambda row: row[4], reverse=True)
+        return list(islice(merged, offset, offset + batch_size))
+
+    def query_comments_batch(self, query_type, search_text='', batch_size=100, offset=0, sort_by='publish_time',
+                             sort_order='DESC', cancel_event=None):
+        """跨分片分批查询评论
+
+        每个分片取前offset+batch_size条，按排序键归并后截取所需的一批，
+        翻页越深每个分片需要读取的行越多。取消事件传给每个分片，各分片的查询同时中止。
+        """
+        sort_keys = {
+            'publish_time': lambda row: row[4],
+            'like_count': lambda row: row[5],
+            'replies': lambda row: len(json.loads(row[6] or '[]'))
+        }
+        key = sort_keys.get(sort_by, sort_keys['publish_time'])
+
+        results = self._fan_out(lambda shard: shard.query_comments_batch(
+            query_type, search_text, offset + batch_size, 0, sort_by, sort_order, cancel_event
+        ))
+        merged = heapq.merge(*results, key=key, reverse=sort_order.upper() == 'DESC')
+        return list(islice(merged, offset, offset + batch_size))
+
+    def clear_database(self):
+        """删除所有分片文件"""
+        with self.shard_lock:
+            shards, self.shards = self.shards, {}
+        for shard in shards.values():
+            os.remove(shard.db_file)
+        super().clear_database()
+
+    def get_statistics(self):
+        """通过ATTACH逐个挂载分片汇总统计，视频和用户在临时表中跨分片去重"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('CREATE TEMP TABLE stat_videos (video_id TEXT PRIMARY KEY)')
+                cursor.execute('CREATE TEMP TABLE stat_users (user_key TEXT PRIMARY KEY)')
+
+                total_comments = 0
+                latest_comment = None
+                archived_comments = 0
+                for shard in self._comment_stores():
+                    with self._attached(conn, shard):
+                        cursor.execute('SELECT COUNT(*), MAX(create_time) FROM shard.comments')
+                        count, latest = cursor.fetchone()
+                        total_comments += count
+                        if latest and (latest_comment is None or latest > latest_comment):
+                            latest_comment = latest
+                        cursor.execute('INSERT OR IGNORE INTO stat_videos SELECT DISTINCT video_id FROM shard.comments')
+                        # 有mid的按mid去重，改名的用户只算一次
+                        cursor.execute(f'''
+                            INSERT OR IGNORE INTO stat_users
+                            SELECT DISTINCT {self.USER_KEY_SQL} FROM shard.comments c
+                        ''')
+                        cursor.execute('SELECT IFNULL(SUM(row_count), 0) FROM shard.comment_archive')
+                        archived_comments += cursor.fetchone()[0]
+
+                cursor.execute('SELECT COUNT(*) FROM stat_videos')
+                total_videos = cursor.fetchone()[0]
+                cursor.execute('SELECT COUNT(*) FROM stat_users')
+                total_users = cursor.fetchone()[0]
+
+                return {
+                    'total_comments': total_comments,
+                    'total_videos': total_videos,
+                    'total_users': total_users,
+                    'latest_comment': latest_comment,
+                    'archived_comments': archived_comments
+                }
+
+        except Exception as e:
+            self.logger.error(f"获取统计信息失败: {str(e)}")
+            return {
+                'total_comments': 0,
+                'total_videos': 0,
+                'total_users': 0,
+                'latest_comment': None,
+                'archived_comments': 0
+            }
+
+    def iter_comment_chunks(self, columns, chunk_size=10000):
+        """依次分块读取各分片的评论，不同分片的id可能重复"""
+        for shard in self._comment_stores():
+            yield from shard.iter_comment_chunks(columns, chunk_size)
+
+    def refresh_user_activity(self):
+        """通过ATTACH逐个挂载分片，先按用户和视频预聚合，再在临时表中汇总
+
+        各分片的users表只记录该分片中评论的作者，同一用户在不同分片中的名称可能不同，取最近更新的名称。
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TEMP TABLE partial_activity (
+                        user_key TEXT, user_name TEXT, name_time TEXT, video_id TEXT,
+                        comment_count INTEGER, total_likes INTEGER, first_time TEXT, last_time TEXT
+                    )
+                ''')
+                for shard in self._comment_stores():
+                    with self._attached(conn, shard):
+                        cursor.execute(f'''
+                            INSERT INTO partial_activity
+                            SELECT {self.USER_KEY_SQL} AS user_key, MAX({self.USER_NAME_SQL}),
+                                   MAX(u.update_time), c.video_id, COUNT(*), SUM(c.like_count),
+                                   MIN(c.publish_time), MAX(c.publish_time)
+                            FROM shard.comments c
+                            LEFT JOIN shard.users u ON u.mid = c.user_mid
+                            GROUP BY user_key, c.video_id
+                        ''')
+                cursor.execute('CREATE INDEX idx_partial_activity_user ON partial_activity(user_key, name_time)')
+
+                cursor.execute('DELETE FROM analytics_user_activity')
+                cursor.execute('''
+                    INSERT INTO analytics_user_activity (
+                        user_key, user_name, comment_count, total_likes, video_count,
+                        first_time, last_time
+                    )
+                    SELECT user_key,
+                           (SELECT latest.user_name FROM partial_activity latest
+                            WHERE latest.user_key = p.user_key
+                            ORDER BY latest.name_time DESC LIMIT 1),
+                           SUM(comment_count), SUM(total_likes), COUNT(DISTINCT video_id),
+                           MIN(first_time), MAX(last_time)
+                    FROM partial_activity p
+                    GROUP BY user_key
+                ''')
+                conn.commit()
+
+        except Exception as e:
+            self.logger.error(f"汇总用户活跃度失败: {str(e)}")
+            raise
+
+    def get_video_sentiment(self, limit=100):
+        """获取各视频的情感统计，视频标题从分片中补全"""
+        rows = super().get_video_sentiment(limit)
+        video_ids = [row[0] for row in rows]
+        if not video_ids:
+            return rows
+
+        def video_titles(shard):
+            with shard.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT video_id, MIN(video_title)
+                    FROM comments
+                    WHERE video_id IN ({','.join('?' * len(video_ids))})
+                    GROUP BY video_id
+                ''', video_ids)
+                return cursor.fetchall()
+
+        titles = {}
+        for result in self._fan_out(video_titles):
+            titles.update(result)
+        return [(row[0], titles.get(row[0])) + tuple(row[2:]) for row in rows]
+
+    def rebuild_dedup_index(self, chunk_size=10000):
+        if self.dedup_index is None:
+            raise RuntimeError("未启用评论去重")
+        return sum(self._fan_out(lambda shard: shard.rebuild_dedup_index(chunk_size)))
+
+    def get_duplicate_clusters(self, min_size=2, limit=50):
+        """获取近似重复评论簇，簇在各分片内独立编号"""
+        results = self._fan_out(lambda shard: shard.get_duplicate_clusters(min_size, limit))
+        return heapq.nlargest(limit, (row for result in results for row in result), key=lambda row: row[1])
+
+    def get_all_comments(self):
+        """获取所有分片的评论，按发布时间降序归并"""
+        results = self._fan_out(lambda shard: shard.get_all_comments())
+        return list(heapq.merge(*results, key=lambda row: row[6], reverse=True))
+
+    def export_comments_to_csv(self, file_path):
+        """流式归并各分片的评论导出为CSV文件，内存中只保留各分片的游标，之后逐页写入各分片归档的评论"""
+        try:
+            with ExitStack() as stack:
+                shards = []
+                cursors = []
+                for shard in self._comment_stores():
+                    conn = stack.enter_context(shard.get_connection())
+                    cursor = conn.cursor()
+                    cursor.execute(shard._comment_select(cursor) + ' ORDER BY c.publish_time DESC')
+                    shards.append(shard)
+                    cursors.append(cursor)
+
+                if not cursors:
+                    return
+
+                columns = [description[0] for description in cursors[0].description]
+                with open(file_path, 'w', newline='', encoding='utf-8-sig') as csv_file:
+                    writer = csv.writer(csv_file)
+                    writer.writerow(columns)
+                    writer.writerows(heapq.merge(*cursors, key=lambda row: row[6], reverse=True))
+
+                    # 归档的评论没有在线表中的id和去重字段，这些列留空
+                    positions = [columns.index(name) for name in ARCHIVE_COLUMNS]
+                    for shard, cursor in zip(shards, cursors):
+                        for rows in shard._iter_archive_pages(cursor):
+                            for archived in shard._with_user_names(cursor, rows):
+                                row = [None] * len(columns)
+                                for position, value in zip(positions, archived):
+                                    row[position] = value
+                                writer.writerow(row)
+
+        except Exception as e:
+            self.logger.error(f"导出CSV文件失败: {str(e)}")
+            raise
@@ -0,0 +1,264 @@
+# bilibili_spider/utils/storage.py
+
+"""存储后端接口
+
+所有后端都必须实现核心接口(抽象方法): 评论的保存、查询、统计、导出和Cookie管理，
+界面的爬取、查询、设置页面只依赖这部分。
+监控列表、评论分析、去重、列式查询、弹幕、短链接缓存、代理池和归档属于扩展接口，默认抛出NotImplementedError，
+由支持的后端(目前为SQLite)覆盖，并在FEATURES中声明。调用方在开始使用扩展功能前用supports()检查。
+"""
+
+import logging
+from abc import ABC, abstractmethod
+
+# 扩展功能名到界面和错误提示中使用的名称
+FEATURE_NAMES = {
+    'like_history': "点赞数历史",
+    'watchlist': "监控列表",
+    'analytics': "评论分析",
+    'columns': "列式查询",
+    'dedup': "评论去重",
+    'users': "用户维度表",
+    'danmaku': "弹幕",
+    'short_links': "短链接缓存",
+    'proxy': "代理池",
+    'archive': "评论归档",
+    'vacuum': "数据库整理"
+}
+
+
+class QueryCancelled(Exception):
+    """查询在完成前被调用方取消"""
+
+
+class StorageBackend(ABC):
+    """存储后端基类"""
+
+    FEATURES = frozenset()  # 后端实现的扩展功能，取值为FEATURE_NAMES中的键
+
+    def _setup_logger(self):
+        """设置日志记录器
+
+        @return {Logger} - 配置好的日志记录器
+        """
+        logger = logging.getLogger('BilibiliSpider')
+        logger.setLevel(logging.INFO)
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setLevel(logging.INFO)
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        return logger
+
+    def supports(self, feature):
+        """后端是否实现了某个扩展功能
+
+        @param {string} feature - FEATURE_NAMES中的键，如'analytics'
+        @return {bool} - 是否支持
+        """
+        return feature in self.FEATURES
+
+    def unsupported_message(self, feature):
+        """不支持某个扩展功能时的提示
+
+        @param {string} feature - FEATURE_NAMES中的键
+        @return {string} - 提示文字
+        """
+        return f"当前存储后端({type(self).__name__})不支持{FEATURE_NAMES[feature]}"
+
+    def _unsupported(self, feature):
+        raise NotImplementedError(self.unsupported_message(feature))
+
+    # ---- Cookie ----
+
+    @abstractmethod
+    def save_cookie(self, cookie, expire_days=30, exclusive=False):
+        """保存Cookie，已存在时重新启用"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_valid_cookie(self):
+        """获取最新的有效Cookie
+
+        @return {tuple} - (cookie字符串, 是否需要更新)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_cookie_pool(self):
+        """获取所有有效且未过期的Cookie记录字典"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def record_cookie_usage(self, usages):
+        """批量写入Cookie池累计的使用统计"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_cookie_valid(self, cookie_id, is_valid):
+        """更新Cookie的有效状态"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear_cookies(self):
+        """清除所有Cookie记录"""
+        raise NotImplementedError
+
+    # ---- 评论 ----
+
+    @abstractmethod
+    def save_comment(self, comment):
+        """保存或更新评论
+
+        @return {int} - 1为新增，2为更新，3为完全重复已跳过，0为失败
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_existing_comment_ids(self, comment_ids, video_id=None):
+        """查询已存在的评论ID集合，video_id为这些评论所属的视频，分片存储可据此只查一个分片"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_existing_video_ids(self, video_ids):
+        """查询已有评论入库的视频ID集合"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_like_counts(self, like_counts, record_history=False):
+        """批量更新点赞数，返回实际更新的评论数"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def query_comments_batch(self, query_type, search_text='', batch_size=100, offset=0, sort_by='publish_time',
+                             sort_order='DESC', cancel_event=None):
+        """分批查询评论，行格式为(video_id, video_title, user_name, content, publish_time,
+        like_count, replies, update_time)；cancel_event被设置后抛出QueryCancelled"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_comment_chunks(self, columns, chunk_size=10000):
+        """按主键分块读取评论"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_comments(self):
+        """获取所有评论，按发布时间降序"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear_database(self):
+        """清空评论数据"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_statistics(self):
+        """获取评论总数、视频数、用户数和最新评论时间"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def export_comments_to_csv(self, file_path):
+        """将评论导出为CSV文件"""
+        raise NotImplementedError
+
+    # ---- 扩展接口 ----
+
+    def enable_dedup(self, config):
+        """按配置启用评论去重，不支持的后端忽略该配置"""
+        if config.DEDUP_ENABLED:
+            self._setup_logger().warning(f"{type(self).__name__}不支持评论去重，已忽略去重配置")
+
+    def get_like_history(self, comment_id):
+        self._unsupported('like_history')
+
+    def add_to_watchlist(self, video_id, video_title='', interval_minutes=60):
+        self._unsupported('watchlist')
+
+    def remove_from_watchlist(self, video_id):
+        self._unsupported('watchlist')
+
+    def get_watchlist(self, due_only=False):
+        self._unsupported('watchlist')
+
+    def update_watch_status(self, video_id, video_title, reply_count, growth_rate, interval_minutes, backlog=()):
+        self._unsupported('watchlist')
+
+    def save_analytics(self, keywords, sentiment):
+        self._unsupported('analytics')
+
+    def refresh_user_activity(self):
+        self._unsupported('analytics')
+
+    def get_top_keywords(self, video_id='', limit=50):
+        self._unsupported('analytics')
+
+    def get_video_sentiment(self, limit=100):
+        self._unsupported('analytics')
+
+    def get_user_activity(self, limit=100):
+        self._unsupported('analytics')
+
+    def load_columns(self, columns, video_id=None, user_name=None, start_time=None, end_time=None,
+                     chunk_size=100000):
+        self._unsupported('columns')
+
+    def load_dataframe(self, columns, video_id=None, user_name=None, start_time=None, end_time=None,
+                       chunk_size=100000):
+        self._unsupported('columns')
+
+    def rebuild_dedup_index(self, chunk_size=10000):
+        self._unsupported('dedup')
+
+    def get_duplicate_clusters(self, min_size=2, limit=50):
+        self._unsupported('dedup')
+
+    def get_user(self, mid):
+        self._unsupported('users')
+
+    def find_users(self, name, limit=50):
+        self._unsupported('users')
+
+    def get_user_comments(self, mid, batch_size=100, offset=0):
+        self._unsupported('users')
+
+    def save_danmaku(self, video_id, cid, rows):
+        self._unsupported('danmaku')
+
+    def get_danmaku(self, cid, start_ms=0, end_ms=None, limit=1000):
+        self._unsupported('danmaku')
+
+    def get_danmaku_density(self, cid, bucket_seconds=10):
+        self._unsupported('danmaku')
+
+    def get_short_links(self, urls):
+        self._unsupported('short_links')
+
+    def save_short_links(self, links):
+        self._unsupported('short_links')
+
+    def save_proxies(self, urls):
+        self._unsupported('proxy')
+
+    def get_proxies(self):
+        self._unsupported('proxy')
+
+    def get_proxy_pool(self):
+        self._unsupported('proxy')
+
+    def record_proxy_usage(self, usages):
+        self._unsupported('proxy')
+
+    def set_proxy_active(self, proxy_id, is_active):
+        self._unsupported('proxy')
+
+    def archive_comments(self, before_time, page_size=1000, level=10):
+        self._unsupported('archive')
+
+    def get_archive_stats(self):
+        self._unsupported('archive')
+
+    def vacuum(self):
+        self._unsupported('vacuum')
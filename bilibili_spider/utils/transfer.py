@@ -0,0 +1,86 @@
+# bilibili_spider/utils/transfer.py
+
+"""接口响应的传输与解码
+
+请求头只声明当前环境能解码的压缩格式: gzip和deflate始终可用，
+安装brotli后加入br，安装zstandard后加入zstd，与urllib3自动解压的范围一致，
+避免服务器返回无法解压的响应。JSON优先用orjson直接从字节解析。
+"""
+
+import json
+import threading
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def accept_encoding():
+    """当前环境能够解码的Accept-Encoding
+
+    @return {string} - 例如"gzip, deflate, br"
+    """
+    return ', '.join(ACCEPT_ENCODING.split(','))
+
+
+def loads(body):
+    """从响应体字节解析JSON，跳过requests按字符集猜测编码的步骤
+
+    @param {bytes} body - 响应体
+    @return {dict} - 解析后的数据
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class TransferStats:
+    """累计请求数、线上传输的字节数和解压后的字节数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def record(self, response):
+        """记录一个已读取完的响应
+
+        @param {Response} response - requests的响应对象或Http2Response
+        """
+        try:
+            wire_bytes = response.raw.tell()  # urllib3从套接字读取的字节数，即解压前的大小
+        except (AttributeError, OSError):
+            wire_bytes = getattr(response, 'num_bytes_downloaded', None) or len(response.content)
+        with self.lock:
+            self.requests += 1
+            self.wire_bytes += wire_bytes
+            self.body_bytes += len(response.content)
+
+    def snapshot(self):
+        """当前累计值
+
+        @return {dict} - 请求数、传输字节数、解压后字节数
+        """
+        with self.lock:
+            return {'requests': self.requests, 'wire_bytes': self.wire_bytes, 'body_bytes': self.body_bytes}
+
+    def summary(self, since=None):
+        """生成统计摘要
+
+        @param {dict} since - snapshot()的结果，只统计此后的请求
+        @return {string} - 摘要文本
+        """
+        current = self.snapshot()
+        if since:
+            current = {key: value - since[key] for key, value in current.items()}
+        if not current['requests']:
+            return "没有发送请求"
+        return (
+            f"{current['requests']} 个请求，传输 {current['wire_bytes'] / 1024:.1f} KB，"
+            f"解压后 {current['body_bytes'] / 1024:.1f} KB，"
+            f"平均每个请求 {current['wire_bytes'] / current['requests'] / 1024:.1f} KB"
+        )
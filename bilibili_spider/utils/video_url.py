@@ -0,0 +1,115 @@
+# bilibili_spider/utils/video_url.py
+
+"""视频链接的识别与av号、BV号互转
+
+支持桌面版和移动版视频页、带查询参数的av号链接、bilibili://客户端链接、
+分享文案中夹带的链接，以及b23.tv等短链接。短链接需要访问网络才能得到目标视频，
+这里只识别出来，由UrlResolver负责跟随跳转。
+"""
+
+import re
+from urllib.parse import urlsplit, parse_qsl
+
+# 短链接域名
+SHORT_LINK_HOSTS = ('b23.tv', 'bili2233.cn', 'bili22.cn', 'bili23.cn', 'bili33.cn')
+
+BV_PATTERN = re.compile(r'\b[Bb][Vv]1[1-9A-HJ-NP-Za-km-z]{9}\b')
+AV_PATTERN = re.compile(r'(?<![A-Za-z])av(\d+)', re.I)
+URL_PATTERN = re.compile(r'(?:[a-z][a-z0-9+.-]*://|(?:www\.|m\.)?(?:bilibili\.com|' +
+                         '|'.join(re.escape(host) for host in SHORT_LINK_HOSTS) + r')/)[^\s　【】「」]+', re.I)
+
+# 查询参数中表示aid的参数名
+AID_PARAMS = ('aid', 'avid')
+
+# BV号编码参数
+_XOR_CODE = 23442827791579
+_MASK_CODE = 2251799813685247
+_MAX_AID = 1 << 51
+_ALPHABET = 'FcwAPNKTMug3GV5Lj7EJnHpWsx4tb8haYeviqBz6rkCy12mUSDQX9RdoZf'
+_ALPHABET_INDEX = {char: index for index, char in enumerate(_ALPHABET)}
+_ENCODE_MAP = (8, 7, 0, 5, 1, 3, 2, 4, 6)
+_BASE = 58
+
+
+def av2bv(aid):
+    """av号转BV号
+
+    @param {int} aid - av号
+    @return {string} - BV号
+    """
+    chars = [''] * len(_ENCODE_MAP)
+    value = (_MAX_AID | int(aid)) ^ _XOR_CODE
+    for position in _ENCODE_MAP:
+        chars[position] = _ALPHABET[value % _BASE]
+        value //= _BASE
+    return 'BV1' + ''.join(chars)
+
+
+def bv2av(bvid):
+    """BV号转av号
+
+    @param {string} bvid - BV号
+    @return {int} - av号
+    """
+    value = 0
+    for position in reversed(_ENCODE_MAP):
+        value = value * _BASE + _ALPHABET_INDEX[bvid[3 + position]]
+    return (value & _MASK_CODE) ^ _XOR_CODE
+
+
+def _normalize_bvid(text):
+    return 'BV' + text[2:]
+
+
+def parse_video_url(text, short_hosts=SHORT_LINK_HOSTS):
+    """识别一行输入中的视频
+
+    @param {string} text - 链接、分享文案、BV号或av号
+    @param {tuple} short_hosts - 短链接域名
+    @return {tuple} - ('bvid', BV号)、('aid', av号)或('short', 短链接地址)，无法识别时返回None
+    """
+    text = text.strip()
+    if not text:
+        return None
+
+    match = URL_PATTERN.search(text)
+    if match:
+        url = match.group(0)
+        parts = urlsplit(url if '://' in url else 'https://' + url)
+        host = parts.hostname or ''
+        path = parts.path
+
+        if host in short_hosts or host.endswith(tuple('.' + short for short in short_hosts)):
+            code = path.strip('/')
+            if BV_PATTERN.fullmatch(code):
+                return 'bvid', _normalize_bvid(code)
+            if code:
+                return 'short', f'{parts.scheme or "https"}://{parts.netloc}/{code}'
+            return None
+
+        # bilibili://video/170001
+        if parts.scheme == 'bilibili' and host == 'video':
+            digits = path.strip('/')
+            if digits.isdigit():
+                return 'aid', int(digits)
+
+        bv_match = BV_PATTERN.search(path)
+        if bv_match:
+            return 'bvid', _normalize_bvid(bv_match.group(0))
+        av_match = AV_PATTERN.search(path)
+        if av_match:
+            return 'aid', int(av_match.group(1))
+        for name, value in parse_qsl(parts.query):
+            if name.lower() == 'bvid' and BV_PATTERN.fullmatch(value):
+                return 'bvid', _normalize_bvid(value)
+            if name.lower() in AID_PARAMS and value.isdigit():
+                return 'aid', int(value)
+        return None
+
+    bv_match = BV_PATTERN.search(text)
+    if bv_match:
+        return 'bvid', _normalize_bvid(bv_match.group(0))
+    av_match = AV_PATTERN.search(text)
+    if av_match:
+        return 'aid', int(av_match.group(1))
+    return None
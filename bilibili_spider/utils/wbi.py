@@ -0,0 +1,58 @@
+# bilibili_spider/utils/wbi.py
+
+"""WBI请求签名
+
+空间投稿列表、搜索等接口要求在查询参数中附带wts(时间戳)和w_rid(签名)。
+签名密钥由nav接口返回的img_key和sub_key按固定顺序重排后取前32位得到，
+密钥每天更换，使用方应定期重新获取。
+"""
+
+import os
+import time
+import hashlib
+from urllib.parse import urlencode, urlsplit
+
+# 由img_key+sub_key生成签名密钥时的字符重排表
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# 参与签名前从参数值中去掉的字符
+_FILTERED_CHARS = str.maketrans('', '', "!'()*")
+
+
+def key_from_url(url):
+    """从wbi_img中的图片地址取出密钥，即不含扩展名的文件名
+
+    @param {string} url - img_url或sub_url
+    @return {string} - 密钥
+    """
+    return os.path.splitext(os.path.basename(urlsplit(url).path))[0]
+
+
+def mixin_key(img_key, sub_key):
+    """生成签名密钥
+
+    @param {string} img_key - nav接口wbi_img.img_url中的密钥
+    @param {string} sub_key - nav接口wbi_img.sub_url中的密钥
+    @return {string} - 32位签名密钥
+    """
+    raw = img_key + sub_key
+    return ''.join(raw[index] for index in MIXIN_KEY_ENC_TAB if index < len(raw))[:32]
+
+
+def sign_params(params, key, wts=None):
+    """为查询参数签名
+
+    @param {dict} params - 查询参数
+    @param {string} key - mixin_key()生成的签名密钥
+    @param {int} wts - 时间戳，为空时取当前时间
+    @return {string} - 带wts和w_rid的查询字符串
+    """
+    params = dict(params, wts=int(time.time()) if wts is None else wts)
+    query = urlencode(sorted((name, str(value).translate(_FILTERED_CHARS)) for name, value in params.items()))
+    w_rid = hashlib.md5((query + key).encode('utf-8')).hexdigest()
+    return f'{query}&w_rid={w_rid}'
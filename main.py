@@ -1,9 +1,8 @@
 # main.py
 
 import sys
+import argparse
 import logging
-from PyQt6.QtWidgets import QApplication
-from bilibili_spider.main_window import MainWindow
 
 
 def setup_logger():
@@ -22,9 +21,108 @@ def setup_logger():
     return logger
 
 
+def run_watch(logger, add_urls):
+    """无界面运行监控调度"""
+    from bilibili_spider.utils.config import Config
+    from bilibili_spider.utils.db_handler import open_database
+    from bilibili_spider.spiders.comment_spider import BilibiliSpider
+    from bilibili_spider.spiders.watch_scheduler import WatchScheduler
+
+    config = Config()
+    db_handler = open_database(config)
+    if not db_handler.supports('watchlist'):
+        logger.error(db_handler.unsupported_message('watchlist'))
+        sys.exit(1)
+
+    for url in add_urls:
+        video_id = BilibiliSpider.extract_video_id(url)
+        if video_id:
+            db_handler.add_to_watchlist(video_id)
+        else:
+            logger.error(f"无法从URL中提取视频ID: {url}")
+
+    cookie, _ = db_handler.get_valid_cookie()
+    if not (cookie and config.set_cookie(cookie)):
+        logger.error("请先在界面中设置Cookie")
+        sys.exit(1)
+    config.load_cookie_pool(db_handler.get_cookie_pool(), on_flush=db_handler.record_cookie_usage)
+    if config.PROXY_ENABLED and db_handler.supports('proxy'):
+        config.load_proxy_pool(db_handler.get_proxy_pool(), on_flush=db_handler.record_proxy_usage)
+
+    scheduler = WatchScheduler(BilibiliSpider(config), db_handler, config)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+def run_replay(logger):
+    """无界面从响应缓存重建评论数据"""
+    from bilibili_spider.utils.config import Config
+    from bilibili_spider.utils.db_handler import open_database
+    from bilibili_spider.spiders.comment_spider import BilibiliSpider
+    from bilibili_spider.spiders.cache_replay import CacheReplay
+
+    config = Config()
+    config.RESPONSE_CACHE_MODE = 'replay'
+    db_handler = open_database(config)
+
+    spider = BilibiliSpider(config)
+    CacheReplay(spider, db_handler, spider.response_cache).run()
+
+
+def run_danmaku(logger, urls):
+    """无界面爬取视频弹幕"""
+    from bilibili_spider.utils.config import Config
+    from bilibili_spider.utils.db_handler import open_database
+    from bilibili_spider.spiders.comment_spider import BilibiliSpider
+    from bilibili_spider.spiders.danmaku_spider import DanmakuCrawler
+
+    config = Config()
+    db_handler = open_database(config)
+    if not db_handler.supports('danmaku'):
+        logger.error(db_handler.unsupported_message('danmaku'))
+        sys.exit(1)
+
+    cookie, _ = db_handler.get_valid_cookie()
+    if cookie and config.set_cookie(cookie):
+        config.load_cookie_pool(db_handler.get_cookie_pool(), on_flush=db_handler.record_cookie_usage)
+    if config.PROXY_ENABLED and db_handler.supports('proxy'):
+        config.load_proxy_pool(db_handler.get_proxy_pool(), on_flush=db_handler.record_proxy_usage)
+
+    crawler = DanmakuCrawler(BilibiliSpider(config), db_handler, config)
+    for url in urls:
+        try:
+            crawler.crawl(url)
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            logger.error(f"爬取弹幕失败: {url} ({str(e)})")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="B站评论爬虫")
+    parser.add_argument('--watch', action='store_true', help="不启动界面，直接运行监控列表调度")
+    parser.add_argument('--watch-add', nargs='+', default=[], metavar='URL', help="将视频加入监控列表后运行监控调度")
+    parser.add_argument('--replay-cache', action='store_true', help="不访问网络，从响应缓存重建评论数据")
+    parser.add_argument('--danmaku', nargs='+', default=[], metavar='URL', help="不启动界面，爬取视频的弹幕")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    if args.replay_cache:
+        run_replay(logger)
+        return
+    if args.danmaku:
+        run_danmaku(logger, args.danmaku)
+        return
+    if args.watch or args.watch_add:
+        run_watch(logger, args.watch_add)
+        return
+
     try:
-        logger = setup_logger()
+        from PyQt6.QtWidgets import QApplication
+        from bilibili_spider.main_window import MainWindow
+
         app = QApplication(sys.argv)
         window = MainWindow()
         window.show()
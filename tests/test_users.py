@@ -0,0 +1,64 @@
+# tests/test_users.py
+
+"""评论作者按mid汇总，改名的用户只算一次并显示最新名称"""
+
+import pytest
+
+from bilibili_spider.models.comments import Comment
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.utils.sharded_db import ShardedDatabaseHandler
+
+
+@pytest.fixture(params=['single', 'sharded'])
+def db_handler(request, tmp_path):
+    if request.param == 'single':
+        return DatabaseHandler(str(tmp_path / 'comments.db'))
+    return ShardedDatabaseHandler(str(tmp_path / 'comments.db'), shard_dir=str(tmp_path / 'shards'))
+
+
+@pytest.fixture
+def renamed_user(db_handler):
+    # 同一用户改名前后各发一条评论，发布月份不同，分片存储时位于两个分片
+    db_handler.save_comment(Comment('BV1', '视频1', '1', '旧名', '评论1', '2024-01-05 00:00:00', 3, user_mid=7))
+    db_handler.save_comment(Comment('BV2', '视频2', '2', '新名', '评论2', '2024-03-05 00:00:00', 4, user_mid=7))
+    db_handler.save_comment(Comment('BV1', '视频1', '3', '路人', '评论3', '2024-03-06 00:00:00', 1))
+    return db_handler
+
+
+def test_user_activity_groups_renamed_user_by_mid(renamed_user):
+    renamed_user.refresh_user_activity()
+    activity = renamed_user.get_user_activity()
+    assert activity == [
+        ('新名', 2, 7, 2, '2024-01-05 00:00:00', '2024-03-05 00:00:00'),
+        ('路人', 1, 1, 1, '2024-03-06 00:00:00', '2024-03-06 00:00:00'),
+    ]
+    assert renamed_user.get_statistics()['total_users'] == 2
+
+
+def test_comment_rows_do_not_store_name_of_users_with_mid(renamed_user):
+    for store in renamed_user._comment_stores():
+        with store.get_connection() as conn:
+            for user_name, user_mid in conn.execute('SELECT user_name, user_mid FROM comments'):
+                assert user_name == ('' if user_mid else '路人')
+
+
+def test_single_store_reads_latest_name_from_users(tmp_path):
+    db_handler = DatabaseHandler(str(tmp_path / 'comments.db'))
+    db_handler.save_comment(Comment('BV1', '视频1', '1', '旧名', '评论1', '2024-01-05 00:00:00', 3, user_mid=7))
+    db_handler.save_comment(Comment('BV2', '视频2', '2', '新名', '评论2', '2024-03-05 00:00:00', 4, user_mid=7))
+    db_handler.archive_comments('2024-02-01 00:00:00')
+
+    assert [row[2] for row in db_handler.query_comments_batch('1')] == ['新名', '新名']
+    assert [row[2] for row in db_handler.get_user_comments(7)] == ['新名']
+    assert [row[4] for row in db_handler.get_all_comments()] == ['新名']
+
+
+def test_archive_user_search_matches_latest_name_by_mid(tmp_path):
+    db_handler = DatabaseHandler(str(tmp_path / 'comments.db'))
+    db_handler.save_comment(Comment('BV1', '视频1', '1', '旧名', '评论1', '2024-01-05 00:00:00', 3, user_mid=7))
+    db_handler.save_comment(Comment('BV1', '视频1', '2', '路人', '评论2', '2024-01-06 00:00:00', 1))
+    db_handler.archive_comments('2024-02-01 00:00:00')
+    db_handler.save_comment(Comment('BV2', '视频2', '3', '新名', '评论3', '2024-03-05 00:00:00', 4, user_mid=7))
+
+    assert [row[3] for row in db_handler.query_comments_batch('4', '新名')] == ['评论3', '评论1']
+    assert [row[3] for row in db_handler.query_comments_batch('4', '路人')] == ['评论2']
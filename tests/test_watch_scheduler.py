@@ -0,0 +1,184 @@
+# tests/test_watch_scheduler.py
+
+"""监控调度器的检查间隔、页数分配和预算不足时的积压"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from bilibili_spider.utils.config import Config
+from bilibili_spider.utils.db_handler import DatabaseHandler
+from bilibili_spider.spiders.watch_scheduler import WatchScheduler
+
+VIDEO_ID = 'BV1test00000'
+
+
+class FakeSpider:
+    """按发布时间倒序分页返回内存中评论的替身爬虫"""
+
+    SORT_BY_TIME = 0
+    SORT_BY_LIKE = 1
+    offline = True
+
+    def __init__(self, pubdate):
+        self.pubdate = pubdate
+        self.replies = []  # 最新的评论在前
+        self.next_rpid = 1
+        self.next_ctime = pubdate
+
+    def post(self, count):
+        """发布count条新评论"""
+        for _ in range(count):
+            self.next_ctime += 1
+            self.replies.insert(0, {'rpid': self.next_rpid, 'ctime': self.next_ctime, 'like': 0})
+            self.next_rpid += 1
+
+    def get_video_info(self, video_id):
+        return {'title': '测试视频', 'pubdate': self.pubdate, 'stat': {'reply': len(self.replies)}}
+
+    def fetch_reply_page(self, video_id, page=1, sort=SORT_BY_TIME):
+        if sort == self.SORT_BY_LIKE:
+            return self.replies[:WatchScheduler.PAGE_SIZE]
+        start = (page - 1) * WatchScheduler.PAGE_SIZE
+        return self.replies[start:start + WatchScheduler.PAGE_SIZE]
+
+    def parse_reply(self, reply, video_id, video_title):
+        return {
+            'comment_id': str(reply['rpid']),
+            'video_id': video_id,
+            'video_title': video_title,
+            'user_name': f"用户{reply['rpid']}",
+            'content': f"评论{reply['rpid']}",
+            'publish_time': datetime.fromtimestamp(reply['ctime']).strftime('%Y-%m-%d %H:%M:%S'),
+            'like_count': reply['like'],
+            'replies': []
+        }
+
+
+@pytest.fixture
+def config():
+    config = Config()
+    config.WATCH_MIN_INTERVAL = 10
+    config.WATCH_MAX_INTERVAL = 24 * 60
+    return config
+
+
+@pytest.fixture
+def scheduler(tmp_path, config):
+    db_handler = DatabaseHandler(str(tmp_path / 'watch.db'))
+    spider = FakeSpider(pubdate=int(time.time()) - 10 * 3600)
+    return WatchScheduler(spider, db_handler, config)
+
+
+def stored_comments(scheduler):
+    return scheduler.db_handler.get_statistics()['total_comments']
+
+
+def test_compute_interval(scheduler, config):
+    assert scheduler.compute_interval(0) == config.WATCH_MAX_INTERVAL
+    assert scheduler.compute_interval(-5) == config.WATCH_MAX_INTERVAL
+    # 每小时6条，新增一页(20条)约需200分钟
+    assert scheduler.compute_interval(6) == 200
+    assert scheduler.compute_interval(10000) == config.WATCH_MIN_INTERVAL
+    assert scheduler.compute_interval(0.001) == config.WATCH_MAX_INTERVAL
+
+
+def test_allocate_budget_proportional(scheduler):
+    allocation = scheduler.allocate_budget({'a': 1, 'b': 11, 'c': 21}, 13)
+    assert allocation['a'] == 1
+    assert allocation['b'] == 1 + 10 * 10 // 30
+    assert allocation['c'] == 1 + 10 * 20 // 30
+    assert sum(allocation.values()) <= 13
+
+
+def test_allocate_budget_caps_at_demand(scheduler):
+    assert scheduler.allocate_budget({'a': 2, 'b': 3}, 100) == {'a': 2, 'b': 3}
+
+
+def test_allocate_budget_smaller_than_video_count(scheduler):
+    allocation = scheduler.allocate_budget({'a': 1, 'b': 5, 'c': 3, 'd': 2}, 2)
+    assert allocation == {'a': 0, 'b': 1, 'c': 1, 'd': 0}
+    assert scheduler.allocate_budget({'a': 1}, 0) == {'a': 0}
+
+
+def test_first_check_seeds_growth_rate_from_publish_time(scheduler):
+    scheduler.spider.post(100)
+    scheduler.db_handler.add_to_watchlist(VIDEO_ID)
+    item = scheduler.db_handler.get_watchlist()[0]
+
+    _, reply_count, new_replies, growth_rate = scheduler.check_video(item)
+    assert (reply_count, new_replies) == (100, 100)
+    # 发布10小时，约每小时10条
+    assert growth_rate == pytest.approx(10, rel=0.01)
+    assert scheduler.compute_interval(growth_rate) < scheduler.config.WATCH_MAX_INTERVAL
+
+
+def test_status_is_written_after_crawl(scheduler):
+    scheduler.spider.post(30)
+    scheduler.db_handler.add_to_watchlist(VIDEO_ID)
+
+    scheduler.run_once()
+    item = scheduler.db_handler.get_watchlist()[0]
+    assert item['reply_count'] == 30
+    assert item['backlog'] == []
+    assert item['last_check_time'] is not None
+    assert stored_comments(scheduler) == 30
+
+
+def test_unallocated_video_stays_due(scheduler, config):
+    config.WATCH_PAGE_BUDGET = 1
+    scheduler.spider.post(5)
+    scheduler.db_handler.add_to_watchlist(VIDEO_ID)
+    scheduler.db_handler.add_to_watchlist('BV1other0000')
+
+    scheduler.run_once()
+    due = {item['video_id']: item for item in scheduler.db_handler.get_watchlist(due_only=True)}
+    # 预算只够一个视频，另一个没分到页数，状态不变且仍然到期
+    assert len(due) == 1
+    assert next(iter(due.values()))['last_check_time'] is None
+
+
+def test_budget_truncation_is_caught_up_later(scheduler, config):
+    """预算不足时没读到的较早新评论在之后的检查中补齐，新评论插在前面也不会漏"""
+    config.WATCH_PAGE_BUDGET = 3
+    config.WATCH_MIN_INTERVAL = 0  # 有积压时立即再次到期
+    scheduler.spider.post(100)
+    scheduler.db_handler.add_to_watchlist(VIDEO_ID)
+
+    assert scheduler.run_once() == 3
+    item = scheduler.db_handler.get_watchlist()[0]
+    assert stored_comments(scheduler) == 60
+    assert len(item['backlog']) == 1
+
+    # 下次检查前又有30条新评论，之前没读到的评论整体后移
+    scheduler.spider.post(30)
+    rounds = 0
+    while scheduler.db_handler.get_watchlist()[0]['backlog'] or rounds == 0:
+        scheduler.run_once()
+        rounds += 1
+        assert rounds < 10
+
+    assert stored_comments(scheduler) == 130
+    item = scheduler.db_handler.get_watchlist()[0]
+    assert item['reply_count'] == 130
+    assert item['interval_minutes'] == scheduler.compute_interval(item['growth_rate'])
+
+
+def test_truncated_new_segment_keeps_older_backlog(scheduler, config):
+    """最新一段也被预算截断时，之前的积压不会丢失"""
+    config.WATCH_PAGE_BUDGET = 2
+    config.WATCH_MIN_INTERVAL = 0
+    scheduler.spider.post(80)
+    scheduler.db_handler.add_to_watchlist(VIDEO_ID)
+    scheduler.run_once()
+
+    scheduler.spider.post(60)
+    scheduler.run_once()
+    assert len(scheduler.db_handler.get_watchlist()[0]['backlog']) == 2
+
+    for _ in range(20):
+        if not scheduler.db_handler.get_watchlist()[0]['backlog']:
+            break
+        scheduler.run_once()
+    assert stored_comments(scheduler) == 140